@@ -0,0 +1,6 @@
+"""Performance benchmarks for kspalculator. Run them from the repository root, e.g.
+
+    python -m benchmarks.find_many
+
+benchmarks.suite covers all hot paths and compares results against a saved baseline.
+"""
@@ -0,0 +1,56 @@
+"""Scaling of the dominance pass (dominance.mark_best) with synthetic designs.
+
+For small counts, results are checked against the all-pairs comparison.
+"""
+
+from __future__ import print_function
+
+import random
+import timeit
+
+from kspalculator import parts
+from kspalculator.design import Design
+from kspalculator.dominance import mark_best
+
+PREFERENCES = (parts.RadialSize.Small, 1, False, True, True)
+
+
+def synthetic_designs(count, seed=0):
+    rnd = random.Random(seed)
+    designs = []
+    for _ in range(count):
+        eng = rnd.choice(parts.LiquidFuelEngines)
+        d = Design(1000, eng, 1, rnd.choice([parts.RadialSize.Small, parts.RadialSize.Large, eng.size]),
+                   parts.FuelTypes.LiquidFuel)
+        if rnd.random() < 0.3:
+            d.add_sfb(rnd.choice(parts.SolidFuelBoosters), rnd.choice([1, 2, 4]))
+        d._final_mass = float(rnd.randint(2000, 200000))
+        d._final_cost = float(rnd.randint(500, 100000))
+        d.performance = ([rnd.choice([2000, 2010])],)
+        designs.append(d)
+    return designs
+
+
+def all_pairs(designs):
+    for d in designs:
+        for e in designs:
+            if (d is not e) and e.is_best and not d.is_better_than(e, *PREFERENCES):
+                d.is_best = False
+                break
+
+
+def main():
+    for count in [100, 1000, 10000, 100000]:
+        designs = synthetic_designs(count)
+        t = timeit.timeit(lambda: mark_best(designs, *PREFERENCES), number=1)
+        line = "%6i designs: mark_best %.3f s, %i best" % (count, t, sum(d.is_best for d in designs))
+        if count <= 10000:
+            reference = synthetic_designs(count)
+            t = timeit.timeit(lambda: all_pairs(reference), number=1)
+            assert [d.is_best for d in designs] == [d.is_best for d in reference]
+            line += ", all pairs %.3f s" % t
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
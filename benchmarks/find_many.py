@@ -0,0 +1,31 @@
+"""Compares Finder.find_many() against calling Finder.find() in a loop.
+
+The missions differ only in payload, so find_many() shares candidates, engine performance and
+needed fuel ratios among them. Fuel tanks, performance and ranking still depend on the payload
+and take most of the remaining time, so expect a speedup of about 1.4x, not an order of magnitude.
+"""
+
+from __future__ import print_function
+
+import timeit
+
+from kspalculator.finder import Finder
+from kspalculator.parts import RadialSize
+
+
+def missions(count):
+    return [Finder(500 + 100*i, RadialSize.Small, [1170, 580, 580, 210, 700], [0.0, 3.3, 5.0, 0.0, 0.0],
+                   5*[0.0], 5*[True], False, False, False, True, True)
+            for i in range(count)]
+
+
+def main():
+    finders = missions(100)
+    loop = min(timeit.repeat(lambda: [f.find() for f in finders], number=1, repeat=3))
+    batch = min(timeit.repeat(lambda: Finder.find_many(finders), number=1, repeat=3))
+    print("%i missions: find() loop %.3f s, find_many() %.3f s, speedup %.2fx" %
+          (len(finders), loop, batch, loop / batch))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Benchmark suite of the finder hot paths, for catching performance regressions.
+
+Times find_designs(), the physics functions, the dominance pass and NodeSet operations separately
+for a standard set of missions. Results are written as JSON and can be compared against a saved
+baseline:
+
+    python -m benchmarks.suite --output baseline.json
+    (change something)
+    python -m benchmarks.suite --baseline baseline.json
+
+The exit status is 1 if any benchmark is slower than the baseline by more than the tolerance.
+Timings are the minimum of several repetitions, so that background load has less influence.
+"""
+
+from __future__ import print_function
+
+import json
+import platform
+import sys
+import timeit
+from argparse import ArgumentParser
+from collections import OrderedDict
+
+from kspalculator import __version__
+from kspalculator import parts
+from kspalculator import physics
+from kspalculator.design import SearchSpace, find_designs
+from kspalculator.dominance import mark_best
+from kspalculator.techtree import Node, NodeSet
+
+# name: (payload, pressure, dv, min_acceleration, sfb_allowed, preferredsize, bestgimbal, sfballowed,
+#        prefergenerators, prefershortengines, prefermonopropellant)
+MISSIONS = OrderedDict([
+    ('mun_lander', (1320, 5*[0.0], [1170, 580, 580, 210, 700], [0.0, 3.3, 5.0, 0.0, 0.0], 5*[True],
+                    parts.RadialSize.Small, 0, False, False, True, True)),
+    ('kerbin_launcher', (6370, [1.0, 0.18], [905, 3650], [13.0, 13.0], 2*[True],
+                         parts.RadialSize.Small, 1, True, False, False, False)),
+    # lower part of an Eve ascent, starting at sea level
+    ('eve_ascent', (2000, [5.0, 1.0], [1200, 1800], [10.0, 6.0], 2*[True],
+                    parts.RadialSize.Large, 0, True, False, False, False)),
+    ('ion_probe', (500, [0.0], [6000], [0.1], [True], None, 0, False, True, False, True)),
+    ('transfer', (8000, 5*[0.0], [950, 860, 300, 1300, 300], [5.0, 2.0, 2.0, 5.0, 0.0], 5*[True],
+                  parts.RadialSize.Large, 2, False, False, False, False)),
+])
+
+
+def best_time(f, number=1, repeat=3):
+    """Returns minimum time of repeat runs of calling f number times, divided by number."""
+    return min(timeit.repeat(f, number=number, repeat=repeat)) / number
+
+
+def bench_find_designs(results, repeat):
+    for name, mission in MISSIONS.items():
+        results['find_designs.' + name] = best_time(lambda: find_designs(*mission), repeat=repeat)
+
+
+def bench_physics(results, repeat):
+    payload, pressure, dv = MISSIONS['kerbin_launcher'][:3]
+    space = SearchSpace(pressure)
+    engines = parts.LiquidFuelEngines
+    isp = [space.isp(e) for e in engines]
+    force = [space.force(1, e) for e in engines]
+    m_p = [payload + e.m for e in engines]
+    lf = [physics.lf_needed_fuel(dv, isp[j], m_p[j], 1/8) or 1000.0 for j in range(len(engines))]
+    def lf_needed_fuel():
+        for j in range(len(engines)):
+            physics.lf_needed_fuel(dv, isp[j], m_p[j], 1/8)
+    def lf_performance():
+        for j in range(len(engines)):
+            physics.lf_performance(dv, isp[j], force[j], pressure, m_p[j], lf[j], 1/8)
+    results['physics.lf_needed_fuel'] = best_time(lf_needed_fuel, 100, repeat) / len(engines)
+    results['physics.lf_performance'] = best_time(lf_performance, 100, repeat) / len(engines)
+
+    sfb = [s for s in parts.SolidFuelBoosters if s.name == 'RT-10 Hammer'][0]
+    sfbisp = space.isp(sfb)
+    sfbforce = space.force(2, sfb)
+    lpsr = [e.F_vac * sfb.isp_vac / 2 / sfb.F_vac / e.isp_vac for e in engines]
+    args = [(dv, isp[j], sfbisp, m_p[j], 2*parts.RadialstageExtraMass, 2*sfb.m_full, 2*sfb.m_empty, lpsr[j])
+            for j in range(len(engines))]
+    def sflf_needed_fuel():
+        for a in args:
+            physics.sflf_concurrent_needed_fuel(*a)
+    def sflf_performance():
+        for j, a in enumerate(args):
+            physics.sflf_concurrent_performance(dv, isp[j], sfbisp, force[j], sfbforce, pressure, m_p[j],
+                                                lf[j], a[4], a[5], a[6], 1.0)
+    results['physics.sflf_concurrent_needed_fuel'] = best_time(sflf_needed_fuel, 10, repeat) / len(engines)
+    results['physics.sflf_concurrent_performance'] = best_time(sflf_performance, 100, repeat) / len(engines)
+
+
+def bench_dominance(results, repeat):
+    for name in ['kerbin_launcher', 'eve_ascent']:
+        mission = MISSIONS[name]
+        designs = find_designs(*mission)
+        preferences = (mission[5], mission[6], mission[8], mission[9], mission[10])
+        def dominance():
+            for d in designs:
+                d.is_best = True
+            mark_best(designs, *preferences)
+        results['dominance.' + name] = best_time(dominance, repeat=repeat)
+
+
+def bench_techtree(results, repeat):
+    sets = []
+    for a in Node:
+        for b in [Node.Start, Node.Stability, Node.HeavyRocketry, Node.IonPropulsion]:
+            N = NodeSet()
+            N.add(a)
+            N.add(b)
+            sets.append(N)
+    def add():
+        for a in Node:
+            N = NodeSet()
+            N.add(a)
+            N.add(Node.Engineering101)
+            N.add(Node.GeneralRocketry)
+    def is_easier_than():
+        for a in sets:
+            for b in sets:
+                a.is_easier_than(b)
+    results['techtree.NodeSet.add'] = best_time(add, 1000, repeat) / len(Node) / 3
+    results['techtree.NodeSet.is_easier_than'] = best_time(is_easier_than, 50, repeat) / len(sets)**2
+
+
+BENCHMARKS = OrderedDict([('find_designs', bench_find_designs), ('physics', bench_physics),
+                          ('dominance', bench_dominance), ('techtree', bench_techtree)])
+
+
+def run(groups=None, repeat=5):
+    """Returns dict of results, i.e. environment and seconds per benchmark."""
+    timings = OrderedDict()
+    for name, bench in BENCHMARKS.items():
+        if groups is None or name in groups:
+            bench(timings, repeat)
+    return OrderedDict([('kspalculator', __version__), ('python', platform.python_version()),
+                        ('machine', platform.machine()), ('timings', timings)])
+
+
+def compare(results, baseline, tolerance):
+    """Returns list of (name, baseline seconds, seconds, ratio, regressed) of common benchmarks."""
+    rows = []
+    for name, t in results['timings'].items():
+        if name in baseline['timings']:
+            b = baseline['timings'][name]
+            ratio = t / b if b > 0 else float('inf')
+            rows.append((name, b, t, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Benchmarks of the finder hot paths.")
+    parser.add_argument('-o', '--output', metavar='FILE', help='Write results as JSON to FILE')
+    parser.add_argument('-b', '--baseline', metavar='FILE', help='Compare against results in FILE')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown before reporting a regression (default: 0.2)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions per benchmark (default: 5)')
+    parser.add_argument('groups', nargs='*', metavar='GROUP',
+                        help='Benchmark groups to run, of %s (default: all)' % ', '.join(BENCHMARKS))
+    args = parser.parse_args()
+    for group in args.groups:
+        if group not in BENCHMARKS:
+            parser.error("unknown benchmark group %r" % group)
+
+    results = run(args.groups or None, args.repeat)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if args.baseline is None:
+        for name, t in results['timings'].items():
+            print("%-40s %12.6f ms" % (name, t * 1e3))
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = 0
+    for name, b, t, ratio, regressed in compare(results, baseline, args.tolerance):
+        print("%-40s %12.6f ms %12.6f ms %6.2fx%s" % (name, b * 1e3, t * 1e3, ratio,
+                                                     "  REGRESSION" if regressed else ""))
+        regressions += regressed
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Microbenchmark of techtree.NodeSet operations and of the dominance pass using them."""
+
+from __future__ import print_function
+
+import timeit
+
+from kspalculator import parts
+from kspalculator.design import find_designs
+from kspalculator.dominance import mark_best
+from kspalculator.techtree import Node, NodeSet
+
+PREFERENCES = (parts.RadialSize.Small, 1, False, True, True)
+
+
+def nodesets():
+    sets = []
+    for a in Node:
+        for b in [Node.Start, Node.Stability, Node.HeavyRocketry, Node.IonPropulsion]:
+            N = NodeSet()
+            N.add(a)
+            N.add(b)
+            sets.append(N)
+    return sets
+
+
+def build(nodes):
+    N = NodeSet()
+    for n in nodes:
+        N.add(n)
+    return N
+
+
+def main():
+    sets = nodesets()
+    t = min(timeit.repeat(lambda: [build([a, Node.Engineering101, Node.GeneralRocketry]) for a in Node],
+                          number=100, repeat=3))
+    print("NodeSet.add:             %7.2f us" % (t / 100 / len(Node) / 3 * 1e6))
+    t = min(timeit.repeat(lambda: [a.is_easier_than(b) for a in sets for b in sets], number=10, repeat=3))
+    print("NodeSet.is_easier_than:  %7.2f us" % (t / 10 / len(sets)**2 * 1e6))
+    designs = find_designs(6370, [1.0, 0.18], [905, 3650], [13.0, 13.0], 2*[True], sfballowed=True)
+    def dominance():
+        for d in designs:
+            d.is_best = True
+        mark_best(designs, *PREFERENCES)
+    t = min(timeit.repeat(dominance, number=1, repeat=5))
+    print("dominance (%i designs): %7.2f ms" % (len(designs), t * 1e3))
+
+
+if __name__ == '__main__':
+    main()
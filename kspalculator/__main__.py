@@ -1,42 +1,46 @@
 #!/usr/bin/env python3
 
-from argparse import ArgumentParser, ArgumentTypeError, SUPPRESS
+import sys
+from argparse import ArgumentParser, SUPPRESS
 from textwrap import fill
 
+from .cache import DiskCache
+from .cli import dvtuple, nonnegative_float, parts_option, payloadrange, technodes
 from .finder import Finder
+from .output import FORMATS
+from .stats import Stats
 from .parts import RadialSize, kspversion
 from . import __version__ as kspalculator_version
 from . import __doc__ as summary
 
-def nonnegative_float(string):
-    fl = float(string)
-    if fl < 0.0:
-        raise ArgumentTypeError("%r is negative" % string)
-    return fl
-
-def positive_float(string):
-    fl = float(string)
-    if fl <= 0.0:
-        raise ArgumentTypeError("%r is not positive" % string)
-    return fl
-
-def to_boolean(string):
-    if string.lower() not in ['t', 'true', '1', 'y', 'yes', 'f', 'false', '0', 'n', 'no', '']:
-        raise ArgumentTypeError("%r is not a boolean (true/false)" % string)
-    return string.lower() in ['t', 'true', '1', 'y', 'yes']
-
-def dvtuple(string):
-    spl = string.split(':')
-    positive_float(spl[0])
-    if len(spl) > 1:
-        nonnegative_float(spl[1])
-    if len(spl) > 2:
-        nonnegative_float(spl[2])
-    if len(spl) > 3:
-        to_boolean(spl[3])
-    if len(spl) > 4:
-        raise ArgumentTypeError("%r contains too many ':'" % string)
-    return string
+def print_sweep(sweep):
+    for payload, designs in zip(sweep.payloads, sweep.designs):
+        print("Payload %.0f kg:" % payload)
+        for d in designs:
+            print("\t%s: %.0f kg, cost %.0f" % (d.get_title(), d.get_mass(), d.get_cost()))
+        if not designs:
+            print("\tnothing found")
+    if sweep.breakpoints:
+        print()
+        print("First design changes its main engine at:")
+    for payload, previous, current in sweep.breakpoints:
+        print("\t%.0f kg: %s -> %s" % (payload, previous.get_title() if previous else "nothing",
+                                       current.get_title() if current else "nothing"))
+
+def print_staging(staged):
+    for rocket in staged:
+        print("%i stage%s: Total Mass: %.0f kg, Cost: %.0f" % (len(rocket.stages), "s" if len(rocket.stages) > 1 else "",
+                                                             rocket.mass, rocket.cost))
+        for i, stage in reversed(list(enumerate(rocket.stages))):
+            if stage.end_phase - stage.first_phase == 1:
+                phases = "phase %i" % stage.end_phase
+            else:
+                phases = "phases %i-%i" % (stage.first_phase + 1, stage.end_phase)
+            print("\tStage %i (%s): %s, %.0f kg, cost %.0f" %
+                  (i + 1, phases, stage.design.get_title(), stage.design.get_mass() - stage.design.payload,
+                   stage.design.get_cost()))
+    if not staged:
+        print("Sorry, nothing found. Change constraints and try again.")
 
 def main():
     # pylint:disable=too-many-statements
@@ -44,8 +48,26 @@ def main():
     epilog = "If you encounter any issues, do not hesitate to report them at "\
             "https://github.com/aandergr/kspalculator/issues."
 
+    if sys.argv[1:2] == ['serve']:
+        if sys.version_info < (3, 5):
+            # the server uses async/await
+            sys.exit("kspalculator serve needs Python 3.5 or newer")
+        from .server import main as serve
+        serve(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['repl']:
+        from .repl import main as repl
+        repl(sys.argv[2:])
+        return
+
+    # with --payload-range, there is no payload argument; ask argparse, as options may be abbreviated
+    pre_parser = ArgumentParser(add_help=False)
+    pre_parser.add_argument('--payload-range')
+    sweep = pre_parser.parse_known_args()[0].payload_range is not None
+
     parser = ArgumentParser(description=summary, epilog=epilog)
-    parser.add_argument('payload', type=nonnegative_float, help='Payload in kg')
+    if not sweep:
+        parser.add_argument('payload', type=nonnegative_float, help='Payload in kg')
     parser.add_argument('dvtuples', type=dvtuple,
             metavar='deltav[:min_acceleration[:pressure[:sfb_allowed]]]', nargs='+',
             help='Tuples of required delta v (in m/s), minimum acceleration (in m/s²), environment '
@@ -73,9 +95,46 @@ def main():
             'engines with better thrust vectoring angle.')
     parser.add_argument('-m', '-r', '--monopropellant', '--rcs', action='store_true',
             help='Prefer engines using monopropellant (RCS fuel)')
+    parser.add_argument('--payload-range', type=payloadrange, metavar='START:STOP:STEP',
+            help='Instead of giving a payload, find the best designs for each payload from START to STOP '
+            'kg in steps of STEP kg, and report at which payloads the main engine of the first design '
+            'changes')
+    parser.add_argument('--cache-dir', metavar='DIR',
+            help='Directory for caching results, so that repeated queries are answered without '
+            'evaluating all designs again')
+    parser.add_argument('--parts', metavar='FILE',
+            help='Use the parts described in FILE (.json or .cfg, see kspalculator.catalog) instead of '
+            'the built-in ones. The parsed file is cached in compiled form in --cache-dir or '
+            '~/.cache/kspalculator.')
+    parser.add_argument('--researched', type=technodes, metavar='NODE,...',
+            help='Only use parts of these researched tech tree nodes (and the nodes they depend on), '
+            'e.g. GeneralRocketry,Stability. Node names are listed in kspalculator/techtree.py.')
+    parser.add_argument('--tank-packing', choices=['mass', 'cost'], default='mass',
+            help='Choose liquid fuel tanks for least mass (default), or for least cost, which might '
+            'carry more fuel than needed')
+    parser.add_argument('--format', choices=['text'] + list(FORMATS), default='text',
+            help='Output format. json, jsonl and csv are meant for processing by other programs and '
+            'imply --quiet.')
+    parser.add_argument('--stages', type=int, metavar='N',
+            help='Split the flight phases into up to N stages, each carrying the stages above it, and '
+            'print the best rocket for each number of stages')
+    parser.add_argument('--stats', action='store_true',
+            help='Print how many designs were considered, why they were rejected, and where time was '
+            'spent to standard error (not with --payload-range)')
     parser.add_argument('--show-all-solutions', action='store_true', help=SUPPRESS)
 
-    args = parser.parse_args()
+    # positional arguments may also follow options, e.g. --payload-range 0:5000:500 -b 905 3650
+    args = getattr(parser, 'parse_intermixed_args', parser.parse_args)()
+
+    if sweep:
+        args.payload = args.payload_range[0]
+    if args.format != 'text':
+        args.quiet = True
+    if args.stages is not None:
+        if args.stages < 1:
+            parser.error("--stages must be positive")
+        if sweep or args.format != 'text':
+            parser.error("--stages can neither be combined with --payload-range nor --format")
 
     preferred_size = None
     if args.preferred_radius is not None:
@@ -99,14 +158,30 @@ def main():
         pr.append(0.0 if len(s) < 3 else float(s[2]))
         sa.append(True if len(s) < 4 else s[3].lower() in ['t', 'true', '1', 'y', 'yes'])
 
+    catalog = parts_option(parser, args)
+
+    cache = DiskCache(args.cache_dir) if args.cache_dir is not None else None
     finder = Finder(args.payload, preferred_size, dv, ac, pr, sa, args.gimbal, args.boosters,
-                    args.electricity, args.length, args.monopropellant)
-    D = finder.find(not args.show_all_solutions, args.cheapest)
+                    args.electricity, args.length, args.monopropellant, cache, catalog, args.researched,
+                    args.tank_packing)
+    stats = Stats() if args.stats and not sweep else None
+    if args.stages is not None:
+        print_staging(finder.find_staging(args.stages, args.cheapest))
+        return
+    if sweep:
+        S = finder.sweep_payload(args.payload_range, not args.show_all_solutions, args.cheapest)
+    else:
+        D = finder.find(not args.show_all_solutions, args.cheapest, stats=stats)
+    if stats is not None:
+        print(stats, file=sys.stderr, end='')
 
     if not args.quiet:
         print(fill("Printing the best (and only the best!) designs (i.e. engine and tank combinations) "
             "fulfilling these requirements:"))
-        print("- Payload: %.0f kg." % args.payload)
+        if sweep:
+            print("- Payload: %.0f kg to %.0f kg." % (args.payload_range[0], args.payload_range[-1]))
+        else:
+            print("- Payload: %.0f kg." % args.payload)
         print("- Flight phases: ", end='')
         for i in range(len(dv)):
             print("%.0f m/s, %.1f m/s², %.2f atm%s" %
@@ -133,6 +208,15 @@ def main():
             "If these aren't your constraints, consult kspalculator.py --help and try again."))
         print()
 
+    if args.format != 'text':
+        designs = [d for designs in S.designs for d in designs] if sweep else D
+        FORMATS[args.format](designs, sys.stdout)
+        return
+
+    if sweep:
+        print_sweep(S)
+        return
+
     for d in D:
         print(d)
 
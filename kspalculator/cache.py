@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""Caches for results of Finder.find()."""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+from . import __version__
+from . import parts
+
+# increase when pickled results become incompatible, e.g. by changes to design.Design
+FORMAT = 3
+
+
+class ResultCache(object):
+    """Bounded, thread-safe LRU cache.
+
+    Keys are canonical mission signatures as returned by Finder.signature(), combined with the
+    arguments of Finder.find(). Counts hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError("Invalid cache size")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Returns cached value for key, or None if there is none."""
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            # re-insert as most recently used
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Returns dict of hits, misses, evictions, size and maxsize."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._data), 'maxsize': self.maxsize}
+
+
+def replace_file(src, dst):
+    """Renames file src to dst, replacing dst if it exists, as os.replace() of Python 3."""
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    elif os.name != 'nt':
+        # atomic on POSIX
+        os.rename(src, dst)
+    else:
+        # Python 2 cannot rename to an existing file on Windows, so readers might miss dst briefly
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        os.rename(src, dst)
+
+
+def parts_digest():
+    """Returns hash of the part tables, the KSP version, the kspalculator version and FORMAT.
+
+    Results cached on disk are only valid as long as this does not change."""
+    tables = [parts.kspversion, __version__, FORMAT, parts.LiquidFuelEngines, parts.RocketFuelTanks,
+              parts.SmallestTank, parts.BiggestTank, parts.TwinBoarPseudoTank, parts.AtomicRocketMotor,
+              parts.AtomicTankFactor, parts.AtomicTank_f_e, parts.ElectricPropulsionSystem, parts.XenonTanks,
+              parts.MonoPropellantEngine, parts.MonoPropellantTanks, parts.SolidFuelBoosters,
+              parts.StackstageExtraMass, parts.StackstageExtraCost, parts.StackstageExtraTech,
+              parts.RadialstageExtraMass, parts.RadialstageExtraCost, parts.RadialstageExtraTech]
+    return hashlib.sha256(repr(tables).encode('utf-8')).hexdigest()
+
+
+class DiskCache(object):
+    """Cache storing results as files in a directory, shared by processes.
+
+    Has the same interface as ResultCache. Each entry is one pickle file, named by a hash of its key
+    and of parts_digest(), so entries become invisible when part data changes. Files are written
+    to a temporary file first and then renamed, so that concurrent readers never see partially
+    written entries. If the directory grows beyond max_bytes, least recently used entries are
+    removed. Only use directories which are not writable by others, as entries are unpickled.
+
+    If memory is given (a ResultCache), it is consulted before the directory.
+    """
+
+    suffix = '.pickle'
+
+    def __init__(self, directory, max_bytes=64*1024*1024, memory=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory = memory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._digest = parts_digest()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        name = hashlib.sha256((self._digest + repr(key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + self.suffix)
+
+    def get(self, key):
+        """Returns cached value for key, or None if there is none."""
+        if self.memory is not None:
+            value = self.memory.get(key)
+            if value is not None:
+                return value
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError, ValueError):
+            self.misses += 1
+            return None
+        if stored_key != key:
+            self.misses += 1
+            return None
+        try:
+            # mark as recently used
+            os.utime(path, None)
+        except OSError:
+            # evicted by another process meanwhile, the loaded value is still valid
+            pass
+        self.hits += 1
+        if self.memory is not None:
+            self.memory.put(key, value)
+        return value
+
+    def put(self, key, value):
+        if self.memory is not None:
+            self.memory.put(key, value)
+        fd, tmppath = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, value), f, pickle.HIGHEST_PROTOCOL)
+            replace_file(tmppath, self._path(key))
+        finally:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # removed by another process
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(e[1] for e in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                self.evictions += 1
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        if self.memory is not None:
+            self.memory.clear()
+        for _, _, name in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Returns dict of hits, misses, evictions, size (number of entries) and max_bytes."""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._entries()), 'max_bytes': self.max_bytes}
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+
+"""Catalogs of parts, built in or loaded from data files.
+
+The built-in catalog consists of the tables in parts. Other catalogs are loaded from JSON files or
+from files in a KSP-like .cfg syntax, so that game updates or mod packs do not need code changes.
+Both formats describe the same records:
+
+engines: name, size, cost, m, isp_atm, isp_vac, F_vac, tvc, level, electricity, length, fuel
+    (LiquidFuel (default), AtomicFuel, Xenon or Monopropellant),
+fuel_tanks: name, size, cost, m_full; liquid fuel tanks, each of a whole multiple of the mass of
+    the smallest one of its size,
+integrated_tanks: engine, cost, m_full; fuel which is always included in an engine, as large as the
+    biggest fuel tank of its size,
+special_tanks: name, size, cost, m_full, f_e, level, fuel (Xenon or Monopropellant),
+sfbs: name, cost, m_full, m_empty, isp_atm, isp_vac, F_vac, level,
+
+where sizes, fuel types and levels are names of parts.RadialSize, parts.FuelTypes and
+techtree.Node members. A JSON catalog is an object with a list of records for each of these keys,
+optionally with kspversion. In a .cfg file, each record is a block named ENGINE, FUEL_TANK,
+INTEGRATED_TANK, SPECIAL_TANK or SFB, containing key = value lines:
+
+    ENGINE
+    {
+        name = LV-T30 Reliant
+        size = Small
+        ...
+    }
+
+Loaded catalogs are validated and cached in compiled (pickled) form by load(), keyed by a hash of
+the file's content.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+from . import parts
+from .cache import replace_file
+from .parts import Engine, FuelTank, FuelTypes, RadialSize, SolidFuelBooster, SpecialFuelTank
+from .techtree import Node, researched_with_dependencies
+
+# increase when compiled catalogs become incompatible
+FORMAT = 1
+
+RECORDS = OrderedDict([
+    ('engines', ('ENGINE', ['name', 'size', 'cost', 'm', 'isp_atm', 'isp_vac', 'F_vac', 'tvc', 'level',
+                            'electricity', 'length'], ['fuel'])),
+    ('fuel_tanks', ('FUEL_TANK', ['name', 'size', 'cost', 'm_full'], [])),
+    ('integrated_tanks', ('INTEGRATED_TANK', ['engine', 'cost', 'm_full'], [])),
+    ('special_tanks', ('SPECIAL_TANK', ['name', 'size', 'cost', 'm_full', 'f_e', 'level', 'fuel'], [])),
+    ('sfbs', ('SFB', ['name', 'cost', 'm_full', 'm_empty', 'isp_atm', 'isp_vac', 'F_vac', 'level'], [])),
+])
+"""For each kind of records: name of .cfg blocks, required keys and optional keys."""
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class Catalog(object):
+    """Parts available for designs, indexed for enumerating candidates.
+
+    engines: dict of parts.FuelTypes to list of parts.Engine using that fuel,
+    fueltanks: dict of parts.RadialSize to list of liquid fuel tanks, smallest first,
+    integrated_tanks: dict of engine name to parts.FuelTank, the fuel included in the engine,
+    special_tanks: dict of parts.FuelTypes (Xenon, Monopropellant) to list of parts.SpecialFuelTank,
+    sfbs: list of parts.SolidFuelBooster,
+    by_size: dict of parts.RadialSize to list of engines of that size,
+    by_level: dict of techtree.Node to list of all parts requiring that node,
+    researched: frozenset of researched techtree.Node, or None if all are researched.
+    """
+
+    def __init__(self, engines, fueltanks, integrated_tanks, special_tanks, sfbs, kspversion=None,
+                 researched=None):
+        self.engines = OrderedDict((f, []) for f in FuelTypes)
+        for fueltype, eng in engines:
+            self.engines[fueltype].append(eng)
+        self.fueltanks = OrderedDict()
+        for tank in fueltanks:
+            self.fueltanks.setdefault(tank.size, []).append(tank)
+        for tanks in self.fueltanks.values():
+            tanks.sort(key=lambda t: t.m_full)
+        self.integrated_tanks = OrderedDict(integrated_tanks)
+        self.special_tanks = OrderedDict([(FuelTypes.Xenon, []), (FuelTypes.Monopropellant, [])])
+        for fueltype, tank in special_tanks:
+            self.special_tanks[fueltype].append(tank)
+        self.sfbs = list(sfbs)
+        self.kspversion = kspversion
+        self.researched = researched
+        self.by_size = OrderedDict()
+        self.by_level = OrderedDict()
+        for fueltype, eng in engines:
+            self.by_size.setdefault(eng.size, []).append(eng)
+        for part in [eng for f, eng in engines] + list(fueltanks) + [t for f, t in special_tanks] + self.sfbs:
+            level = getattr(part, 'level', None)
+            if level is not None:
+                self.by_level.setdefault(level, []).append(part)
+        self._digest = None
+        self._restricted = {}
+
+    @classmethod
+    def builtin(cls):
+        """Returns catalog of the tables in parts."""
+        return cls([(FuelTypes.LiquidFuel, e) for e in parts.LiquidFuelEngines] +
+                   [(FuelTypes.AtomicFuel, parts.AtomicRocketMotor),
+                    (FuelTypes.Xenon, parts.ElectricPropulsionSystem),
+                    (FuelTypes.Monopropellant, parts.MonoPropellantEngine)],
+                   parts.RocketFuelTanks,
+                   [('LFB Twin-Boar', parts.TwinBoarPseudoTank)],
+                   [(FuelTypes.Xenon, t) for t in parts.XenonTanks] +
+                   [(FuelTypes.Monopropellant, t) for t in parts.MonoPropellantTanks],
+                   parts.SolidFuelBoosters, parts.kspversion)
+
+    def as_dict(self):
+        """Returns catalog in the JSON format described in the module documentation."""
+        engines = []
+        for fueltype, engs in self.engines.items():
+            for e in engs:
+                record = OrderedDict(zip(Engine._fields, e))
+                record['size'] = e.size.name
+                record['level'] = e.level.name
+                record['fuel'] = fueltype.name
+                engines.append(record)
+        fueltanks = []
+        for tanks in self.fueltanks.values():
+            for t in tanks:
+                record = OrderedDict(zip(FuelTank._fields, t))
+                record['size'] = t.size.name
+                fueltanks.append(record)
+        integrated = [OrderedDict([('engine', name), ('cost', t.cost), ('m_full', t.m_full)])
+                      for name, t in self.integrated_tanks.items()]
+        special = []
+        for fueltype, tanks in self.special_tanks.items():
+            for t in tanks:
+                record = OrderedDict(zip(SpecialFuelTank._fields, t))
+                record['size'] = t.size.name
+                record['level'] = t.level.name
+                record['fuel'] = fueltype.name
+                special.append(record)
+        sfbs = []
+        for s in self.sfbs:
+            record = OrderedDict(zip(SolidFuelBooster._fields, s))
+            record['level'] = s.level.name
+            sfbs.append(record)
+        return OrderedDict([('kspversion', self.kspversion), ('engines', engines), ('fuel_tanks', fueltanks),
+                            ('integrated_tanks', integrated), ('special_tanks', special), ('sfbs', sfbs)])
+
+    def digest(self):
+        """Returns hash of all parts, e.g. for keys of cached results."""
+        if self._digest is None:
+            data = self.as_dict()
+            if self.researched is not None:
+                data['researched'] = sorted(n.name for n in self.researched)
+            self._digest = hashlib.sha256(json.dumps(data).encode('utf-8')).hexdigest()
+        return self._digest
+
+    def is_researched(self, node):
+        return self.researched is None or node in self.researched
+
+    def restrict(self, researched):
+        """Returns Catalog of the parts available when given nodes are researched.
+
+        Nodes the given ones depend on count as researched as well. Liquid fuel tanks have no
+        research node and are always available. Restricted catalogs are kept, so that candidates
+        are only enumerated once for each set of nodes.
+
+        :param researched: iterable of techtree.Node
+        """
+        nodes = frozenset(researched_with_dependencies(researched))
+        if self.researched is not None:
+            nodes &= self.researched
+        if nodes not in self._restricted:
+            available = set(p for node in nodes for p in self.by_level.get(node, []))
+            self._restricted[nodes] = Catalog(
+                [(f, e) for f, engs in self.engines.items() for e in engs if e in available],
+                [t for tanks in self.fueltanks.values() for t in tanks],
+                [(name, t) for name, t in self.integrated_tanks.items()
+                 if any(e.name == name for e in available if isinstance(e, Engine))],
+                [(f, t) for f, tanks in self.special_tanks.items() for t in tanks if t in available],
+                [s for s in self.sfbs if s in available], self.kspversion, nodes)
+        return self._restricted[nodes]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_digest'] = None
+        state['_restricted'] = {}
+        return state
+
+
+def _enum(enum, name, where):
+    try:
+        return enum[name]
+    except (KeyError, TypeError):
+        raise CatalogError("%s: invalid %s %r" % (where, enum.__name__, name))
+
+
+def _number(value, where, key, positive=False):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise CatalogError("%s: %s must be a number, not %r" % (where, key, value))
+    if number < 0 or (positive and number == 0):
+        raise CatalogError("%s: %s must be %s" % (where, key, "positive" if positive else "non-negative"))
+    return int(number) if number == int(number) else number
+
+
+def _records(data):
+    """Returns dict of lists of (where, record) for each kind of records in data, where is the
+    position or name of the record for error messages."""
+    if not isinstance(data, dict):
+        raise CatalogError("Catalog must be an object")
+    unknown = set(data) - set(RECORDS) - {'kspversion'}
+    if unknown:
+        raise CatalogError("Unknown keys: %s" % ", ".join(sorted(unknown)))
+    records = {}
+    for kind, (_, required, optional) in RECORDS.items():
+        records[kind] = []
+        entries = data.get(kind, [])
+        if not isinstance(entries, list):
+            raise CatalogError("%s must be a list" % kind)
+        for i, r in enumerate(entries):
+            where = "%s[%i]" % (kind, i)
+            if not isinstance(r, dict):
+                raise CatalogError("%s: must be an object" % where)
+            if 'name' in r or 'engine' in r:
+                where = "%s %r" % (kind, r.get('name', r.get('engine')))
+            missing = [k for k in required if k not in r]
+            if missing:
+                raise CatalogError("%s: missing %s" % (where, ", ".join(missing)))
+            extra = set(r) - set(required) - set(optional)
+            if extra:
+                raise CatalogError("%s: unknown %s" % (where, ", ".join(sorted(extra))))
+            records[kind].append((where, r))
+    return records
+
+
+def _engine(where, r):
+    fueltype = _enum(FuelTypes, r.get('fuel', 'LiquidFuel'), where)
+    size = _enum(RadialSize, r['size'], where)
+    isp_atm = _number(r['isp_atm'], where, 'isp_atm')
+    if isp_atm == 0:
+        raise CatalogError("%s: isp_atm must be positive" % where)
+    return fueltype, Engine(size, str(r['name']), _number(r['cost'], where, 'cost'),
+                            _number(r['m'], where, 'm', True), isp_atm,
+                            _number(r['isp_vac'], where, 'isp_vac', True),
+                            _number(r['F_vac'], where, 'F_vac', True),
+                            _number(r['tvc'], where, 'tvc'), _enum(Node, r['level'], where),
+                            int(_number(r['electricity'], where, 'electricity')),
+                            int(_number(r['length'], where, 'length')))
+
+
+def _fuel_tank(where, r):
+    size = _enum(RadialSize, r['size'], where)
+    if size is RadialSize.RadiallyMounted:
+        raise CatalogError("%s: liquid fuel tanks cannot be radially mounted" % where)
+    return FuelTank(str(r['name']), size, _number(r['cost'], where, 'cost'),
+                    _number(r['m_full'], where, 'm_full', True))
+
+
+def _special_tank(where, r):
+    fueltype = _enum(FuelTypes, r['fuel'], where)
+    if fueltype not in (FuelTypes.Xenon, FuelTypes.Monopropellant):
+        raise CatalogError("%s: special tanks hold Xenon or Monopropellant" % where)
+    return fueltype, SpecialFuelTank(str(r['name']), _enum(RadialSize, r['size'], where),
+                                     _number(r['cost'], where, 'cost'),
+                                     _number(r['m_full'], where, 'm_full', True),
+                                     _number(r['f_e'], where, 'f_e', True),
+                                     _enum(Node, r['level'], where))
+
+
+def _sfb(where, r):
+    sfb = SolidFuelBooster(str(r['name']), _number(r['cost'], where, 'cost'),
+                           _number(r['m_full'], where, 'm_full', True),
+                           _number(r['m_empty'], where, 'm_empty', True),
+                           _number(r['isp_atm'], where, 'isp_atm', True),
+                           _number(r['isp_vac'], where, 'isp_vac', True),
+                           _number(r['F_vac'], where, 'F_vac', True), _enum(Node, r['level'], where))
+    if sfb.m_empty >= sfb.m_full:
+        raise CatalogError("%s: m_empty must be less than m_full" % where)
+    return sfb
+
+
+def _check(catalog, engines, fueltanks, special, sfbs):
+    """Raises CatalogError if parts of catalog, without integrated tanks, do not fit together."""
+    for kind, names in [('engines', [e.name for f, e in engines]), ('fuel_tanks', [t.name for t in fueltanks]),
+                        ('special_tanks', [t.name for f, t in special]), ('sfbs', [s.name for s in sfbs])]:
+        if len(set(names)) != len(names):
+            raise CatalogError("%s: names must be unique" % kind)
+    # tank selection packs whole multiples of the smallest tank, see tanks.PackingTable
+    for size, tanks in catalog.fueltanks.items():
+        for t in tanks:
+            units = float(t.m_full) / tanks[0].m_full
+            if abs(units - round(units)) > 1e-9 * units:
+                raise CatalogError("fuel_tanks: %s tanks must have a whole multiple of the mass of the "
+                                   "smallest one, but %r does not" % (size.name, t.name))
+    for fueltype in (FuelTypes.LiquidFuel, FuelTypes.AtomicFuel):
+        for e in catalog.engines[fueltype]:
+            size = e.size if e.size is not RadialSize.RadiallyMounted else RadialSize.Tiny
+            if size not in catalog.fueltanks:
+                raise CatalogError("engines %r: no fuel tanks of size %s" % (e.name, size.name))
+
+
+def _add_integrated_tanks(catalog, engines, records):
+    engines_by_name = dict((e.name, e) for f, e in engines)
+    for where, r in records:
+        eng = engines_by_name.get(r['engine'])
+        if eng is None or eng.size not in catalog.fueltanks:
+            raise CatalogError("%s: unknown engine or no fuel tanks of its size" % where)
+        tank = FuelTank(eng.name, eng.size, _number(r['cost'], where, 'cost'),
+                        _number(r['m_full'], where, 'm_full', True))
+        if tank.m_full != catalog.fueltanks[eng.size][-1].m_full:
+            raise CatalogError("%s: m_full must equal that of the biggest %s fuel tank" % (where, eng.size.name))
+        catalog.integrated_tanks[eng.name] = tank
+
+
+def from_dict(data):
+    """Returns validated Catalog from decoded JSON data. Raises CatalogError if invalid."""
+    records = _records(data)
+    engines = [_engine(where, r) for where, r in records['engines']]
+    fueltanks = [_fuel_tank(where, r) for where, r in records['fuel_tanks']]
+    special = [_special_tank(where, r) for where, r in records['special_tanks']]
+    sfbs = [_sfb(where, r) for where, r in records['sfbs']]
+    catalog = Catalog(engines, fueltanks, [], special, sfbs, data.get('kspversion'))
+    _check(catalog, engines, fueltanks, special, sfbs)
+    _add_integrated_tanks(catalog, engines, records['integrated_tanks'])
+    if not any(catalog.engines.values()):
+        raise CatalogError("Catalog contains no engines")
+    return catalog
+
+
+def parse_cfg(text):
+    """Returns records of text in .cfg syntax as dict in the JSON format."""
+    blocks = dict((block, kind) for kind, (block, required, optional) in RECORDS.items())
+    data = {}
+    record = None
+    name = None
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('//', 1)[0].strip()
+        if not line:
+            continue
+        if record is None:
+            if line.endswith('{'):
+                name = line[:-1].strip() or name
+                if name is None:
+                    raise CatalogError("line %i: block without name" % number)
+                if name not in blocks:
+                    raise CatalogError("line %i: unknown block %s" % (number, name))
+                record = OrderedDict()
+                data.setdefault(blocks[name], []).append(record)
+            elif name is None:
+                if line not in blocks:
+                    raise CatalogError("line %i: unknown block %s" % (number, line))
+                name = line
+            else:
+                raise CatalogError("line %i: expected {, not %r" % (number, line))
+            continue
+        if line == '}':
+            record = None
+            name = None
+            continue
+        key, sep, value = line.partition('=')
+        if not sep:
+            raise CatalogError("line %i: expected key = value, not %r" % (number, line))
+        record[key.strip()] = value.strip()
+    if record is not None:
+        raise CatalogError("unexpected end of file in block %s" % name)
+    return data
+
+
+def parse(text, filename=''):
+    """Returns validated Catalog of the content of a .json or .cfg file."""
+    if filename.endswith('.cfg'):
+        return from_dict(parse_cfg(text))
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise CatalogError("Invalid JSON: %s" % e)
+    return from_dict(data)
+
+
+def load(path, cache_dir=None):
+    """Returns Catalog of given .json or .cfg file.
+
+    If cache_dir is given, the validated catalog is cached there in compiled form and reused as long
+    as the file's content does not change.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    compiled = None
+    if cache_dir is not None:
+        key = hashlib.sha256(content + repr((FORMAT, os.path.splitext(path)[1])).encode('utf-8')).hexdigest()
+        # not .pickle, so that a DiskCache in the same directory does not evict or clear it
+        compiled = os.path.join(cache_dir, 'catalog-%s.compiled' % key)
+        try:
+            with open(compiled, 'rb') as f:
+                return pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            pass
+    catalog = parse(content.decode('utf-8'), path)
+    if compiled is not None:
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            fd, tmppath = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(catalog, f, pickle.HIGHEST_PROTOCOL)
+                replace_file(tmppath, compiled)
+            finally:
+                if os.path.exists(tmppath):
+                    os.remove(tmppath)
+        except (IOError, OSError):
+            # caching is optional
+            pass
+    return catalog
+
+
+BUILTIN = Catalog.builtin()
+"""Catalog of the tables in parts, used if no other catalog is given."""
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Parsers of command line arguments, shared by kspalculator and its repl."""
+
+import os
+from argparse import ArgumentTypeError
+
+from .catalog import CatalogError, load
+from .techtree import Node
+
+def nonnegative_float(string):
+    fl = float(string)
+    if fl < 0.0:
+        raise ArgumentTypeError("%r is negative" % string)
+    return fl
+
+def positive_float(string):
+    fl = float(string)
+    if fl <= 0.0:
+        raise ArgumentTypeError("%r is not positive" % string)
+    return fl
+
+def to_boolean(string):
+    if string.lower() not in ['t', 'true', '1', 'y', 'yes', 'f', 'false', '0', 'n', 'no', '']:
+        raise ArgumentTypeError("%r is not a boolean (true/false)" % string)
+    return string.lower() in ['t', 'true', '1', 'y', 'yes']
+
+def dvtuple(string):
+    spl = string.split(':')
+    positive_float(spl[0])
+    if len(spl) > 1:
+        nonnegative_float(spl[1])
+    if len(spl) > 2:
+        nonnegative_float(spl[2])
+    if len(spl) > 3:
+        to_boolean(spl[3])
+    if len(spl) > 4:
+        raise ArgumentTypeError("%r contains too many ':'" % string)
+    return string
+
+def payloadrange(string):
+    spl = string.split(':')
+    if len(spl) != 3:
+        raise ArgumentTypeError("%r is not of the form start:stop:step" % string)
+    start, stop, step = nonnegative_float(spl[0]), nonnegative_float(spl[1]), positive_float(spl[2])
+    if stop < start:
+        raise ArgumentTypeError("%r: stop is less than start" % string)
+    return [start + i*step for i in range(int((stop - start) / step + 1e-9) + 1)]
+
+def technodes(string):
+    nodes = dict((node.name.lower(), node) for node in Node)
+    result = []
+    for name in string.split(','):
+        key = ''.join(c for c in name.lower() if c.isalnum())
+        if key not in nodes:
+            raise ArgumentTypeError("%r is not a tech tree node" % name)
+        result.append(nodes[key])
+    return result
+
+def load_parts(path, cache_dir=None):
+    """Returns catalog of parts in path, compiled into cache_dir or ~/.cache/kspalculator."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'kspalculator')
+    return load(path, cache_dir)
+
+def parts_option(parser, args):
+    """Returns catalog of parts given by --parts and --cache-dir, None for the built-in parts."""
+    catalog = None
+    if args.parts is not None:
+        try:
+            catalog = load_parts(args.parts, args.cache_dir)
+        except (IOError, OSError, UnicodeDecodeError, CatalogError) as e:
+            parser.error("cannot load parts from %s: %s" % (args.parts, e))
+    return catalog
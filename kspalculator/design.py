@@ -1,13 +1,23 @@
 # -*- coding: utf-8 -*-
+# pylint: disable=too-many-lines
+# Functions creating designs one by one and in batches share private helpers, so they stay in one module.
 # Python 2.7 support.
 from __future__ import division
 
+import copy
 import enum
+import multiprocessing
+from collections import namedtuple
+from itertools import islice
 from math import ceil
 
+from . import dominance
 from . import parts
 from . import physics
+from .tanks import packing_table
 from . import techtree
+from .catalog import BUILTIN
+from .stats import Stats, timer
 
 @enum.unique
 class Features(enum.Enum):
@@ -22,7 +32,16 @@ class Features(enum.Enum):
     radial_size = 8
 
 
-class Design:
+_NO_FEATURES = frozenset()
+
+
+class Design(object):
+    # Many designs are created while searching, so they are kept small. Notes are derived from the
+    # parts when needed, and features are only set for the best designs.
+    __slots__ = ('payload', 'mainengine', 'mainenginecount', 'eng_F_percentage', 'size', 'fueltype', 'fueltanks',
+                 'sfb', 'sfbcount', 'performance', 'requiredscience', 'features', 'is_best', '_final_mass',
+                 '_final_cost')
+
     def __init__(self, payload, mainengine, mainenginecount, size, fueltype):
         self.payload = payload
         self.mainengine = mainengine
@@ -31,13 +50,12 @@ class Design:
         self.size = size
         self.fueltype = fueltype
         self.fueltanks = [] # list of tuples (count,tank)
-        self.notes = []
         self.sfb = None
         self.sfbcount = 0
         self.performance = None # returned by physics.*_performance()
         self.requiredscience = techtree.NodeSet()
         self.requiredscience.add(mainengine.level)
-        self.features = set()
+        self.features = _NO_FEATURES
         self.is_best = True # First, assume all designs are best designs; When evaluation is done, this variable might
                             # set to False.
         # determined by get_cost and get_mass respectively
@@ -66,10 +84,7 @@ class Design:
         return self._final_cost
 
     def get_fueltankmass(self):
-        fuelmass = sum([tp[0]*tp[1].m_full for tp in self.fueltanks])
-        if self.fueltype is parts.FuelTypes.AtomicFuel:
-            fuelmass *= parts.AtomicTankFactor
-        return fuelmass
+        return _fueltankmass(self.fueltype, self.fueltanks)
 
     def get_sfbmountmass(self):
         return parts.StackstageExtraMass if self.sfbcount == 1 else self.sfbcount*parts.RadialstageExtraMass
@@ -97,47 +112,17 @@ class Design:
         self.sfbcount = sfbcount
         if sfbcount == 1:
             self.requiredscience.add(parts.StackstageExtraTech)
-            self.notes.append("Vertically stacked %s SFB" % sfb.name)
-            self.notes.append("SFB mounted on %s" % parts.StackstageExtraNote)
         else:
             self.requiredscience.add(parts.RadialstageExtraTech)
-            self.notes.append("Radially attached %i * %s SFB" % (sfbcount, sfb.name))
-            self.notes.append("SFBs mounted on %s each" % parts.RadialstageExtraNote)
 
-    def add_conventional_tanks(self, lf):
+    def add_conventional_tanks(self, lf, catalog=None, packing='mass'):
         """Adds liquid fuel or atomic fuel tanks to design
 
         :param lf: full tank mass
+        :type catalog: catalog.Catalog
+        :param packing: 'mass' or 'cost', see tanks module
         """
-        if self.mainengine.name == "LFB Twin-Boar":
-            lf = max(lf, 36000)
-            self.notes.append("6400 units of liquid fuel are already included in the engine")
-        if self.fueltype is parts.FuelTypes.LiquidFuel:
-            smalltankcount = ceil(lf / parts.RocketFuelTanks[parts.SmallestTank[self.size]].m_full)
-        else:
-            # atomic fuel
-            # Adomic Fuel is liquid fuel without oxidizer.
-            smalltankcount = ceil(lf / (parts.RocketFuelTanks[parts.SmallestTank[self.size]].m_full *
-                                        parts.AtomicTankFactor))
-            self.notes.append("Atomic fuel is regular liquid fuel w/out oxidizer (remove oxidizer in VAB!)")
-        # Fuel tank calculation:
-        # We use that
-        # - Tank size is 2^n times the size of smallest tank with that radius
-        # - It is cheapest to use the biggest tank possible
-        for i in range(parts.SmallestTank[self.size], parts.BiggestTank[self.size]+1):
-            if i != parts.BiggestTank[self.size]:
-                if smalltankcount % 2 != 0:
-                    self.fueltanks.append((1, parts.RocketFuelTanks[i]))
-                smalltankcount = smalltankcount // 2
-            else:
-                if self.mainengine.name == "LFB Twin-Boar":
-                    smalltankcount -= 1
-                    if smalltankcount > 0:
-                        self.fueltanks.append((smalltankcount, parts.RocketFuelTanks[i]))
-                    self.fueltanks.append((1, parts.TwinBoarPseudoTank))
-                else:
-                    if smalltankcount > 0:
-                        self.fueltanks.append((smalltankcount, parts.RocketFuelTanks[i]))
+        self.fueltanks.extend(_conventional_tanks(self.mainengine, self.size, self.fueltype, lf, catalog, packing))
 
     def add_special_tanks(self, xf, tank):
         """Add Monopropellant or Xenon tanks to design
@@ -146,11 +131,31 @@ class Design:
         :param tank: Tank model to add
         :type tank: parts.SpecialFuelTank
         """
-        tankcount = ceil(xf / tank.m_full)
-        if tank.size == parts.RadialSize.RadiallyMounted:
-            tankcount = max(tankcount, 2)
         self.requiredscience.add(tank.level)
-        self.fueltanks.append((tankcount, tank))
+        self.fueltanks.extend(_special_tanks(xf, tank))
+
+    @property
+    def notes(self):
+        """List of hints how to build the design."""
+        notes = []
+        if self.sfb is not None:
+            if self.sfbcount == 1:
+                notes.append("Vertically stacked %s SFB" % self.sfb.name)
+                notes.append("SFB mounted on %s" % parts.StackstageExtraNote)
+            else:
+                notes.append("Radially attached %i * %s SFB" % (self.sfbcount, self.sfb.name))
+                notes.append("SFBs mounted on %s each" % parts.RadialstageExtraNote)
+        for _, tank in self.fueltanks:
+            if tank.name == self.mainengine.name:
+                # full liquid fuel tanks are 8/9 fuel, of 5 kg per unit
+                notes.append("%i units of liquid fuel are already included in the engine" %
+                             round(tank.m_full * 8 / 9 / parts.FuelTypes.LiquidFuel.unitmass))
+        if self.fueltype is parts.FuelTypes.AtomicFuel:
+            notes.append("Atomic fuel is regular liquid fuel w/out oxidizer (remove oxidizer in VAB!)")
+        if self.sfb is not None and self.sfbcount != 1 and self.eng_F_percentage is not None:
+            notes.append("Set liquid fuel engine thrust to {:.0%} while SFB are burning".format(
+                self.eng_F_percentage))
+        return notes
 
     def get_f_e(self):
         if self.fueltype is parts.FuelTypes.LiquidFuel:
@@ -159,7 +164,9 @@ class Design:
             return parts.AtomicTank_f_e
         return self.fueltanks[0][1].f_e
 
-    def calculate_performance(self, dv, pressure):
+    def calculate_performance(self, dv, pressure, space=None):
+        if space is None:
+            space = SearchSpace(pressure)
         fueltankmass = self.get_fueltankmass()
         if self.sfb is None:
             # liquid fuel only or
@@ -167,9 +174,8 @@ class Design:
             f_e = self.get_f_e()
             self.performance = \
                 physics.lf_performance(dv,
-                                       physics.engine_isp(self.mainengine, pressure),
-                                       physics.engine_force(self.mainenginecount, self.mainengine,
-                                                            pressure),
+                                       space.isp(self.mainengine),
+                                       space.force(self.mainenginecount, self.mainengine),
                                        pressure,
                                        self.payload + self.mainenginecount * self.mainengine.m,
                                        fueltankmass / (1 + f_e), f_e)
@@ -178,12 +184,10 @@ class Design:
             sfbmountmass = self.get_sfbmountmass()
             self.performance = \
                 physics.sflf_concurrent_performance(dv,
-                                                    physics.engine_isp(self.mainengine, pressure),
-                                                    physics.engine_isp(self.sfb, pressure),
-                                                    physics.engine_force(self.mainenginecount,
-                                                                         self.mainengine, pressure),
-                                                    physics.engine_force(self.sfbcount, self.sfb,
-                                                                         pressure),
+                                                    space.isp(self.mainengine),
+                                                    space.isp(self.sfb),
+                                                    space.force(self.mainenginecount, self.mainengine),
+                                                    space.force(self.sfbcount, self.sfb),
                                                     pressure,
                                                     self.payload + self.mainenginecount * self.mainengine.m,
                                                     fueltankmass * 8 / 9,
@@ -195,22 +199,22 @@ class Design:
     def has_enough_acceleration(self, min_acceleration):
         if self.performance is None:
             return False
-        # pylint: disable=unused-variable
-        dv, p, a_s, a_t, m_s, m_t, solid, op = self.performance
-        for i in range(len(a_s)):
-            if a_s[i] < min_acceleration[op[i]]:
-                return False
-        return True
+        return _has_enough_acceleration(self.performance, min_acceleration)
 
     def sfb_burning_when_allowed(self, sfb_allowed):
         if self.performance is None:
             return False
-        # pylint: disable=unused-variable
-        dv, p, a_s, a_t, m_s, m_t, solid, op = self.performance
-        for i in range(len(solid)):
-            if solid[i] and not sfb_allowed[op[i]]:
-                return False
-        return True
+        return _sfb_burning_when_allowed(self.performance, sfb_allowed)
+
+    def get_title(self):
+        """Returns short description of main engines and SFBs."""
+        if self.mainenginecount == 1:
+            title = self.mainengine.name
+        else:
+            title = "%i * %s, radially mounted" % (self.mainenginecount, self.mainengine.name)
+        if self.sfb is not None:
+            title += " + %i * %s" % (self.sfbcount, self.sfb.name)
+        return title
 
     def __str__(self):
         rstr = ''
@@ -233,7 +237,7 @@ class Design:
         rstr += "\tFuel tanks: %s\n" % ", ".join(("%i * %s" % (t[0], t[1].name) for t in self.fueltanks))
         rstr += ("%sRequires: %s\n" %
                  (f_yes if Features.low_requirements in self.features else f_no,
-                  ", ".join([n.name for n in self.requiredscience.nodes])))
+                  ", ".join([n.name for n in sorted(self.requiredscience.nodes, key=lambda n: n.value)])))
         rstr += ("%sRadial size: %s\n" %
                  (f_yes if Features.radial_size in self.features else f_no, self.size.name))
         if self.mainengine.tvc != 0.0:
@@ -272,6 +276,20 @@ class Design:
         # obvious and easy to check criteria
         if (self.get_mass() < a.get_mass()) or (self.get_cost() < a.get_cost()):
             return True
+        if self.is_preferred_to(a, preferredsize, bestgimbal, prefergenerators, prefershortengines,
+                                prefermonopropellant):
+            return True
+        if self.get_mass() == a.get_mass() and self.get_cost() == a.get_cost() \
+                and sum(self.performance[0]) > sum(a.performance[0]):
+            return True
+        return False
+
+    def is_preferred_to(self, a, preferredsize, bestgimbal, prefergenerators, prefershortengines,
+                        prefermonopropellant):
+        """
+        Returns True if self is better than a by any of the user's preferences or by required
+        technology. Only depends on the properties returned by preference_profile().
+        """
         # if user requires, check if we have better gimbal
         if bestgimbal == 1:
             if (self.sfbcount != 1 and self.mainengine.tvc > 0.0) and \
@@ -301,14 +319,17 @@ class Design:
         # to be earlier available in the game is an advantage
         if self.requiredscience.is_easier_than(a.requiredscience):
             return True
-        if self.get_mass() == a.get_mass() and self.get_cost() == a.get_cost() \
-                and sum(self.performance[0]) > sum(a.performance[0]):
-            return True
         return False
 
+    def preference_profile(self):
+        """Returns hashable tuple of all properties considered by is_preferred_to()."""
+        return (self.sfbcount == 1, self.mainengine.tvc, self.fueltype, self.mainengine.electricity,
+                self.mainengine.length, self.size, self.requiredscience.mask)
+
     def determine_features(self, designs, preferredsize, bestgimbal, prefergenerators,
                            prefershortengines, prefermonopropellant):
         """Sets self.features according to properties of design.Features enum."""
+        self.features = set()
         lowest_mass = True
         lowest_cost = True
         lowest_requirements = True
@@ -352,38 +373,221 @@ class Design:
             self.features.add(Features.radial_size)
 
 
+def _conventional_tanks(eng, size, fueltype, lf, catalog=None, packing='mass'):
+    """Returns list of (count, tank) tuples of liquid fuel or atomic fuel tanks for a design.
+
+    :param lf: full tank mass
+    :type catalog: catalog.Catalog
+    :param packing: objective of tanks.PackingTable, 'mass' or 'cost'
+    """
+    if catalog is None:
+        catalog = BUILTIN
+    fueltanks = catalog.fueltanks[size]
+    integrated = catalog.integrated_tanks.get(eng.name)
+    if integrated is not None:
+        lf = max(lf, integrated.m_full)
+    if fueltype is parts.FuelTypes.LiquidFuel:
+        smalltankcount = int(ceil(lf / fueltanks[0].m_full))
+    else:
+        # atomic fuel
+        # Adomic Fuel is liquid fuel without oxidizer.
+        smalltankcount = int(ceil(lf / (fueltanks[0].m_full * parts.AtomicTankFactor)))
+    if integrated is None:
+        return packing_table(fueltanks).pack(smalltankcount, packing)
+    # fuel integrated into the engine replaces one of the biggest tanks
+    integratedcount = int(round(integrated.m_full / fueltanks[0].m_full))
+    return packing_table(fueltanks).pack(smalltankcount - integratedcount, packing) + [(1, integrated)]
+
+
+def _special_tanks(xf, tank):
+    """Returns list of (count, tank) tuples of monopropellant or xenon tanks for a design."""
+    tankcount = ceil(xf / tank.m_full)
+    if tank.size == parts.RadialSize.RadiallyMounted:
+        tankcount = max(tankcount, 2)
+    return [(tankcount, tank)]
+
+
+def _fueltankmass(fueltype, tanks):
+    fuelmass = sum([tp[0]*tp[1].m_full for tp in tanks])
+    if fueltype is parts.FuelTypes.AtomicFuel:
+        fuelmass *= parts.AtomicTankFactor
+    return fuelmass
+
+
+def _has_enough_acceleration(performance, min_acceleration):
+    # pylint: disable=unused-variable
+    dv, p, a_s, a_t, m_s, m_t, solid, op = performance
+    for i in range(len(a_s)):
+        if a_s[i] < min_acceleration[op[i]]:
+            return False
+    return True
+
+
+def _sfb_burning_when_allowed(performance, sfb_allowed):
+    # pylint: disable=unused-variable
+    dv, p, a_s, a_t, m_s, m_t, solid, op = performance
+    for i in range(len(solid)):
+        if solid[i] and not sfb_allowed[op[i]]:
+            return False
+    return True
+
+
+class _ThrustLimitSearch(object):
+    """Search for the lowest feasible thrust limit of liquid fuel engines while SFBs burn.
+
+    Needed fuel only grows with the thrust limit, so the lowest feasible limit gives the lightest
+    design. The former fixed limits 0, 1/3, 1/2, 2/3 and 1 are tried in ascending order until one
+    is feasible, so the result is never worse than trying all of them. The limit is then bisected
+    between the last infeasible and the first feasible one. The search stops early if the caller
+    finds that no higher limit can be feasible.
+
+    Limits are evaluated by the caller: next_limit() returns the limit to evaluate next or None if
+    the search is completed, tell() gives the result of evaluating it.
+    """
+
+    grid = (0, 1/3, 1/2, 2/3, 1)
+    precision = 0.02
+
+    def __init__(self, limit=None):
+        self.fixed = limit is not None
+        self.lo = None      # highest infeasible limit below the feasible ones
+        self.best = None    # (limit, result) of lowest feasible limit
+        self.reason = None  # reason of rejecting the last infeasible limit, see stats.REASONS
+        self.next = limit if limit is not None else self.grid[0]
+
+    def next_limit(self):
+        return self.next
+
+    def tell(self, limit, reason, result=None, hopeless=False):
+        """Sets result of evaluating limit.
+
+        :param reason: None if feasible, else reason of rejecting it
+        :param result: stored for the lowest feasible limit
+        :param hopeless: whether no higher limit can be feasible either
+        """
+        if reason is None:
+            self.best = (limit, result)
+        else:
+            self.lo = limit
+            self.reason = reason
+        self.next = self._next(hopeless)
+
+    def _next(self, hopeless):
+        if self.fixed:
+            return None
+        if self.best is None:
+            higher = [limit for limit in self.grid if limit > self.lo]
+            return higher[0] if higher and not hopeless else None
+        if self.lo is None or self.best[0] - self.lo <= self.precision:
+            return None
+        # whole percents, as thrust limits are set in the game
+        limit = round((self.lo + self.best[0]) * 50) / 100
+        return limit if self.lo < limit < self.best[0] else None
+
+
+def _f_e(fueltype, tank):
+    if fueltype is parts.FuelTypes.LiquidFuel:
+        return 1 / 8
+    elif fueltype is parts.FuelTypes.AtomicFuel:
+        return parts.AtomicTank_f_e
+    return tank.f_e
+
+
 def create_lf_design(payload, pressure, dv, acc, eng,
-                     size=None, count=1, fueltype=parts.FuelTypes.LiquidFuel, tank=None):
+                     size=None, count=1, fueltype=parts.FuelTypes.LiquidFuel, tank=None, space=None, stats=None):
     """Creates a simple non-SFB design with given parameters
 
     :type eng: parts.Engine
     :type size: parts.RadialSize
     :type fueltype: parts.FuelTypes
     :type tank: parts.SpecialFuelTank
+    :type space: SearchSpace
+    :type stats: stats.Stats
     """
+    if space is None:
+        space = SearchSpace(pressure)
     if size is None:
         size = eng.size
     design = Design(payload, eng, count, size, fueltype)
-    if fueltype is parts.FuelTypes.LiquidFuel:
-        f_e = 1 / 8
-    elif fueltype is parts.FuelTypes.AtomicFuel:
-        f_e = parts.AtomicTank_f_e
-    else:
-        f_e = tank.f_e
+    f_e = _f_e(fueltype, tank)
     m_p = payload + count*eng.m
-    lf = physics.lf_needed_fuel(dv, physics.engine_isp(eng, pressure), m_p, f_e)
+    lf = physics.lf_needed_fuel(dv, space.isp(eng), m_p, f_e)
     if lf is None:
+        if stats is not None:
+            stats.reject('fuel')
         return None
     if fueltype is parts.FuelTypes.LiquidFuel or fueltype is parts.FuelTypes.AtomicFuel:
-        design.add_conventional_tanks((1 + f_e) * lf)
+        design.add_conventional_tanks((1 + f_e) * lf, space.catalog, space.packing)
     else:
         design.add_special_tanks((1 + f_e) * lf, tank)
-    design.calculate_performance(dv, pressure)
+    design.calculate_performance(dv, pressure, space)
     if not design.has_enough_acceleration(acc):
+        if stats is not None:
+            stats.reject('acceleration')
         return None
     return design
 
 
+def create_lf_designs(payload, pressure, dv, acc, candidates, space=None, stats=None):
+    """Creates non-SFB designs for given Candidates at once.
+
+    Same as calling create_lf_design() for each of the candidates, but physics are evaluated in
+    batches using physics.lf_needed_fuel_batch() and physics.lf_performance_batch().
+
+    :return: list with Design or None for each of the candidates
+    """
+    if space is None:
+        space = SearchSpace(pressure)
+    f_e = [_f_e(c.fueltype, c.tank) for c in candidates]
+    lf = physics.lf_needed_fuel_batch(dv, [space.isp(c.eng) for c in candidates],
+                                      [payload + c.count*c.eng.m for c in candidates], f_e)
+    return complete_lf_designs(payload, pressure, dv, acc, candidates, lf, space, stats)
+
+
+def complete_lf_designs(payload, pressure, dv, acc, candidates, lf, space=None, stats=None):
+    """Creates non-SFB designs for given Candidates, given needed fuel of each of them.
+
+    :param lf: list of needed liquid combustible (or None if infeasible) for each of the candidates
+    :return: list with Design or None for each of the candidates
+    """
+    if space is None:
+        space = SearchSpace(pressure)
+    # Tanks and performance are determined without creating Designs, which are only created for
+    # candidates fulfilling the requirements.
+    f_e = [_f_e(c.fueltype, c.tank) for c in candidates]
+    tanks = len(candidates) * [None]
+    for j, c in enumerate(candidates):
+        if lf[j] is None:
+            continue
+        if c.fueltype is parts.FuelTypes.LiquidFuel or c.fueltype is parts.FuelTypes.AtomicFuel:
+            tanks[j] = _conventional_tanks(c.eng, c.size, c.fueltype, (1 + f_e[j]) * lf[j], space.catalog,
+                                           space.packing)
+        else:
+            tanks[j] = _special_tanks((1 + f_e[j]) * lf[j], c.tank)
+    feasible = [j for j in range(len(candidates)) if tanks[j] is not None]
+    if stats is not None:
+        stats.reject('fuel', len(candidates) - len(feasible))
+    performance = physics.lf_performance_batch(
+        dv, [space.isp(candidates[j].eng) for j in feasible],
+        [space.force(candidates[j].count, candidates[j].eng) for j in feasible],
+        pressure, [payload + candidates[j].count * candidates[j].eng.m for j in feasible],
+        [_fueltankmass(candidates[j].fueltype, tanks[j]) / (1 + f_e[j]) for j in feasible],
+        [f_e[j] for j in feasible])
+    designs = len(candidates) * [None]
+    for j, perf in zip(feasible, performance):
+        if not _has_enough_acceleration(perf, acc):
+            if stats is not None:
+                stats.reject('acceleration')
+            continue
+        c = candidates[j]
+        design = designs[j] = Design(payload, c.eng, c.count, c.size, c.fueltype)
+        if c.tank is not None:
+            design.requiredscience.add(c.tank.level)
+        design.fueltanks = tanks[j]
+        design.performance = perf
+    return designs
+
+
 def create_single_lfe_design(payload, pressure, dv, acc, eng):
     return create_lf_design(payload, pressure, dv, acc, eng)
 
@@ -408,32 +612,156 @@ def create_monopropellant_design(payload, pressure, dv, acc, tank, count):
                             size=tank.size, count=count, fueltype=parts.FuelTypes.Monopropellant, tank=tank)
 
 
-def create_sfb_design(payload, pressure, dv, acc, sfb_allowed, eng, eng_F_percentage, size, count, sfb, sfbcount):
-    """Create LiquidFuel + SFB design with given parameters"""
+def create_sfb_design(payload, pressure, dv, acc, sfb_allowed, eng, eng_F_percentage, size, count, sfb, sfbcount,
+                      space=None, stats=None):
+    """Create LiquidFuel + SFB design with given parameters
+
+    If eng_F_percentage is None, the lowest feasible thrust limit is searched, see create_sfb_designs().
+    """
+    if space is None:
+        space = SearchSpace(pressure)
+    if eng_F_percentage is None:
+        return create_sfb_designs(payload, pressure, dv, acc, sfb_allowed,
+                                  [Candidate(eng, size, count, parts.FuelTypes.LiquidFuel, None, sfb, sfbcount, None)],
+                                  space, stats)[0]
     design = Design(payload, eng, count, size, parts.FuelTypes.LiquidFuel)
     design.add_sfb(sfb, sfbcount)
     # lpsr = Fl * I_sps / Fs / I_spl
     lpsr = count * eng.F_vac * sfb.isp_vac / sfbcount / sfb.F_vac / eng.isp_vac
     design.eng_F_percentage = eng_F_percentage
     m_p = payload + count*eng.m
-    lf = physics.sflf_concurrent_needed_fuel(dv, physics.engine_isp(eng, pressure),
-                                             physics.engine_isp(sfb, pressure),
-                                             m_p,
+    lf = physics.sflf_concurrent_needed_fuel(dv, space.isp(eng), space.isp(sfb), m_p,
                                              design.get_sfbmountmass(), sfbcount * sfb.m_full, sfbcount * sfb.m_empty,
                                              lpsr * eng_F_percentage)
     if lf is None:
+        if stats is not None:
+            stats.reject('fuel')
         return None
-    design.add_conventional_tanks(9 / 8 * lf)
-    design.calculate_performance(dv, pressure)
+    return _complete_sfb_design(design, lf, pressure, dv, acc, sfb_allowed, space, stats)
+
+
+def _complete_sfb_design(design, lf, pressure, dv, acc, sfb_allowed, space, stats=None):
+    design.add_conventional_tanks(9 / 8 * lf, space.catalog, space.packing)
+    design.calculate_performance(dv, pressure, space)
     if not design.has_enough_acceleration(acc):
+        if stats is not None:
+            stats.reject('acceleration')
         return None
     if not design.sfb_burning_when_allowed(sfb_allowed):
+        if stats is not None:
+            stats.reject('sfb_phase')
         return None
-    if sfbcount != 1:
-        design.notes.append("Set liquid fuel engine thrust to {:.0%} while SFB are burning".format(eng_F_percentage))
     return design
 
 
+def _evaluate_thrust_limits(payload, pressure, dv, candidates, limits, space, stats, evaluated):
+    """Adds tanks and performance of given candidates at given limits to evaluated, see
+    create_sfb_designs(), solving needed fuel of all of them in one batch."""
+    lanes = {}
+    for c, limit in zip(candidates, limits):
+        if (c, limit) not in evaluated:
+            lanes.setdefault((c.eng, c.count, c.sfb, c.sfbcount, limit), c)
+    keys = list(lanes)
+    m_x = [parts.StackstageExtraMass if c.sfbcount == 1 else c.sfbcount*parts.RadialstageExtraMass
+           for c in lanes.values()]
+    iterations = [] if stats is not None else None
+    # lpsr = Fl * I_sps / Fs / I_spl
+    lf = physics.sflf_concurrent_needed_fuel_batch(
+        dv, [space.isp(eng) for eng, count, sfb, sfbcount, limit in keys],
+        [space.isp(sfb) for eng, count, sfb, sfbcount, limit in keys],
+        [payload + count*eng.m for eng, count, sfb, sfbcount, limit in keys], m_x,
+        [sfbcount * sfb.m_full for eng, count, sfb, sfbcount, limit in keys],
+        [sfbcount * sfb.m_empty for eng, count, sfb, sfbcount, limit in keys],
+        [count * eng.F_vac * sfb.isp_vac / sfbcount / sfb.F_vac / eng.isp_vac * limit
+         for eng, count, sfb, sfbcount, limit in keys], iterations)
+    if stats is not None:
+        stats.add_sflf_iterations(iterations)
+        stats.sfb_evaluations += len(keys)
+    lf = dict(zip(keys, lf))
+    for c, limit in zip(candidates, limits):
+        if (c, limit) in evaluated:
+            continue
+        fuel = lf[c.eng, c.count, c.sfb, c.sfbcount, limit]
+        if fuel is None:
+            evaluated[c, limit] = None
+            continue
+        tanks = _conventional_tanks(c.eng, c.size, parts.FuelTypes.LiquidFuel, 9 / 8 * fuel,
+                                    space.catalog, space.packing)
+        m_x = parts.StackstageExtraMass if c.sfbcount == 1 else c.sfbcount*parts.RadialstageExtraMass
+        evaluated[c, limit] = (tanks, physics.sflf_concurrent_performance(
+            dv, space.isp(c.eng), space.isp(c.sfb), space.force(c.count, c.eng),
+            space.force(c.sfbcount, c.sfb), pressure, payload + c.count * c.eng.m,
+            _fueltankmass(parts.FuelTypes.LiquidFuel, tanks) * 8 / 9, m_x, c.sfbcount * c.sfb.m_full,
+            c.sfbcount * c.sfb.m_empty, limit))
+
+
+def _search_thrust_limits(payload, pressure, dv, acc, sfb_allowed, candidates, space, stats, evaluated):
+    """Returns _ThrustLimitSearch of each of the given candidates, completed by evaluating one limit
+    of each candidate per batch."""
+    searches = [_ThrustLimitSearch(c.eng_F_percentage) for c in candidates]
+    pending = list(range(len(candidates)))
+    while pending:
+        _evaluate_thrust_limits(payload, pressure, dv, [candidates[j] for j in pending],
+                                [searches[j].next_limit() for j in pending], space, stats, evaluated)
+        for j in pending:
+            c = candidates[j]
+            limit = searches[j].next_limit()
+            if evaluated[c, limit] is None:
+                # needed fuel only grows with the limit
+                searches[j].tell(limit, 'fuel', hopeless=True)
+                continue
+            # as in _complete_sfb_design(), but only create a Design if requirements are fulfilled
+            tanks, perf = evaluated[c, limit]
+            if not _has_enough_acceleration(perf, acc):
+                # no higher limit is feasible if even full thrust at the current start mass, which
+                # only grows with the limit, is too little to lift off
+                maxforce = space.force(c.count, c.eng)[0] + space.force(c.sfbcount, c.sfb)[0]
+                searches[j].tell(limit, 'acceleration', hopeless=maxforce / perf[4][0] < acc[0])
+            elif not _sfb_burning_when_allowed(perf, sfb_allowed):
+                searches[j].tell(limit, 'sfb_phase')
+            else:
+                searches[j].tell(limit, None, (tanks, perf))
+        pending = [j for j in pending if searches[j].next_limit() is not None]
+    return searches
+
+
+def create_sfb_designs(payload, pressure, dv, acc, sfb_allowed, candidates, space=None, stats=None,
+                       evaluated=None):
+    """Creates LiquidFuel + SFB designs for given Candidates at once.
+
+    Same as calling create_sfb_design() for each of the candidates, but needed fuel is determined by
+    physics.sflf_concurrent_needed_fuel_batch(). Candidates only differing by radial size share one
+    solution, as the size only matters for the choice of fuel tanks. Thrust limits of candidates
+    with eng_F_percentage None are searched by _ThrustLimitSearch, evaluating one limit of each
+    candidate per batch.
+
+    :param evaluated: if given, dict of (candidate, limit) to (tanks, performance), or None if
+        needed fuel could not be determined, which do not depend on acc and sfb_allowed. Limits
+        found in it are not evaluated again, and evaluated limits are added to it.
+    :return: list with Design or None for each of the candidates
+    """
+    if space is None:
+        space = SearchSpace(pressure)
+    if evaluated is None:
+        evaluated = {}
+    searches = _search_thrust_limits(payload, pressure, dv, acc, sfb_allowed, candidates, space, stats, evaluated)
+    designs = []
+    for c, search in zip(candidates, searches):
+        if search.best is None:
+            if stats is not None:
+                stats.reject(search.reason)
+            designs.append(None)
+            continue
+        limit, (tanks, perf) = search.best
+        design = Design(payload, c.eng, c.count, c.size, parts.FuelTypes.LiquidFuel)
+        design.add_sfb(c.sfb, c.sfbcount)
+        design.eng_F_percentage = limit
+        design.fueltanks = tanks
+        design.performance = perf
+        designs.append(design)
+    return designs
+
+
 def create_single_lfe_sfb_design(payload, pressure, dv, acc, sfb_allowed, eng, eng_F_percentage, sfb, sfbcount):
     return create_sfb_design(payload, pressure, dv, acc, sfb_allowed, eng, eng_F_percentage, eng.size, 1, sfb, sfbcount)
 
@@ -442,80 +770,349 @@ def create_radial_lfe_sfb_design(payload, pressure, dv, acc, sfb_allowed, eng, e
     return create_sfb_design(payload, pressure, dv, acc, sfb_allowed, eng, eng_F_percentage, size, count, sfb, sfbcount)
 
 
-def find_designs(payload, pressure, dv, min_acceleration, sfb_allowed,
-                 preferredsize = None, bestgimbal = 0, sfballowed = False, prefergenerators = False,
-                 prefershortengines = False, prefermonopropellant = True):
-    # pressure: 0 = vacuum, 1 = kerbin
-    designs = []
-    d = create_atomic_design(payload, pressure, dv, min_acceleration)
-    if d is not None:
-        designs.append(d)
-    for xetank in parts.XenonTanks:
-        d = create_xenon_design(payload, pressure, dv, min_acceleration, xetank)
-        if d is not None:
-            designs.append(d)
-    for mptank in parts.MonoPropellantTanks:
-        for count in [2, 3, 4, 6, 8]:
-            d = create_monopropellant_design(payload, pressure, dv, min_acceleration,
-                                             mptank, count)
-            if d is not None:
-                designs.append(d)
-                break  # do not try more engines as it wouldn't have any advantage
-    for eng in parts.LiquidFuelEngines:
+Candidate = namedtuple('Candidate', ['eng', 'size', 'count', 'fueltype', 'tank', 'sfb', 'sfbcount',
+                                     'eng_F_percentage'])
+"""Parameters of a design which find_designs considers, independent of the mission.
+
+eng_F_percentage None means that the thrust limit is searched for each mission, see
+_ThrustLimitSearch."""
+
+
+def _enumerate_candidates(sfballowed, catalog):
+    lf = parts.FuelTypes.LiquidFuel
+    groups = []
+    def single(eng, size, count=1, fueltype=lf, tank=None):
+        return Candidate(eng, size, count, fueltype, tank, None, 0, None)
+    def sfb_groups(eng, size, counts):
+        for count in counts:
+            for sfbcount in [1, 2, 3, 4, 6, 8]:
+                if sfbcount == 1 and size is not parts.RadialSize.Small:
+                    # would look bad
+                    continue
+                if not catalog.is_researched(parts.StackstageExtraTech if sfbcount == 1 else
+                                             parts.RadialstageExtraTech):
+                    continue
+                for sfb in catalog.sfbs:
+                    # stacked SFBs burn before the liquid fuel engines, radial ones get their thrust
+                    # limit searched while creating designs
+                    limit = 0 if sfbcount == 1 else None
+                    groups.append((False, (Candidate(eng, size, count, lf, None, sfb, sfbcount, limit),)))
+    for eng in catalog.engines[parts.FuelTypes.AtomicFuel]:
+        groups.append((False, (single(eng, eng.size, fueltype=parts.FuelTypes.AtomicFuel),)))
+    for xetank in catalog.special_tanks[parts.FuelTypes.Xenon]:
+        size = xetank.size if xetank.size is not parts.RadialSize.RadiallyMounted else parts.RadialSize.Tiny
+        for eng in catalog.engines[parts.FuelTypes.Xenon]:
+            groups.append((False, (single(eng, size, fueltype=parts.FuelTypes.Xenon, tank=xetank),)))
+    for mptank in catalog.special_tanks[parts.FuelTypes.Monopropellant]:
+        for eng in catalog.engines[parts.FuelTypes.Monopropellant]:
+            # do not try more engines than the first one working as it wouldn't have any advantage
+            groups.append((True, tuple(single(eng, mptank.size, count, parts.FuelTypes.Monopropellant, mptank)
+                                       for count in [2, 3, 4, 6, 8])))
+    radialsizes = sorted(catalog.fueltanks, key=lambda s: s.value)
+    for eng in catalog.engines[lf]:
         if eng.size is parts.RadialSize.RadiallyMounted:
-            for size in [parts.RadialSize.Tiny, parts.RadialSize.Small,
-                    parts.RadialSize.Large, parts.RadialSize.ExtraLarge]:
-                for count in [2, 3, 4, 6, 8]:
-                    d = create_radial_lfe_design(payload, pressure, dv, min_acceleration,
-                                                 eng, size, count)
-                    if d is not None:
-                        designs.append(d)
-                        break   # do not try more engines
+            for size in radialsizes:
+                groups.append((True, tuple(single(eng, size, count) for count in [2, 3, 4, 6, 8])))
                 if sfballowed and size is not parts.RadialSize.Tiny:
-                    for count in [2, 3, 4, 6, 8]:
-                        for sfbcount in [1, 2, 3, 4, 6, 8]:
-                            if sfbcount == 1 and size is not parts.RadialSize.Small:
-                                # would look bad
-                                continue
-                            for sfb in parts.SolidFuelBoosters:
-                                for limit in [0, 1/3, 1/2, 2/3, 1]:
-                                    d = create_radial_lfe_sfb_design(payload, pressure, dv, min_acceleration, sfb_allowed,
-                                                                     eng, limit, size, count, sfb, sfbcount)
-                                    if d is not None:
-                                        designs.append(d)
-                                    if sfbcount == 1:
-                                        break
+                    sfb_groups(eng, size, [2, 3, 4, 6, 8])
         else:
-            d = create_single_lfe_design(payload, pressure, dv, min_acceleration, eng)
-            if d is not None:
-                designs.append(d)
+            groups.append((False, (single(eng, eng.size),)))
             if sfballowed and eng.size is not parts.RadialSize.Tiny:
-                for sfbcount in [1, 2, 3, 4, 6, 8]:
-                    if sfbcount == 1 and eng.size is not parts.RadialSize.Small:
-                        # would look bad
-                        continue
-                    for sfb in parts.SolidFuelBoosters:
-                        for limit in [0, 1/3, 1/2, 2/3, 1]:
-                            d = create_single_lfe_sfb_design(payload, pressure, dv, min_acceleration, sfb_allowed,
-                                                             eng, limit, sfb, sfbcount)
-                            if d is not None:
-                                designs.append(d)
-                            if sfbcount == 1:
-                                break
+                sfb_groups(eng, eng.size, [1])
+    return tuple(groups)
 
-    # Compare designs and decide which ones are the best ones
+_candidate_groups = {}
+
+def candidate_groups(sfballowed, catalog=None):
+    """Returns all candidates considered by find_designs, as tuple of (first_only, candidates) groups.
+
+    Of groups with first_only being True, only the first feasible candidate is used. The result only
+    depends on the catalog of parts and whether SFBs are allowed, so it is computed once and shared
+    by all missions.
+
+    :type catalog: catalog.Catalog
+    """
+    if catalog is None:
+        catalog = BUILTIN
+    key = (catalog, bool(sfballowed))
+    if key not in _candidate_groups:
+        _candidate_groups[key] = _enumerate_candidates(bool(sfballowed), catalog)
+    return _candidate_groups[key]
+
+
+class SearchSpace(object):
+    """Mission-independent data for evaluating designs at given pressures.
+
+    Holds the candidates to be evaluated and caches specific impulse and force vectors of engines
+    and SFBs, so that missions with equal pressures can share one SearchSpace. packing is the
+    objective of choosing liquid fuel tanks, 'mass' or 'cost' (see tanks).
+    """
+    def __init__(self, pressure, sfballowed=False, catalog=None, packing='mass'):
+        self.pressure = list(pressure)
+        self.sfballowed = sfballowed
+        self.catalog = catalog if catalog is not None else BUILTIN
+        self.packing = packing
+        self.groups = candidate_groups(sfballowed, self.catalog)
+        self._isp = {}
+        self._force = {}
+
+    def __getstate__(self):
+        # candidates are recomputed rather than sent to worker processes
+        return self.pressure, self.sfballowed, self.catalog, self.packing
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def isp(self, eng):
+        """Returns physics.engine_isp(eng, pressure)."""
+        try:
+            return self._isp[eng]
+        except KeyError:
+            isp = self._isp[eng] = physics.engine_isp(eng, self.pressure)
+            return isp
+
+    def force(self, count, eng):
+        """Returns physics.engine_force(count, eng, pressure)."""
+        try:
+            return self._force[count, eng]
+        except KeyError:
+            force = self._force[count, eng] = physics.engine_force(count, eng, self.pressure)
+            return force
+
+
+def create_design(payload, pressure, dv, acc, sfb_allowed, candidate, space=None):
+    """Creates design from given Candidate, returns None if it does not fulfill the requirements."""
+    c = candidate
+    if c.sfb is None:
+        return create_lf_design(payload, pressure, dv, acc, c.eng, c.size, c.count, c.fueltype, c.tank, space)
+    return create_sfb_design(payload, pressure, dv, acc, sfb_allowed, c.eng, c.eng_F_percentage, c.size, c.count,
+                             c.sfb, c.sfbcount, space)
+
+
+def rank_designs(designs, preferredsize = None, bestgimbal = 0, prefergenerators = False,
+                 prefershortengines = False, prefermonopropellant = True):
+    """Sets is_best and features of given designs, which might have been ranked before."""
     for d in designs:
-        for e in designs:
-            if (d is not e) and e.is_best and (not d.is_better_than(e, preferredsize, bestgimbal, prefergenerators,
-                                                                    prefershortengines, prefermonopropellant)):
-                d.is_best = False
-                break
+        d.is_best = True
+        d.features = _NO_FEATURES
+    # Compare designs and decide which ones are the best ones
+    dominance.mark_best(designs, preferredsize, bestgimbal, prefergenerators, prefershortengines,
+                        prefermonopropellant)
 
     # determine which are the features of d, i.e. why it is the best
-    for d in designs:
-        if not d.is_best:
-            continue
-        d.determine_features(designs, preferredsize, bestgimbal, prefergenerators,
+    best = [d for d in designs if d.is_best]
+    for d in best:
+        d.determine_features(best, preferredsize, bestgimbal, prefergenerators,
                              prefershortengines, prefermonopropellant)
 
+
+def create_designs(payload, pressure, dv, acc, sfb_allowed, candidates, space=None, stats=None):
+    """Creates designs for given Candidates, using create_lf_designs() and create_sfb_designs().
+
+    :return: list with Design or None for each of the candidates
+    """
+    if space is None:
+        space = SearchSpace(pressure)
+    if stats is not None:
+        stats.count_candidates(candidates)
+    lf_candidates = [c for c in candidates if c.sfb is None]
+    sfb_candidates = [c for c in candidates if c.sfb is not None]
+    with timer(stats, 'lf_designs'):
+        created = dict(zip(lf_candidates, create_lf_designs(payload, pressure, dv, acc, lf_candidates, space,
+                                                            stats)))
+    with timer(stats, 'sfb_designs'):
+        created.update(zip(sfb_candidates, create_sfb_designs(payload, pressure, dv, acc, sfb_allowed,
+                                                              sfb_candidates, space, stats)))
+    return [created[c] for c in candidates]
+
+
+def _create_designs_worker(args):
+    # args end with space and stats, return stats as filled by the worker process
+    return create_designs(*args), args[-1]
+
+
+def _create_designs_parallel(payload, pressure, dv, acc, sfb_allowed, candidates, workers, space, stats=None):
+    # one chunk per main engine, the output does not depend on how candidates are split up
+    chunks = {}
+    for c in candidates:
+        chunks.setdefault(c.eng, []).append(c)
+    chunks = sorted(chunks.values(), key=len, reverse=True)
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.map(_create_designs_worker,
+                           [(payload, pressure, dv, acc, sfb_allowed, chunk, space,
+                             Stats() if stats is not None else None) for chunk in chunks], 1)
+    finally:
+        pool.close()
+        pool.join()
+    created = {}
+    for chunk, (designs, chunkstats) in zip(chunks, results):
+        created.update(zip(chunk, designs))
+        if stats is not None:
+            stats.merge(chunkstats)
+    return [created[c] for c in candidates]
+
+
+def _select(groups, created, stats=None):
+    """Yields designs of given groups, created by create_designs() for all their candidates."""
+    created = iter(created)
+    for first_only, group in groups:
+        found = False
+        for d in islice(created, len(group)):
+            if d is not None and not found:
+                yield d
+                found = first_only
+            elif d is not None and stats is not None:
+                stats.reject('superseded')
+
+
+def iter_designs(payload, pressure, dv, min_acceleration, sfb_allowed, sfballowed = False, space = None,
+                 stats = None, catalog = None, packing = 'mass'):
+    """Yields all designs fulfilling the requirements, in the order of find_designs().
+
+    Designs are created in chunks of candidates sharing the same main engine, and each chunk is
+    yielded as soon as it is completed. Yielded designs are not ranked, i.e. is_best is True and
+    features are empty; use dominance.ParetoArchive or rank_designs() for that.
+    """
+    if space is None:
+        space = SearchSpace(pressure, sfballowed, catalog, packing)
+    chunk = []
+    for i, (first_only, group) in enumerate(space.groups):
+        chunk.append((first_only, group))
+        if i + 1 < len(space.groups) and space.groups[i + 1][1][0].eng is group[0].eng:
+            continue
+        candidates = [c for first_only, group in chunk for c in group]
+        for d in _select(chunk, create_designs(payload, pressure, dv, min_acceleration, sfb_allowed,
+                                               candidates, space, stats), stats):
+            yield d
+        chunk = []
+
+
+def find_designs(payload, pressure, dv, min_acceleration, sfb_allowed,
+                 preferredsize = None, bestgimbal = 0, sfballowed = False, prefergenerators = False,
+                 prefershortengines = False, prefermonopropellant = True, space = None, workers = None,
+                 stats = None, catalog = None, researched = None, packing = 'mass'):
+    # pressure: 0 = vacuum, 1 = kerbin
+    # space: SearchSpace for pressure and sfballowed, might be shared between calls
+    # workers: if greater than 1, number of processes to create designs in parallel
+    # stats: stats.Stats to be filled with counters and timings
+    # catalog: catalog.Catalog of available parts if space is None, default: catalog.BUILTIN
+    # researched: if given and space is None, only use parts of these techtree.Nodes
+    # packing: if space is None, whether tanks are chosen for least 'mass' or 'cost', see tanks
+    if space is None:
+        with timer(stats, 'search_space'):
+            if researched is not None:
+                catalog = (catalog if catalog is not None else BUILTIN).restrict(researched)
+            space = SearchSpace(pressure, sfballowed, catalog, packing)
+    if workers is not None and workers > 1:
+        candidates = [c for first_only, group in space.groups for c in group]
+        designs = list(_select(space.groups, _create_designs_parallel(payload, pressure, dv, min_acceleration,
+                                                                      sfb_allowed, candidates, workers, space,
+                                                                      stats),
+                               stats))
+    else:
+        designs = list(iter_designs(payload, pressure, dv, min_acceleration, sfb_allowed, sfballowed, space,
+                                    stats))
+
+    with timer(stats, 'ranking'):
+        rank_designs(designs, preferredsize, bestgimbal, prefergenerators, prefershortengines,
+                     prefermonopropellant)
+    if stats is not None:
+        best = sum(1 for d in designs if d.is_best)
+        stats.designs += len(designs)
+        stats.best += best
+        stats.reject('dominated', len(designs) - best)
     return designs
+
+
+def sweep_designs(payloads, pressure, dv, min_acceleration, sfb_allowed,
+                  preferredsize = None, bestgimbal = 0, sfballowed = False, prefergenerators = False,
+                  prefershortengines = False, prefermonopropellant = True, space = None, catalog = None,
+                  packing = 'mass'):
+    """Returns list of find_designs() results for each of the given payloads.
+
+    Needed fuel of non-SFB designs is linear in the payload (see physics.lf_fuel_ratio()), so it is
+    solved once per candidate for all payloads. Fuel tanks and acceleration are still determined
+    for each payload, so results are equal to those of find_designs().
+    """
+    if space is None:
+        space = SearchSpace(pressure, sfballowed, catalog, packing)
+    candidates = [c for first_only, group in space.groups for c in group]
+    lf_candidates = [c for c in candidates if c.sfb is None]
+    sfb_candidates = [c for c in candidates if c.sfb is not None]
+    f_e = [_f_e(c.fueltype, c.tank) for c in lf_candidates]
+    ratios = [physics.lf_fuel_ratio(dv, space.isp(c.eng), f_e[j]) for j, c in enumerate(lf_candidates)]
+    results = []
+    for payload in payloads:
+        lf = []
+        for j, c in enumerate(lf_candidates):
+            m_c = (payload + c.count*c.eng.m)/f_e[j] * ratios[j]
+            lf.append(m_c if m_c >= 0 else None)
+        created = dict(zip(lf_candidates, complete_lf_designs(payload, pressure, dv, min_acceleration,
+                                                              lf_candidates, lf, space)))
+        created.update(zip(sfb_candidates, create_sfb_designs(payload, pressure, dv, min_acceleration,
+                                                              sfb_allowed, sfb_candidates, space)))
+        designs = list(_select(space.groups, [created[c] for c in candidates]))
+        rank_designs(designs, preferredsize, bestgimbal, prefergenerators, prefershortengines,
+                     prefermonopropellant)
+        results.append(designs)
+    return results
+
+
+def acceleration_margins(performance, phases):
+    """Returns lowest acceleration of given performance in each of the phases, i.e. the highest
+    minimum acceleration it fulfills there."""
+    # pylint: disable=unused-variable
+    dv, p, a_s, a_t, m_s, m_t, solid, op = performance
+    margins = phases * [float('inf')]
+    for i in range(len(a_s)):
+        margins[op[i]] = min(margins[op[i]], a_s[i])
+    return margins
+
+
+class AccelerationIndex(object):
+    """Designs of a mission, answering it for other minimum accelerations.
+
+    Needed fuel, tanks and performance do not depend on the minimum accelerations, which only
+    decide whether a design is feasible, and which thrust limit is chosen for SFB designs. So
+    non-SFB designs are created once for all candidates having enough fuel, together with their
+    acceleration_margins(), and a query merely compares these. Thrust limits of SFB designs are
+    searched again for each query, but evaluated limits are kept, so only limits which were not
+    tried for the given min_acceleration or a previous query need physics.
+
+    Results of designs() are equal to those of iter_designs() with the respective accelerations.
+    """
+
+    def __init__(self, payload, pressure, dv, min_acceleration, sfb_allowed, sfballowed=False, space=None,
+                 catalog=None, packing='mass'):
+        if space is None:
+            space = SearchSpace(pressure, sfballowed, catalog, packing)
+        self.payload = payload
+        self.pressure = pressure
+        self.dv = dv
+        self.sfb_allowed = sfb_allowed
+        self.space = space
+        self._candidates = [c for first_only, group in space.groups for c in group]
+        lf_candidates = [c for c in self._candidates if c.sfb is None]
+        self._sfb_candidates = [c for c in self._candidates if c.sfb is not None]
+        # any acceleration, even negative ones of engines failing at high pressure
+        designs = create_lf_designs(payload, pressure, dv, len(dv) * [float('-inf')], lf_candidates, space)
+        self._lf = [(c, d, acceleration_margins(d.performance, len(dv))) for c, d in zip(lf_candidates, designs)
+                    if d is not None]
+        self._evaluated = {}
+        create_sfb_designs(payload, pressure, dv, min_acceleration, sfb_allowed, self._sfb_candidates, space,
+                           evaluated=self._evaluated)
+
+    def designs(self, min_acceleration):
+        """Returns unranked designs fulfilling given minimum accelerations, in the order of
+        iter_designs()."""
+        created = dict.fromkeys(self._candidates)
+        for c, d, margins in self._lf:
+            if all(m >= a for m, a in zip(margins, min_acceleration)):
+                # designs are ranked by the caller
+                created[c] = copy.copy(d)
+        created.update(zip(self._sfb_candidates,
+                           create_sfb_designs(self.payload, self.pressure, self.dv, min_acceleration,
+                                              self.sfb_allowed, self._sfb_candidates, self.space,
+                                              evaluated=self._evaluated)))
+        return list(_select(self.space.groups, [created[c] for c in self._candidates]))
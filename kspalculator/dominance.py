@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Decide which designs are the best ones, without comparing all pairs of designs."""
+
+from bisect import bisect_right
+
+_inf = float('inf')
+
+
+class _MinTree(object):
+    """Segment tree supporting point updates and minimum queries over prefixes."""
+
+    def __init__(self, values):
+        self.size = 1
+        while self.size < len(values):
+            self.size *= 2
+        self.tree = 2 * self.size * [_inf]
+        self.tree[self.size:self.size + len(values)] = values
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = min(self.tree[2*i], self.tree[2*i + 1])
+
+    def set(self, i, value):
+        i += self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = min(self.tree[2*i], self.tree[2*i + 1])
+            i //= 2
+
+    def prefix_min(self, k):
+        """Returns the minimum of the first k values."""
+        result = _inf
+        lo = self.size
+        hi = self.size + k
+        while lo < hi:
+            if lo & 1:
+                result = min(result, self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = min(result, self.tree[hi])
+            lo //= 2
+            hi //= 2
+        return result
+
+
+class _ProfileGroup(object):
+    """Designs sharing one preference profile, ordered by mass."""
+
+    def __init__(self, profile, designs):
+        self.profile = profile
+        self.designs = sorted(designs, key=lambda d: d.get_mass())
+        self.masses = [d.get_mass() for d in self.designs]
+        self.position = dict((id(d), i) for i, d in enumerate(self.designs))
+        self.costs = _MinTree([d.get_cost() if d.is_best else _inf for d in self.designs])
+
+
+def mark_best(designs, preferredsize=None, bestgimbal=0, prefergenerators=False, prefershortengines=False,
+              prefermonopropellant=True):
+    """Sets is_best to False for each design which is not better than another one.
+
+    Equivalent to comparing each design d (in given order) to all other designs e which are still
+    considered best, and setting d.is_best = False as soon as d.is_better_than(e) is False.
+
+    Designs are grouped by their Design.preference_profile(). Within each group, designs are sorted
+    by mass, and the cheapest remaining design not heavier than d is found by a prefix minimum
+    query. Only if it is not more expensive than d, the secondary criteria are compared, once for
+    each pair of groups. is_better_than() itself is only evaluated for designs of equal cost.
+    """
+    prefs = (preferredsize, bestgimbal, prefergenerators, prefershortengines, prefermonopropellant)
+    members = {}
+    profiles = [d.preference_profile() for d in designs]
+    for d, profile in zip(designs, profiles):
+        members.setdefault(profile, []).append(d)
+    groups = dict((profile, _ProfileGroup(profile, m)) for profile, m in members.items())
+    grouplist = list(groups.values())
+    # preferred[p, q]: whether designs of profile p are preferred to designs of profile q
+    preferred = {}
+    for d, profile in zip(designs, profiles):
+        if not d.is_best:
+            continue
+        own = groups[profile]
+        i = own.position[id(d)]
+        own.costs.set(i, _inf)
+        mass = d.get_mass()
+        cost = d.get_cost()
+        # own group first, as it most likely contains a better design
+        for g in [own] + grouplist:
+            if g.costs.tree[1] > cost:
+                continue
+            k = bisect_right(g.masses, mass)
+            cheapest = g.costs.prefix_min(k)
+            if cheapest > cost:
+                continue
+            key = (own.profile, g.profile)
+            if key not in preferred:
+                preferred[key] = d.is_preferred_to(g.designs[0], *prefs)
+            if preferred[key]:
+                continue
+            if cheapest < cost or any(e is not d and e.is_best and e.get_cost() == cost and
+                                      not d.is_better_than(e, *prefs) for e in g.designs[:k]):
+                d.is_best = False
+                break
+        else:
+            own.costs.set(i, cost)
+
+
+class ParetoArchive(object):
+    """Incrementally maintained set of best designs.
+
+    Designs are added one by one, e.g. as they are yielded by design.iter_designs(), and best()
+    returns the best ones of all designs added so far. A design is dropped as soon as another
+    design is at least as good by all criteria; of equally good designs, the one added last is
+    kept, as find_designs() does. Memory is bounded by the number of best designs.
+    """
+
+    def __init__(self, preferredsize=None, bestgimbal=0, prefergenerators=False, prefershortengines=False,
+                 prefermonopropellant=True):
+        self.prefs = (preferredsize, bestgimbal, prefergenerators, prefershortengines, prefermonopropellant)
+        self.designs = []
+        self.added = 0
+
+    def __len__(self):
+        return len(self.designs)
+
+    def add(self, design):
+        """Adds design, returns whether it is one of the best designs so far."""
+        self.added += 1
+        self.designs = [e for e in self.designs if e.is_better_than(design, *self.prefs)]
+        if any(not design.is_better_than(e, *self.prefs) for e in self.designs):
+            return False
+        self.designs.append(design)
+        return True
+
+    def best(self):
+        """Returns list of best designs added so far, in the order they were added."""
+        return list(self.designs)
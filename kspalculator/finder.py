@@ -1,11 +1,30 @@
 # -*- coding: utf-8 -*-
 
-from .design import find_designs
+import copy
+from collections import namedtuple
+
+from .catalog import BUILTIN
+from .design import AccelerationIndex, find_designs, iter_designs, rank_designs, sweep_designs, SearchSpace
+from .dominance import ParetoArchive
+from .staging import StagingSearch
+from .stats import timer
+from .tanks import OBJECTIVES
+
+PayloadSweep = namedtuple('PayloadSweep', ['payloads', 'designs', 'breakpoints'])
+"""Result of Finder.sweep_payload().
+
+payloads: list of payloads,
+designs: list of find() results for each payload,
+breakpoints: list of (payload, previous, current) tuples, where payload is the first payload at
+    which the first design, i.e. the lightest or cheapest one, uses another main engine than at the
+    preceding payload. previous and current are these first designs, or None if nothing was found.
+"""
 
 
 class Finder(object):
     def __init__(self, payload, preferred_radial_size, delta_vs, accelerations, pressures, sfb_allowed, gimbal,
-                 boosters, electricity, length, monopropellant):
+                 boosters, electricity, length, monopropellant, cache=None, catalog=None, researched=None,
+                 packing='mass', design_cache=None):
         """Initializes this finder.
 
         Args:
@@ -19,9 +38,19 @@ class Finder(object):
             boosters (boolean) - Whether or not to include solid boosters.
             electricity (boolean) - Whether or not to prefer engines that generate power.
             length (boolean) - Whether or not to prefer shorter engines.
+            monopropellant (boolean) - Whether or not to prefer engines using monopropellant.
+            cache (ResultCache) - Cache for results of find(), might be shared between finders.
+            catalog (Catalog) - Parts to build designs of, default: the built-in parts.
+            researched ([Node]) - If given, only use parts of these researched tech nodes.
+            packing (str) - Choose liquid fuel tanks for least 'mass' or least 'cost'.
+            design_cache (ResultCache) - Cache for feasible designs of a mission regardless of
+                preferences, might be shared between finders. If only preferences change, find()
+                then merely ranks the cached designs again.
         """
         if payload < 0.0:
             raise ValueError("Invalid payload")
+        if packing not in OBJECTIVES:
+            raise ValueError("Invalid packing")
         for i in range(len(delta_vs)):
             # because of Eve, we have to support up to 5 ATM
             if delta_vs[i] <= 0.0 or accelerations[i] < 0.0 or \
@@ -38,6 +67,46 @@ class Finder(object):
         self.electricity = electricity
         self.length = length
         self.monopropellant = monopropellant
+        self.cache = cache
+        self.design_cache = design_cache
+        if researched is not None:
+            catalog = (catalog if catalog is not None else BUILTIN).restrict(researched)
+        self.catalog = catalog
+        self.packing = packing
+
+    def signature(self):
+        """Returns canonical, hashable representation of mission and preferences.
+
+        Finders with equal signatures give equal results."""
+        signature = (float(self.payload),
+                self.preferred_radial_size,
+                tuple((float(self.delta_vs[i]), float(self.accelerations[i]), float(self.pressures[i]),
+                       bool(self.sfb_allowed[i])) for i in range(len(self.delta_vs))),
+                int(self.gimbal),
+                bool(self.boosters),
+                bool(self.electricity),
+                bool(self.length),
+                bool(self.monopropellant))
+        if self.catalog is not None:
+            signature += (self.catalog.digest(),)
+        if self.packing != 'mass':
+            signature += (self.packing,)
+        return signature
+
+    def mission_signature(self):
+        """Returns canonical, hashable representation of the mission without preferences.
+
+        Finders with equal mission signatures have the same feasible designs, only ranked
+        differently."""
+        signature = (float(self.payload),
+                tuple((float(self.delta_vs[i]), float(self.accelerations[i]), float(self.pressures[i]),
+                       bool(self.sfb_allowed[i])) for i in range(len(self.delta_vs))),
+                bool(self.boosters))
+        if self.catalog is not None:
+            signature += (self.catalog.digest(),)
+        if self.packing != 'mass':
+            signature += (self.packing,)
+        return signature
 
     def lint(self):
         """Check input values for common mistakes and return a list of warnings."""
@@ -78,7 +147,39 @@ class Finder(object):
 
         return warnings
 
-    def find(self, best_only=True, order_by_cost=False):
+    def find(self, best_only=True, order_by_cost=False, space=None, workers=None, stats=None):
+        """Returns designs fulfilling the requirements, ordered by mass or cost.
+
+        If workers is greater than 1, designs are created by that many processes in parallel. The
+        result does not depend on the number of workers.
+
+        If stats (a stats.Stats) is given, it is filled with counts of candidates, reasons for
+        rejecting them and timings. Results taken from the cache only count as cache hit.
+        """
+        if self.cache is not None:
+            key = (self.signature(), bool(best_only), bool(order_by_cost))
+            designs = self.cache.get(key)
+            if designs is None:
+                designs = tuple(self._find(best_only, order_by_cost, space, workers, stats))
+                self.cache.put(key, designs)
+            elif stats is not None:
+                stats.cache_hits += 1
+            return list(designs)
+        return self._find(best_only, order_by_cost, space, workers, stats)
+
+    def _find(self, best_only, order_by_cost, space, workers, stats=None):
+        key = self.mission_signature()
+        feasible = self.design_cache.get(key) if self.design_cache is not None else None
+        if feasible is not None:
+            if stats is not None:
+                stats.cache_hits += 1
+            # cached designs keep the ranking of the finder which created them
+            all_designs = [copy.copy(d) for d in feasible]
+            with timer(stats, 'ranking'):
+                rank_designs(all_designs, self.preferred_radial_size, self.gimbal, self.electricity, self.length,
+                             self.monopropellant)
+            return self._order(all_designs, best_only, order_by_cost)
+
         all_designs = find_designs(self.payload,
                                    self.pressures,
                                    self.delta_vs,
@@ -89,8 +190,19 @@ class Finder(object):
                                    self.boosters,
                                    self.electricity,
                                    self.length,
-                                   self.monopropellant)
+                                   self.monopropellant,
+                                   space,
+                                   workers,
+                                   stats,
+                                   self.catalog,
+                                   packing=self.packing)
+        if self.design_cache is not None:
+            self.design_cache.put(key, tuple(all_designs))
+
+        return self._order(all_designs, best_only, order_by_cost)
 
+    @staticmethod
+    def _order(all_designs, best_only, order_by_cost):
         if best_only:
             designs = [d for d in all_designs if d.is_best]
         else:
@@ -99,3 +211,108 @@ class Finder(object):
         if order_by_cost:
             return sorted(designs, key=lambda dsg: dsg.get_cost())
         return sorted(designs, key=lambda dsg: dsg.get_mass())
+
+    def sweep_payload(self, payloads, best_only=True, order_by_cost=False):
+        """Returns PayloadSweep with find() results for each of the given payloads.
+
+        The payload given to the constructor is ignored. This is much faster than calling find() for
+        each payload, as needed fuel of most designs is linear in the payload.
+        """
+        for payload in payloads:
+            if payload < 0.0:
+                raise ValueError("Invalid payload")
+        results = sweep_designs(payloads, self.pressures, self.delta_vs, self.accelerations, self.sfb_allowed,
+                                self.preferred_radial_size, self.gimbal, self.boosters, self.electricity,
+                                self.length, self.monopropellant, catalog=self.catalog, packing=self.packing)
+        results = [self._order(designs, best_only, order_by_cost) for designs in results]
+        breakpoints = []
+        for i in range(1, len(results)):
+            previous = results[i-1][0] if results[i-1] else None
+            current = results[i][0] if results[i] else None
+            if (previous and previous.mainengine) != (current and current.mainengine):
+                breakpoints.append((payloads[i], previous, current))
+        return PayloadSweep(list(payloads), results, breakpoints)
+
+    def sweep_acceleration(self, accelerations, best_only=True, order_by_cost=False):
+        """Returns list of find() results for each of the given lists of minimum accelerations.
+
+        The accelerations given to the constructor are ignored, except that variants needing SFB
+        thrust limits close to theirs are answered fastest. Designs are created once, see
+        design.AccelerationIndex, and for each variant only those fulfilling it are ranked.
+        """
+        for variant in accelerations:
+            if len(variant) != len(self.delta_vs) or min(variant) < 0.0:
+                raise ValueError("Invalid accelerations")
+        index = AccelerationIndex(self.payload, self.pressures, self.delta_vs, self.accelerations, self.sfb_allowed,
+                                  self.boosters, catalog=self.catalog, packing=self.packing)
+        results = []
+        for variant in accelerations:
+            designs = index.designs(variant)
+            rank_designs(designs, self.preferred_radial_size, self.gimbal, self.electricity, self.length,
+                         self.monopropellant)
+            results.append(self._order(designs, best_only, order_by_cost))
+        return results
+
+    def find_staging(self, max_stages, order_by_cost=False):
+        """Returns list of staging.StagedDesign, the best one for each number of stages up to
+        max_stages, ordered by mass or cost.
+
+        Flight phases are split into consecutive stages, where each stage carries the stages above
+        it as payload. Each stage is chosen among the best designs find() would return for it.
+        """
+        search = StagingSearch(self.payload, self.delta_vs, self.accelerations, self.pressures, self.sfb_allowed,
+                               self.preferred_radial_size, self.gimbal, self.boosters, self.electricity,
+                               self.length, self.monopropellant, catalog=self.catalog, packing=self.packing)
+        return search.find(max_stages, order_by_cost)
+
+    def iter_designs(self, space=None):
+        """Yields designs fulfilling the requirements as soon as they are created.
+
+        Designs are yielded in the order find(best_only=False) considers them, but unsorted and
+        not yet ranked. Feed them into archive() to obtain the best designs at any time."""
+        return iter_designs(self.payload, self.pressures, self.delta_vs, self.accelerations, self.sfb_allowed,
+                            self.boosters, space, catalog=self.catalog, packing=self.packing)
+
+    def archive(self):
+        """Returns empty ParetoArchive using the preferences of this finder."""
+        return ParetoArchive(self.preferred_radial_size, self.gimbal, self.electricity, self.length,
+                             self.monopropellant)
+
+    @staticmethod
+    def find_many(finders, best_only=True, order_by_cost=False):
+        """Returns list of find() results for each of the given finders.
+
+        Results are identical to calling find() on each of them, but the work which does not depend
+        on the mission (candidate enumeration, engine and SFB performance at given pressures) is
+        done only once for all finders with equal pressures and boosters setting. Finders without
+        caches which differ only in payload are answered together like by sweep_payload(), so
+        needed fuel of non-SFB designs is solved once for all of them.
+        """
+        spaces = {}
+        groups = []
+        by_mission = {}
+        for i, finder in enumerate(finders):
+            key = (tuple(finder.pressures), bool(finder.boosters), finder.catalog, finder.packing)
+            if key not in spaces:
+                spaces[key] = SearchSpace(finder.pressures, finder.boosters, finder.catalog, finder.packing)
+            if finder.cache is not None or finder.design_cache is not None:
+                groups.append((spaces[key], [i]))
+                continue
+            signature = finder.signature()[1:]
+            if signature not in by_mission:
+                by_mission[signature] = (spaces[key], [])
+                groups.append(by_mission[signature])
+            by_mission[signature][1].append(i)
+        results = len(finders) * [None]
+        for space, indices in groups:
+            finder = finders[indices[0]]
+            if len(indices) == 1:
+                results[indices[0]] = finder.find(best_only, order_by_cost, space)
+                continue
+            designs = sweep_designs([finders[i].payload for i in indices], finder.pressures, finder.delta_vs,
+                                    finder.accelerations, finder.sfb_allowed, finder.preferred_radial_size,
+                                    finder.gimbal, finder.boosters, finder.electricity, finder.length,
+                                    finder.monopropellant, space, catalog=finder.catalog, packing=finder.packing)
+            for i, found in zip(indices, designs):
+                results[i] = finder._order(found, best_only, order_by_cost)  # pylint: disable=protected-access
+        return results
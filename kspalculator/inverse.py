@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""Maximum payload which a given design is able to carry on a given mission."""
+
+from collections import namedtuple
+
+from . import parts
+from . import physics
+from .design import Candidate, SearchSpace, create_lf_design, create_sfb_design, _f_e
+from .stats import Stats
+
+MaxPayload = namedtuple('MaxPayload', ['payload', 'design', 'evaluations'])
+"""Result of max_payload().
+
+payload: maximum payload in kg, None if the design is not feasible for any payload, or infinity if
+    it is feasible for all payloads. The latter is only found if no acceleration is required; for
+    SFB designs, it is concluded from the design being feasible at a payload of 1e9 kg, at which
+    SFBs hardly add delta v, so that only the liquid fuel engines decide.
+design: Design at that payload, None unless payload is finite,
+evaluations: number of designs created to determine the result.
+"""
+
+
+class _Evaluator(object):
+    def __init__(self, candidate, mission, space):
+        self.c = candidate
+        self.m = mission
+        self.space = space
+        self.evaluations = 0
+
+    def __call__(self, payload, acc=None, stats=None):
+        """Returns design at payload, or None if it is not feasible."""
+        self.evaluations += 1
+        c = self.c
+        m = self.m
+        if acc is None:
+            acc = m.accelerations
+        if c.sfb is None:
+            return create_lf_design(payload, m.pressures, m.delta_vs, acc, c.eng, c.size, c.count,
+                                    c.fueltype, c.tank, self.space, stats)
+        return create_sfb_design(payload, m.pressures, m.delta_vs, acc, m.sfb_allowed, c.eng,
+                                 c.eng_F_percentage, c.size, c.count, c.sfb, c.sfbcount, self.space, stats)
+
+    def too_heavy(self, payload):
+        """Returns design at payload, or None, and whether it is not feasible for another reason than
+        SFBs burning in phases where they are not allowed."""
+        stats = Stats()
+        d = self(payload, stats=stats)
+        return d, d is None and stats.rejected['sfb_phase'] == 0
+
+    def bisect(self, lo, d_lo, hi, precision):
+        """Returns maximum feasible payload in [lo, hi), given lo is feasible and hi is not."""
+        while hi - lo > precision:
+            mid = (lo + hi) / 2
+            d = self(mid)
+            if d is None:
+                hi = mid
+            else:
+                lo, d_lo = mid, d
+        return MaxPayload(lo, d_lo, self.evaluations)
+
+
+def _max_payload_lf(f, precision):
+    c = f.c
+    m = f.m
+    isp = f.space.isp(c.eng)
+    f_e = _f_e(c.fueltype, c.tank)
+    ratio = physics.lf_fuel_ratio(m.delta_vs, isp, f_e)
+    if ratio < 0:
+        return MaxPayload(None, None, 0)
+    m_max = physics.lf_max_start_mass(m.delta_vs, isp, f.space.force(c.count, c.eng), m.accelerations)
+    if m_max == float('inf'):
+        return MaxPayload(m_max, None, 0)
+    # Start mass is m_p + (1+f_e)*m_c, and m_c is linear in m_p (see lf_needed_fuel()). Fuel tanks
+    # only add mass, so this is an upper bound of the payload.
+    hi = m_max / (1 + (1 + f_e) / f_e * ratio) - c.count * c.eng.m
+    if hi < 0:
+        return MaxPayload(None, None, 0)
+    d = f(hi, len(m.accelerations) * [0.0])
+    if d is not None and d.has_enough_acceleration(m.accelerations):
+        return MaxPayload(hi, d, f.evaluations)
+    # Newton step: reducing the payload by the excess start mass reduces the start mass at least
+    # by that amount, so the resulting design is feasible.
+    lo = max(0.0, hi - (d.performance[4][0] - m_max)) if d is not None else 0.0
+    d_lo = f(lo)
+    if d_lo is None:
+        return MaxPayload(None, None, f.evaluations)
+    return f.bisect(lo, d_lo, hi, precision)
+
+
+def _max_payload_sfb(f, precision):
+    c = f.c
+    m = f.m
+    # Mass never falls below payload, so thrust and required acceleration of each phase limit it.
+    hi = float('inf')
+    force = f.space.force(c.count, c.eng)
+    sfbforce = f.space.force(c.sfbcount, c.sfb)
+    for i in range(len(m.delta_vs)):
+        if m.accelerations[i] > 0:
+            hi = min(hi, (force[i] + sfbforce[i]) / m.accelerations[i] - c.count * c.eng.m)
+    if hi < 0:
+        return MaxPayload(None, None, 0)
+    if hi == float('inf'):
+        # only needed fuel limits the payload, and SFBs hardly matter at huge payloads
+        hi = 1e9
+        if f(hi) is not None:
+            return MaxPayload(float('inf'), None, f.evaluations)
+    # Feasible payloads do not form an interval: SFBs might be too strong for small payloads, and
+    # thrust limits and fuel tanks lead to gaps. Only acceleration and needed fuel reject all
+    # payloads above some top, so bisect for it, and then scan payloads below it for the highest
+    # feasible one.
+    d, heavy = f.too_heavy(0.0)
+    if heavy:
+        return MaxPayload(None, None, f.evaluations)
+    lo, d_lo = 0.0, d
+    while hi - lo > max(precision, lo / 64):
+        mid = (lo + hi) / 2
+        d, heavy = f.too_heavy(mid)
+        if heavy:
+            hi = mid
+        else:
+            lo, d_lo = mid, d
+    step = max(precision, lo / 64)
+    while d_lo is None and lo > 0.0:
+        hi = lo
+        lo = max(0.0, lo - step)
+        d_lo = f(lo)
+    if d_lo is None:
+        return MaxPayload(None, None, f.evaluations)
+    return f.bisect(lo, d_lo, hi, precision)
+
+
+def max_payload_of_candidate(candidate, mission, precision=1.0, space=None):
+    """Returns MaxPayload for given design.Candidate and mission.
+
+    :param mission: Finder describing the mission, its payload and preferences are ignored
+    :param precision: precision of the result in kg
+    :param space: design.SearchSpace for the pressures of the mission
+    """
+    if space is None:
+        space = SearchSpace(mission.pressures, mission.boosters, mission.catalog, mission.packing)
+    f = _Evaluator(candidate, mission, space)
+    if candidate.sfb is None:
+        return _max_payload_lf(f, precision)
+    return _max_payload_sfb(f, precision)
+
+
+def max_payload(eng, count, fueltype, tank, mission, sfb=None, sfbcount=0, eng_F_percentage=None, size=None,
+                precision=1.0):
+    """Returns MaxPayload of given engine(s), fuel type and tank on given mission.
+
+    Solves for the payload at which needed fuel or the required acceleration make the design
+    infeasible, instead of searching through the designs for many payloads. tank is only needed for
+    monopropellant and xenon. Tanks of radially mounted engines are Tiny unless size is given. If
+    sfb is given, SFBs are added as in find_designs().
+
+    :type eng: parts.Engine
+    :type fueltype: parts.FuelTypes
+    :type tank: parts.SpecialFuelTank
+    :param mission: Finder describing the mission, its payload and preferences are ignored
+    """
+    if size is None:
+        size = eng.size if tank is None else tank.size
+        if size is parts.RadialSize.RadiallyMounted and fueltype is not parts.FuelTypes.Monopropellant:
+            size = parts.RadialSize.Tiny
+    return max_payload_of_candidate(Candidate(eng, size, count, fueltype, tank, sfb, sfbcount, eng_F_percentage),
+                                    mission, precision)
+
+
+def max_payloads(mission, precision=1.0):
+    """Returns list of (Candidate, MaxPayload) for all candidates considered by find_designs()."""
+    space = SearchSpace(mission.pressures, mission.boosters, mission.catalog, mission.packing)
+    return [(c, max_payload_of_candidate(c, mission, precision, space))
+            for first_only, group in space.groups for c in group]
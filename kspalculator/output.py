@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""Machine-readable output of designs.
+
+Each design is converted to a record by design_record(), with these keys:
+
+title, mainengine, mainenginecount, size, fueltype, sfb, sfbcount, eng_F_percentage, payload, mass,
+cost, fuelunits, fueltankmass: as shown by Design.__str__, names of enums and parts as strings,
+tanks: list of {count, name},
+requires: names of required tech tree nodes, in tech tree order,
+features: names of design.Features the design is best by, sorted,
+notes: list of strings,
+is_best: whether the design is one of the best designs,
+phases: list of {dv, pressure, a_start, a_end, m_start, m_end, solid, phase} for each phase of
+    Design.performance, where phase is the index of the flight phase given by the user.
+
+Writers write records one by one to a text stream, so that output starts before all records are
+converted.
+"""
+
+import csv
+import json
+from collections import OrderedDict
+
+
+def design_record(d):
+    """Returns OrderedDict describing given design.Design."""
+    fueltankmass = d.get_fueltankmass()
+    dv, p, a_s, a_t, m_s, m_t, solid, op = d.performance
+    return OrderedDict([
+        ('title', d.get_title()),
+        ('mainengine', d.mainengine.name),
+        ('mainenginecount', d.mainenginecount),
+        ('size', d.size.name),
+        ('fueltype', d.fueltype.name),
+        ('sfb', d.sfb.name if d.sfb is not None else None),
+        ('sfbcount', d.sfbcount),
+        ('eng_F_percentage', d.eng_F_percentage),
+        ('payload', d.payload),
+        ('mass', d.get_mass()),
+        ('cost', d.get_cost()),
+        ('fuelunits', fueltankmass / (d.get_f_e() + 1) / d.fueltype.unitmass),
+        ('fueltankmass', fueltankmass),
+        ('tanks', [OrderedDict([('count', count), ('name', tank.name)]) for count, tank in d.fueltanks]),
+        ('requires', [n.name for n in sorted(d.requiredscience.nodes, key=lambda n: n.value)]),
+        ('features', sorted(f.name for f in d.features)),
+        ('notes', d.notes),
+        ('is_best', d.is_best),
+        ('phases', [OrderedDict([('dv', dv[i]), ('pressure', p[i]), ('a_start', a_s[i]), ('a_end', a_t[i]),
+                                 ('m_start', m_s[i]), ('m_end', m_t[i]), ('solid', solid[i]),
+                                 ('phase', op[i])])
+                    for i in range(len(dv))]),
+    ])
+
+
+def write_json(designs, out):
+    """Writes designs as one JSON array, one design per line."""
+    out.write('[')
+    first = True
+    for d in designs:
+        out.write('\n' if first else ',\n')
+        json.dump(design_record(d), out)
+        first = False
+    out.write('\n]\n' if not first else ']\n')
+
+
+def write_jsonl(designs, out):
+    """Writes designs as JSON Lines, i.e. one JSON object per line."""
+    for d in designs:
+        json.dump(design_record(d), out)
+        out.write('\n')
+
+
+CSV_COLUMNS = ['design', 'title', 'mainengine', 'mainenginecount', 'size', 'fueltype', 'sfb', 'sfbcount',
+               'eng_F_percentage', 'payload', 'mass', 'cost', 'fuelunits', 'fueltankmass', 'tanks', 'requires',
+               'features', 'notes', 'is_best', 'dv', 'pressure', 'a_start', 'a_end', 'm_start', 'm_end', 'solid',
+               'phase']
+
+
+def write_csv(designs, out):
+    """Writes designs as CSV with a header row, one row per phase of each design.
+
+    design is the index of the design in designs, the other columns are the keys of design_record()
+    and of its phases. Lists are joined by '; ', tanks written as 'count * name'.
+    """
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(CSV_COLUMNS)
+    for i, d in enumerate(designs):
+        r = design_record(d)
+        r['design'] = i
+        r['tanks'] = '; '.join('%i * %s' % (t['count'], t['name']) for t in r['tanks'])
+        for key in ['requires', 'features', 'notes']:
+            r[key] = '; '.join(r[key])
+        for phase in r.pop('phases'):
+            r.update(phase)
+            writer.writerow([r[c] for c in CSV_COLUMNS])
+
+
+FORMATS = OrderedDict([('json', write_json), ('jsonl', write_jsonl), ('csv', write_csv)])
+"""Writers by name of output format."""
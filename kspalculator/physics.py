@@ -42,6 +42,11 @@ from math import log, exp, fsum
 # only used for I_sp conversion
 g_0 = 9.80665
 
+def _exp(x):
+    # exp() without OverflowError for the huge exponents of engines with tiny specific impulse,
+    # which make the design infeasible
+    return exp(x) if x < 700 else float('inf')
+
 # some formulations of the rocket equation
 def g_m_t(m_s, dv, I_sp):
     return m_s * exp(-dv/(I_sp*g_0))
@@ -53,11 +58,29 @@ def dv_l(Isp, m_s, m_t, m_p, m_c):
     return g_0 * Isp * log((m_p + 1/8*m_c + m_s) / (m_p + 1/8*m_c + m_t))
 
 def lf_needed_fuel(dv, I_sp, m_p, f_e):
-    m_c = m_p/f_e * ((1/f_e) / (1+(1/f_e)-exp(1/g_0*fsum([dv[i]/I_sp[i] for i in range(len(dv))]))) - 1)
+    m_c = m_p/f_e * ((1/f_e) / (1+(1/f_e)-_exp(1/g_0*fsum([dv[i]/I_sp[i] for i in range(len(dv))]))) - 1)
     if m_c < 0:
         return None
     return m_c
 
+def lf_fuel_ratio(dv, I_sp, f_e):
+    # lf_needed_fuel() is linear in m_p: it equals m_p/f_e * lf_fuel_ratio(), if that is not negative
+    return (1/f_e) / (1+(1/f_e)-_exp(1/g_0*fsum([dv[i]/I_sp[i] for i in range(len(dv))]))) - 1
+
+def lf_max_start_mass(dv, I_sp, F, a):
+    # Maximum total start mass, such that lf_performance() yields an acceleration of at least a[op]
+    # at start of each phase. Returns infinity if no acceleration is required.
+    n = len(dv)
+    m_max = float('inf')
+    m_rel = 1.0     # mass at start of phase relative to start mass
+    for i in range(n+1):
+        k = i if i != n else i-1
+        if a[k] > 0:
+            m_max = min(m_max, F[k] / a[k] / m_rel)
+        if i != n:
+            m_rel *= exp(-dv[i]/(I_sp[i]*g_0))
+    return m_max
+
 def lf_performance(dv, I_sp, F, p, m_p, m_c, f_e):
     n = len(dv)
     r_m_s = [m_p + f_e*m_c + m_c] + n*[None]
@@ -72,61 +95,221 @@ def lf_performance(dv, I_sp, F, p, m_p, m_c, f_e):
     r_op = list(range(n)) + [n-1]
     return r_dv, r_p, r_a_s, r_a_t, r_m_s, r_m_t, r_solid, r_op
 
-def sflf_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t):
-    def s(Isp, m_s, m_t, m_c):
-        return dv_s(Isp, m_s, m_t, m_p, m_x, m_c)
-    n = len(dv)-1
-    f_limits = (n+1) * [None]
-    def mc_solid(i):
-        return ((sm_s-sm_t)/(exp(fsum([dv[k]/I_sps[k] for k in range(0,i+1)])/g_0)-1)-m_p-sm_t-m_x)*8/9
-    for i in range(n+1):
-        f_limits[i] = mc_solid(i)
-        if f_limits[i] < 0:
-            f_limits[i+1 : n+1] = (n-i) * [-1]
-            break
-    else:
-        # SFBs are too strong
-        return None
-    def f_adjust(mc, d):
-        if d<=0:
-            for i in range(0 if d==0 else f,n+1):
-                if f_limits[i] < mc:
-                    return i
-        else:
-            for i in range(f-1,-1,-1):
-                if f_limits[i] >= mc:
-                    return i+1
-            return 0
-    f = f_adjust(0,0)
-    precision = 0.001
-    def mc_improve(mc_old):
-        m_f = exp(-fsum([dv[k]/I_sps[k] for k in range(0,f)])/g_0)
-        m_f = sm_s*m_f+(m_f-1)*(m_p+9/8*mc_old+m_x)
-        return lf_needed_fuel([dv[f]-s(I_sps[f],m_f,sm_t,mc_old)]+dv[f+1:n+1], I_spl[f:n+1], m_p, 1/8)
-    m_c = 2 * [None]
-    current = 1
-    m_c[0] = mc_improve(0)
-    if m_c[0] is None:
-        return None
-    f = f_adjust(m_c[0],1)
-    while True:
-        m_c[current] = mc_improve(m_c[(current+1)%2])
-        if m_c[current] is None:
-            return None
-        if m_c[current] - m_c[(current+1)%2] < precision:
-            return m_c[current]
-        f = f_adjust(m_c[current],1)
-        current = (current+1)%2
+# *_batch() functions evaluate the corresponding function for many designs at once. Arguments
+# which differ between designs are given as lists with one element per design, results are
+# returned as such lists. Intermediate values which only depend on I_sp are computed once per
+# distinct I_sp array, and results are exactly equal to those of the scalar functions.
+
+def _isp_key(I_sp):
+    return tuple(I_sp)
 
-def sflf_concurrent_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, lpsr):
+def lf_needed_fuel_batch(dv, I_sp, m_p, f_e):
+    # I_sp, m_p, f_e: one element per design
+    exponents = {}
+    r_m_c = len(m_p) * [None]
+    for j in range(len(m_p)):
+        key = _isp_key(I_sp[j])
+        try:
+            e = exponents[key]
+        except KeyError:
+            e = exponents[key] = _exp(1/g_0*fsum([dv[i]/I_sp[j][i] for i in range(len(dv))]))
+        m_c = m_p[j]/f_e[j] * ((1/f_e[j]) / (1+(1/f_e[j])-e) - 1)
+        if m_c >= 0:
+            r_m_c[j] = m_c
+    return r_m_c
+
+def lf_performance_batch(dv, I_sp, F, p, m_p, m_c, f_e):
+    # I_sp, F, m_p, m_c, f_e: one element per design
+    n = len(dv)
+    r_p = p + [p[n-1]]
+    r_op = list(range(n)) + [n-1]
+    factors = {}
+    results = len(m_p) * [None]
+    for j in range(len(m_p)):
+        key = _isp_key(I_sp[j])
+        try:
+            factor = factors[key]
+        except KeyError:
+            factor = factors[key] = [exp(-dv[i]/(I_sp[j][i]*g_0)) for i in range(n)]
+        r_m_s = [m_p[j] + f_e[j]*m_c[j] + m_c[j]] + n*[None]
+        for i in range(1,n+1):
+            r_m_s[i] = r_m_s[i-1] * factor[i-1]
+        r_m_t = r_m_s[1:] + [m_p[j] + f_e[j]*m_c[j]]
+        r_dv = dv + [g_dv(r_m_s[n], r_m_t[n], I_sp[j][n-1])]
+        Fj = F[j]
+        r_a_s = [Fj[i if i != n else i-1] / r_m_s[i] for i in range(n+1)]
+        r_a_t = [Fj[i if i != n else i-1] / r_m_t[i] for i in range(n+1)]
+        results[j] = (r_dv, list(r_p), r_a_s, r_a_t, r_m_s, r_m_t, (n+1)*[False], list(r_op))
+    return results
+
+def sflf_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, precision=0.001, iterations=None):
+    # iterations: if given, list to which 1 is appended for each evaluated guess, as in
+    # sflf_needed_fuel_batch()
+    return sflf_needed_fuel_batch(dv, [I_spl], [I_sps], [m_p], [m_x], [sm_s], [sm_t], precision, iterations)[0]
+
+def sflf_concurrent_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, lpsr, iterations=None):
     # lpsr: liquid-per-solid-ratio = Fl * I_sps / Fs / I_spl
     # I_sph: Specific impulse of the combined engine when liquid and solid fuel burns simultaneously
     I_sph = [(I_spl[k] * lpsr + I_sps[k]) / (1 + lpsr) for k in range(len(I_sps))]
+    if min(I_sph) <= 0:
+        # liquid fuel engines with negative specific impulse at high pressure
+        return None
     mc_extra = (sm_s - sm_t) * lpsr
-    fuel = sflf_needed_fuel(dv, I_spl, I_sph, m_p + mc_extra * 1/8, m_x, sm_s + mc_extra, sm_t)
+    fuel = sflf_needed_fuel(dv, I_spl, I_sph, m_p + mc_extra * 1/8, m_x, sm_s + mc_extra, sm_t,
+                            iterations=iterations)
     if fuel is not None:
         return mc_extra + fuel
 
+def _burnout_phase(limits, m_c):
+    # Phase in which SFBs burn out if m_c liquid fuel is carried: the first one whose limit of
+    # liquid fuel is exceeded. Limits are decreasing, and the last one is negative.
+    for i in range(len(limits)):
+        if limits[i] < m_c:
+            return i
+
+def _next_fuel_guess(lo, r_lo, p, r_p, hi, top, pole):
+    # Next guess of sflf_needed_fuel_batch() and whether it is a fixed-point step, given guess lo
+    # below the needed fuel, the previous guess p, guess hi above the needed fuel, if known, and
+    # the lowest guess pole for which g is infeasible, if any. Guesses are at most top, the most
+    # liquid fuel with the same phase of SFB burnout as lo.
+    step = lo + r_lo
+    if hi is not None and step >= hi:
+        # only if g is not increasing, as for negative specific impulse at high pressure
+        return (lo + hi) / 2, False
+    if p is None or r_p == r_lo or (pole is not None and step >= pole):
+        return step, True
+    m_c = lo - r_lo * (lo - p) / (r_lo - r_p)
+    if hi is not None and not lo < m_c < hi:
+        m_c = (lo + hi) / 2
+    m_c = min(m_c, top)
+    if pole is not None and m_c >= pole:
+        m_c = (step + pole) / 2
+    # the needed fuel is not below a fixed-point step
+    return (m_c, False) if m_c > step else (step, True)
+
+def _phase_sums(dv, I_spl, I_sps):
+    # sums over phases of sflf_needed_fuel_batch() for one pair of I_spl and I_sps arrays:
+    # cs[i] = exp(sum(dv[k]/I_sps[k] for k <= i)/g_0) - 1, prefix and tail as there
+    n = len(dv)-1
+    cs = [fsum([dv[k]/I_sps[k] for k in range(0,i+1)]) for i in range(n+1)]
+    prefix = [1.0] + [exp(-cs[i]/g_0) for i in range(n)]
+    tail = [fsum([dv[k]/I_spl[k] for k in range(i+1,n+1)]) for i in range(n+1)]
+    return [_exp(c/g_0)-1 for c in cs], prefix, tail
+
+def _burnout_limits(cs, m_p, m_x, sm_s, sm_t):
+    # most liquid fuel per phase for which SFBs burn out after it, or None if they never do
+    n = len(cs)-1
+    limits = [((sm_s-sm_t)/cs[i]-m_p-sm_t-m_x)*8/9 for i in range(n+1)]
+    for i in range(n+1):
+        if limits[i] < 0:
+            limits[i+1 : n+1] = (n-i) * [-1]
+            return limits
+    # SFBs are too strong
+    return None
+
+def _sflf_g(dv, I_spl, I_sps, prefix, tail, limits, m_p, m_x, sm_s, sm_t, m_c):
+    # g(m_c) of sflf_needed_fuel_batch() for one design, negative if infeasible, and the phase
+    # of SFB burnout
+    f = _burnout_phase(limits, m_c)
+    m_ref = m_p + 9/8*m_c + m_x
+    m_f = sm_s*prefix[f]+(prefix[f]-1)*m_ref
+    dv_f = dv[f] - g_0 * I_sps[f] * log((m_ref + m_f) / (m_ref + sm_t))
+    e = _exp(1/g_0*(dv_f/I_spl[f] + tail[f]))
+    return m_p*8 * (8 / (9-e) - 1), f
+
+def _bracket_fuel(s, m_c, g, fixed, limits, f):
+    # state s of sflf_needed_fuel_batch() updated by guess m_c with g(m_c) = g and phase f of
+    # SFB burnout, or None if the design is infeasible
+    if g < 0:
+        if fixed or s[4] is not None:
+            # infeasible, or g is not increasing as it is infeasible within the bracket
+            return None
+        s[6] = m_c
+    elif g <= m_c:
+        s[2:5] = [m_c, g - m_c, m_c]
+    else:
+        top = limits[f-1] if f > 0 else float('inf')
+        if s is None:
+            return [m_c, g - m_c, None, None, None, top, None]
+        s[:] = [m_c, g - m_c, s[0], s[1], s[4], top, s[6]]
+    return s
+
+def sflf_needed_fuel_batch(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, precision=0.001, iterations=None):
+    # I_spl, I_sps, m_p, m_x, sm_s, sm_t: one element per design
+    # iterations: if given, list to which the number of designs iterated in each round is appended
+    #
+    # Needed fuel m_c is the least fixed point of g(m_c), the liquid fuel needed if m_c is carried,
+    # as the SFBs lift it. g is increasing, hence for the residual r(m_c) = g(m_c) - m_c:
+    #  - fixed-point steps m_c := g(m_c) from 0 never pass the needed fuel, but converge slowly,
+    #  - any guess with r <= 0 is not below the needed fuel,
+    #  - g is feasible below some pole, where it grows beyond any bound. If a fixed-point step
+    #    reaches it, there is no needed fuel.
+    # So guesses are secant steps of r, but at least fixed-point steps. Once a guess has r <= 0,
+    # the needed fuel is bracketed, and secant steps leaving the bracket are replaced by
+    # bisection. Guesses for which g is infeasible only tell that the pole is below them, so
+    # further guesses stay below those. As r has kinks where the phase of SFB burnout changes, a
+    # secant step does not go beyond the phase of burnout of the last guess below the needed fuel.
+    # A design is solved once |r| is less than precision, or the bracket is narrower than it, and
+    # infeasible if g is infeasible for a fixed-point step.
+    #
+    # All designs are solved in lockstep, masking out solved and infeasible ones from further
+    # rounds. The sums over phases are computed once per distinct pair of I_spl and I_sps arrays.
+    lanes = len(m_p)
+    r_m_c = lanes * [None]
+    sums = {}
+    # per-lane state
+    f_limits = lanes * [None]
+    prefix = lanes * [None]     # prefix[j][f]: exp(-sum(dv[k]/I_sps[k] for k < f)/g_0)
+    tail = lanes * [None]       # tail[j][f]: sum(dv[k]/I_spl[k] for k > f)
+    state = lanes * [None]      # arguments of _next_fuel_guess()
+    guess = lanes * [(0.0, True)]
+    active = []
+    for j in range(lanes):
+        key = (_isp_key(I_spl[j]), _isp_key(I_sps[j]))
+        if key not in sums:
+            sums[key] = _phase_sums(dv, I_spl[j], I_sps[j])
+        cs, prefix[j], tail[j] = sums[key]
+        f_limits[j] = _burnout_limits(cs, m_p[j], m_x[j], sm_s[j], sm_t[j])
+        if f_limits[j] is not None:
+            active.append(j)
+    while active:
+        if iterations is not None:
+            iterations.append(len(active))
+        still_active = []
+        for j in active:
+            mc, fixed = guess[j]
+            mc_new, fj = _sflf_g(dv, I_spl[j], I_sps[j], prefix[j], tail[j], f_limits[j],
+                                 m_p[j], m_x[j], sm_s[j], sm_t[j], mc)
+            if 0 <= mc_new and abs(mc_new - mc) < precision:
+                r_m_c[j] = mc_new
+                continue
+            s = state[j] = _bracket_fuel(state[j], mc, mc_new, fixed, f_limits[j], fj)
+            if s is None:
+                continue
+            if s[4] is not None and s[4] - s[0] < precision:
+                r_m_c[j] = s[0] + s[1]
+                continue
+            guess[j] = _next_fuel_guess(*s)
+            still_active.append(j)
+        active = still_active
+    return r_m_c
+
+def sflf_concurrent_needed_fuel_batch(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, lpsr, iterations=None):
+    # I_spl, I_sps, m_p, m_x, sm_s, sm_t, lpsr: one element per design
+    I_sph = [[(I_spl[j][k] * lpsr[j] + I_sps[j][k]) / (1 + lpsr[j]) for k in range(len(I_sps[j]))]
+             for j in range(len(m_p))]
+    mc_extra = [(sm_s[j] - sm_t[j]) * lpsr[j] for j in range(len(m_p))]
+    # as in sflf_concurrent_needed_fuel(), designs without positive specific impulse are infeasible
+    valid = [j for j in range(len(m_p)) if min(I_sph[j]) > 0]
+    fuel = len(m_p) * [None]
+    solved = sflf_needed_fuel_batch(dv, [I_spl[j] for j in valid], [I_sph[j] for j in valid],
+                                    [m_p[j] + mc_extra[j] * 1/8 for j in valid], [m_x[j] for j in valid],
+                                    [sm_s[j] + mc_extra[j] for j in valid], [sm_t[j] for j in valid],
+                                    iterations=iterations)
+    for j, f in zip(valid, solved):
+        fuel[j] = f
+    return [mc_extra[j] + fuel[j] if fuel[j] is not None else None for j in range(len(m_p))]
+
 def sflf_performance(dv, I_spl, I_sps, Fl, Fs, p, m_p, m_c, m_x, sm_s, sm_t):
     n = len(dv)
     r_m_t = (n+2)*[None]
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""Interactive session for tuning a mission, started by `kspalculator repl`.
+
+The mission is given like on the command line, e.g. `kspalculator repl 6370 905:13:1 3650:13:0.18
+-b`, and then edited by commands (type help for a list) and re-evaluated by `run`. The process
+stays warm between evaluations:
+
+- candidates and engine performance at the mission's pressures are kept, so editing delta v,
+  acceleration or payload does not enumerate candidates again,
+- feasible designs are kept for recently evaluated missions (payload, phases and boosters) in the
+  design cache of Finder, so if only preferences (radius, gimbal, electricity, length,
+  monopropellant, cheapest) change, or a mission is evaluated again, the designs are merely ranked
+  again.
+"""
+
+import cmd
+import shlex
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from timeit import default_timer
+
+from .cache import ResultCache
+from .catalog import BUILTIN
+from .cli import dvtuple, nonnegative_float, parts_option, technodes, to_boolean
+from .design import SearchSpace
+from .finder import Finder
+from .parts import RadialSize
+from .tanks import OBJECTIVES
+
+RADIAL_SIZES = {'none': None, 'tiny': RadialSize.Tiny, 'small': RadialSize.Small, 'large': RadialSize.Large,
+                'extralarge': RadialSize.ExtraLarge}
+
+FLAGS = ['boosters', 'electricity', 'length', 'monopropellant', 'cheapest']
+
+
+def parse_phase(string):
+    """Returns (dv, acceleration, pressure, sfb_allowed) of a dv tuple as given on the command line."""
+    s = dvtuple(string).split(':')
+    return (float(s[0]), float(s[1]) if len(s) > 1 else 0.0, float(s[2]) if len(s) > 2 else 0.0,
+            to_boolean(s[3]) if len(s) > 3 else True)
+
+
+class Session(object):
+    """Mission being edited, and results reused between its evaluations.
+
+    :param catalog: parts to build designs of, default: the built-in parts
+    :param researched: if given, only use parts of these researched tech nodes
+    :param packing: choose liquid fuel tanks for least 'mass' or least 'cost'
+    :param cache_size: number of missions whose designs are kept
+    """
+
+    def __init__(self, catalog=None, researched=None, packing='mass', cache_size=16):
+        if packing not in OBJECTIVES:
+            raise ValueError("Invalid packing")
+        if researched is not None:
+            catalog = (catalog if catalog is not None else BUILTIN).restrict(researched)
+        self.catalog = catalog
+        self.packing = packing
+        self.payload = 0.0
+        self.phases = []        # (dv, acceleration, pressure, sfb_allowed) of each phase
+        self.preferred_size = None
+        self.gimbal = 0
+        self.boosters = False
+        self.electricity = False
+        self.length = False
+        self.monopropellant = False
+        self.cheapest = False
+        self.evaluations = 0    # number of missions whose designs were created
+        self._designs = ResultCache(cache_size)
+        self._spaces = ResultCache(cache_size)
+
+    def finder(self):
+        """Returns Finder for the current mission and preferences, raises ValueError if invalid."""
+        if not self.phases:
+            raise ValueError("No flight phases given")
+        dv, ac, pr, sa = [list(values) for values in zip(*self.phases)]
+        return Finder(self.payload, self.preferred_size, dv, ac, pr, sa, self.gimbal, self.boosters,
+                      self.electricity, self.length, self.monopropellant, catalog=self.catalog,
+                      packing=self.packing, design_cache=self._designs)
+
+    def designs(self):
+        """Returns best designs for the current mission, ordered by mass or cost.
+
+        Raises ValueError if the mission is invalid.
+        """
+        finder = self.finder()
+        spacekey = (tuple(finder.pressures), bool(self.boosters))
+        space = self._spaces.get(spacekey)
+        if space is None:
+            space = SearchSpace(finder.pressures, self.boosters, self.catalog, self.packing)
+            self._spaces.put(spacekey, space)
+        misses = self._designs.misses
+        designs = finder.find(True, self.cheapest, space)
+        self.evaluations += self._designs.misses - misses
+        return designs
+
+    def set(self, name, value):
+        """Sets preference or flag name (radius, gimbal or one of FLAGS) to value given as string."""
+        if name == 'radius':
+            if value.lower() not in RADIAL_SIZES:
+                raise ValueError("radius must be one of %s" % ", ".join(sorted(RADIAL_SIZES)))
+            self.preferred_size = RADIAL_SIZES[value.lower()]
+        elif name == 'gimbal':
+            if value not in ['0', '1', '2']:
+                raise ValueError("gimbal must be 0, 1 or 2")
+            self.gimbal = int(value)
+        elif name in FLAGS:
+            setattr(self, name, to_boolean(value))
+        else:
+            raise ValueError("Unknown setting %r" % name)
+
+
+class Shell(cmd.Cmd):
+    """Command interpreter editing and evaluating a Session."""
+
+    intro = "Edit the mission and type run to find designs. Type help for a list of commands."
+    prompt = "kspalculator> "
+
+    def __init__(self, session, stdin=None, stdout=None):
+        cmd.Cmd.__init__(self, stdin=stdin, stdout=stdout)
+        self.session = session
+
+    def _print(self, text=''):
+        print(text, file=self.stdout)
+
+    def onecmd(self, line):
+        try:
+            return cmd.Cmd.onecmd(self, line)
+        except (ValueError, ArgumentTypeError) as e:
+            self._print("Error: %s" % e)
+            return False
+
+    def emptyline(self):
+        pass
+
+    def _phase_number(self, string, extra=0):
+        number = int(string)
+        if not 1 <= number <= len(self.session.phases) + extra:
+            raise ValueError("There is no phase %i" % number)
+        return number - 1
+
+    def do_payload(self, arg):
+        """payload KG: set payload"""
+        self.session.payload = nonnegative_float(arg)
+
+    def do_phases(self, arg):
+        """phases DV[:ACC[:PRESSURE[:SFB]]] ...: replace all flight phases"""
+        phases = [parse_phase(s) for s in arg.split()]
+        if not phases:
+            raise ValueError("No flight phases given")
+        self.session.phases = phases
+
+    def do_phase(self, arg):
+        """phase N DV[:ACC[:PRESSURE[:SFB]]]: replace flight phase N, or append it if N is one more
+        than the number of phases"""
+        args = arg.split()
+        if len(args) != 2:
+            raise ValueError("Usage: phase N DV[:ACC[:PRESSURE[:SFB]]]")
+        i = self._phase_number(args[0], 1)
+        self.session.phases[i:i+1] = [parse_phase(args[1])]
+
+    def do_drop(self, arg):
+        """drop N: remove flight phase N"""
+        del self.session.phases[self._phase_number(arg)]
+
+    def do_set(self, arg):
+        """set NAME VALUE: set radius (none, tiny, small, large or extralarge), gimbal (0, 1 or 2), or
+        boosters, electricity, length, monopropellant or cheapest (true or false)"""
+        args = shlex.split(arg)
+        if len(args) != 2:
+            raise ValueError("Usage: set NAME VALUE")
+        self.session.set(*args)
+
+    def do_show(self, _arg):
+        """show: print mission and preferences"""
+        s = self.session
+        self._print("Payload: %.0f kg" % s.payload)
+        for i, (dv, ac, pr, sa) in enumerate(s.phases):
+            self._print("Phase %i: %.0f m/s, %.1f m/s², %.2f atm%s" %
+                        (i + 1, dv, ac, pr, "" if sa else ", no solid fuel boosters"))
+        self._print("radius %s, gimbal %i, %s" % (
+            s.preferred_size.name.lower() if s.preferred_size is not None else 'none', s.gimbal,
+            ", ".join("%s %s" % (name, 'true' if getattr(s, name) else 'false') for name in FLAGS)))
+
+    def do_run(self, _arg):
+        """run: find the best designs for the mission"""
+        s = self.session
+        evaluations = s.evaluations
+        start = default_timer()
+        designs = s.designs()
+        seconds = default_timer() - start
+        for d in designs:
+            self._print(str(d))
+        if not designs:
+            self._print("Sorry, nothing found. Change constraints and try again.")
+        how = "evaluated" if s.evaluations > evaluations else "ranked"
+        self._print("%i designs (%s in %.3f s)" % (len(designs), how, seconds))
+
+    def do_quit(self, _arg):
+        """quit: leave the session"""
+        return True
+
+    def do_EOF(self, _arg):
+        self._print()
+        return True
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='kspalculator repl',
+                            description='Edit a mission and re-evaluate it interactively, see kspalculator.repl.')
+    parser.add_argument('payload', type=nonnegative_float, nargs='?', default=0.0, help='Payload in kg')
+    parser.add_argument('dvtuples', type=parse_phase, nargs='*',
+                        metavar='deltav[:min_acceleration[:pressure[:sfb_allowed]]]',
+                        help='Flight phases, as for kspalculator')
+    parser.add_argument('-c', '--cheapest', action='store_true', help='Sort by cost instead of weight')
+    parser.add_argument('-b', '--boosters', action='store_true', help='Consider designs with solid fuel boosters')
+    parser.add_argument('-R', '--preferred-radius', choices=sorted(RADIAL_SIZES), type=str.lower, default='none',
+                        help='Preferred radius of the stage')
+    parser.add_argument('-e', '--electricity', action='store_true', help='Prefer engines generating electricity')
+    parser.add_argument('-l', '--length', '--lander', action='store_true', help='Prefer short engines')
+    parser.add_argument('-g', '--gimbal', action='count', default=0, help='Prefer engines with gimbal (-gg: best)')
+    parser.add_argument('-m', '-r', '--monopropellant', '--rcs', action='store_true',
+                        help='Prefer engines using monopropellant')
+    parser.add_argument('--parts', metavar='FILE', help='Use the parts described in FILE, as for kspalculator')
+    parser.add_argument('--cache-dir', metavar='DIR', help='Directory for the compiled parts file')
+    parser.add_argument('--researched', type=technodes, metavar='NODE,...',
+                        help='Only use parts of these researched tech tree nodes')
+    parser.add_argument('--tank-packing', choices=list(OBJECTIVES), default='mass',
+                        help='Choose liquid fuel tanks for least mass (default) or least cost')
+    args = parser.parse_args(argv)
+
+    catalog = parts_option(parser, args)
+    session = Session(catalog, args.researched, args.tank_packing)
+    session.payload = args.payload
+    session.phases = args.dvtuples
+    session.preferred_size = RADIAL_SIZES[args.preferred_radius]
+    session.gimbal = min(args.gimbal, 2)
+    for name in FLAGS:
+        setattr(session, name, getattr(args, name))
+    shell = Shell(session)
+    if not sys.stdin.isatty():
+        shell.intro = None
+        shell.prompt = ''
+    try:
+        shell.cmdloop()
+    except KeyboardInterrupt:
+        print()
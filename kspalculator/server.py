@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+"""Local HTTP/JSON service answering missions, started by `kspalculator serve`.
+
+Needs Python 3.5 or newer, unlike the rest of kspalculator.
+
+Endpoints:
+
+POST /find: body is a mission as JSON object (see finder_from_json()), answer is
+    {"designs": [...], "cached": bool, "seconds": float}, where designs are records as returned by
+    output.design_record(),
+GET /stats: number of requests, latency percentiles (in seconds) of recent /find requests, cache
+    statistics and number of pending requests,
+GET /health: {"status": "ok"}.
+
+Designs are found by a pool of worker processes, so that a single server process answers requests
+concurrently without paying for process start-up per request. Results are kept in a shared
+ResultCache, and identical requests arriving while one is computed wait for the same result. Each
+worker also keeps the feasible designs of recent missions, so requests differing only in
+preferences are answered by ranking them again. If more than max_pending requests are being
+computed or waiting for a worker, further requests are rejected with 503. Requests taking longer
+than the timeout are answered with 504; their result is still cached when it is completed.
+"""
+
+import asyncio
+import json
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer
+
+from .cache import ResultCache
+from .finder import Finder
+from .output import design_record
+from .parts import RadialSize
+from .techtree import Node
+
+RADIAL_SIZES = {'tiny': RadialSize.Tiny, 'small': RadialSize.Small, 'large': RadialSize.Large,
+                'extralarge': RadialSize.ExtraLarge}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+MAX_BODY = 1024*1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def finder_from_json(mission):
+    """Returns (Finder, best_only, order_by_cost) for mission given as decoded JSON object.
+
+    Keys of mission are payload (kg, required), phases (required, list of objects with keys dv,
+    acceleration, pressure and sfb_allowed, of which only dv is required), preferred_radius (tiny,
+    small, large or extralarge), gimbal (0, 1 or 2), boosters, electricity, length,
+    monopropellant, researched (list of names of techtree.Node), tank_packing (mass or cost),
+    best_only (default true) and order_by_cost. Raises ValueError if invalid.
+    """
+    if not isinstance(mission, dict):
+        raise ValueError("Mission must be a JSON object")
+    unknown = set(mission) - {'payload', 'phases', 'preferred_radius', 'gimbal', 'boosters', 'electricity',
+                              'length', 'monopropellant', 'researched', 'tank_packing', 'best_only', 'order_by_cost'}
+    if unknown:
+        raise ValueError("Unknown keys: %s" % ", ".join(sorted(unknown)))
+    try:
+        payload = float(mission['payload'])
+        phases = mission['phases']
+        if not isinstance(phases, list) or not phases:
+            raise ValueError("phases must be a non-empty list")
+        dv = [float(p['dv']) for p in phases]
+        ac = [float(p.get('acceleration', 0.0)) for p in phases]
+        pr = [float(p.get('pressure', 0.0)) for p in phases]
+        sa = [bool(p.get('sfb_allowed', True)) for p in phases]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid mission: %s" % e)
+    radius = mission.get('preferred_radius')
+    if radius is not None and radius not in RADIAL_SIZES:
+        raise ValueError("Invalid preferred_radius %r" % radius)
+    gimbal = mission.get('gimbal', 0)
+    if gimbal not in (0, 1, 2):
+        raise ValueError("Invalid gimbal %r" % gimbal)
+    researched = mission.get('researched')
+    if researched is not None:
+        try:
+            researched = [Node[name] for name in researched]
+        except (KeyError, TypeError):
+            raise ValueError("Invalid researched %r" % (researched,))
+    finder = Finder(payload, RADIAL_SIZES.get(radius), dv, ac, pr, sa, gimbal, bool(mission.get('boosters')),
+                    bool(mission.get('electricity')), bool(mission.get('length')),
+                    bool(mission.get('monopropellant')), researched=researched,
+                    packing=mission.get('tank_packing', 'mass'))
+    return finder, bool(mission.get('best_only', True)), bool(mission.get('order_by_cost'))
+
+
+# feasible designs of recent missions, kept by each worker process
+_design_cache = ResultCache(64)
+
+
+def _find_records(finder, best_only, order_by_cost):
+    # runs in worker processes
+    finder.design_cache = _design_cache
+    return [design_record(d) for d in finder.find(best_only, order_by_cost)]
+
+
+def percentile(values, p):
+    """Returns p-th percentile (nearest rank) of sorted list values, or None if empty."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+class Server(object):
+    """HTTP server answering missions, see module documentation.
+
+    :param workers: number of worker processes
+    :param max_pending: maximum number of requests being computed or waiting for a worker
+    :param timeout: seconds after which a request is answered with 504
+    :param cache_size: number of results kept in the cache
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, workers=1, max_pending=32, timeout=30.0, cache_size=256):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.cache = ResultCache(cache_size)
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=1000)
+        self._inflight = {}
+        self._pool = None
+        self._server = None
+
+    async def start(self):
+        """Starts listening. If port was 0, self.port is set to the actual port afterwards."""
+        self._pool = ProcessPoolExecutor(self.workers)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._pool.shutdown()
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {'requests': self.requests, 'errors': self.errors, 'rejected': self.rejected,
+                'timeouts': self.timeouts, 'pending': len(self._inflight), 'workers': self.workers,
+                'latency': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                            'p99': percentile(latencies, 99), 'max': latencies[-1] if latencies else None},
+                'cache': self.cache.stats()}
+
+    async def find(self, mission):
+        """Returns answer to /find for decoded mission, raises HTTPError."""
+        try:
+            finder, best_only, order_by_cost = finder_from_json(mission)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        key = (finder.signature(), best_only, order_by_cost)
+        records = self.cache.get(key)
+        if records is not None:
+            return {'designs': records, 'cached': True}
+        future = self._inflight.get(key)
+        if future is None:
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                raise HTTPError(503, "Too many pending requests")
+            loop = asyncio.get_event_loop()
+            future = loop.run_in_executor(self._pool, _find_records, finder, best_only, order_by_cost)
+            self._inflight[key] = future
+            def done(f):
+                del self._inflight[key]
+                if not f.cancelled() and f.exception() is None:
+                    self.cache.put(key, f.result())
+            future.add_done_callback(done)
+        try:
+            records = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPError(504, "Timeout after %g s" % self.timeout)
+        return {'designs': records, 'cached': False}
+
+    async def _respond(self, method, path, body):
+        if path == '/find':
+            if method != 'POST':
+                raise HTTPError(405, "Use POST")
+            try:
+                mission = json.loads(body.decode('utf-8'))
+            except ValueError as e:
+                raise HTTPError(400, "Invalid JSON: %s" % e)
+            start = default_timer()
+            answer = await self.find(mission)
+            answer['seconds'] = default_timer() - start
+            self.latencies.append(answer['seconds'])
+            return answer
+        if method != 'GET':
+            raise HTTPError(405, "Use GET")
+        if path == '/stats':
+            return self.stats()
+        if path == '/health':
+            return {'status': 'ok'}
+        raise HTTPError(404, "Unknown path %s" % path)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, path, version = line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                self.requests += 1
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                try:
+                    if length < 0:
+                        # the body cannot be skipped
+                        keep_alive = False
+                        raise HTTPError(400, "Invalid Content-Length")
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HTTPError(413, "Request body too large")
+                    body = (await reader.readexactly(length)) if length else b''
+                    status, answer = 200, await self._respond(method, path.split('?')[0], body)
+                except HTTPError as e:
+                    self.errors += 1
+                    status, answer = e.status, {'error': str(e)}
+                except Exception as e:  # pylint: disable=broad-except
+                    # worker failures, which might be of any type, must not take down the server
+                    self.errors += 1
+                    status, answer = 500, {'error': "%s: %s" % (type(e).__name__, e)}
+                data = json.dumps(answer).encode('utf-8')
+                writer.write(("HTTP/1.1 %i %s\r\nContent-Type: application/json\r\nContent-Length: %i\r\n"
+                              "Connection: %s\r\n\r\n" % (status, REASONS.get(status, 'Internal Server Error'),
+                                                          len(data), 'keep-alive' if keep_alive else 'close')
+                              ).encode('latin-1'))
+                writer.write(data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='kspalculator serve',
+                            description='Answer missions given as JSON via HTTP, see kspalculator.server.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes (default: 1)')
+    parser.add_argument('--max-pending', type=int, default=32,
+                        help='Maximum number of requests being computed or waiting (default: 32)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Timeout per request in s (default: 30)')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Number of results kept in memory (default: 256)')
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.max_pending < 1 or args.timeout <= 0 or args.cache_size < 1:
+        parser.error("--workers, --max-pending, --timeout and --cache-size must be positive")
+
+    server = Server(args.host, args.port, args.workers, args.max_pending, args.timeout, args.cache_size)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(server.start())
+    print("Serving on http://%s:%i/" % (server.host, server.port), file=sys.stderr)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+        loop.close()
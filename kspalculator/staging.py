@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""Multi-stage rockets, built from single-stage designs.
+
+The flight phases are split into consecutive slices, each flown by one stage. The topmost stage
+carries the payload through the last phases, and its total mass is the payload of the stage below
+it, and so on. Mass of decouplers is not considered; add it to the payload of the respective stage
+by hand.
+"""
+
+from __future__ import division
+
+from collections import namedtuple
+from math import ceil, log
+
+from . import physics
+from .design import SearchSpace, find_designs
+
+Stage = namedtuple('Stage', ['first_phase', 'end_phase', 'design'])
+"""One stage of a StagedDesign, flying phases first_phase to end_phase - 1 (indices of the
+mission's phases)."""
+
+StagedDesign = namedtuple('StagedDesign', ['stages', 'mass', 'cost'])
+"""Rocket of several stages, given bottom to top. mass and cost are those of the whole rocket,
+including the payload."""
+
+
+def _pareto(designs):
+    """Returns best designs not beaten in both mass and cost by another one, ordered by mass."""
+    front = []
+    for d in sorted((d for d in designs if d.is_best), key=lambda d: (d.get_mass(), d.get_cost())):
+        if not front or d.get_cost() < front[-1].get_cost():
+            front.append(d)
+    return front
+
+
+class StagingSearch(object):
+    """Searches for the best split of a mission into stages.
+
+    Single-stage results are memoized by phase slice and payload bucket, where payloads are rounded
+    up to the next power of (1 + bucket). As needed mass only grows with payload, a design found
+    for the rounded payload also fulfills the requirements for the actual one. The best split found
+    this way is then solved again with exact payloads. Partial rockets are pruned using the rocket
+    equation with the highest specific impulse of all engines at each phase.
+    """
+
+    def __init__(self, payload, delta_vs, accelerations, pressures, sfb_allowed, preferred_radial_size=None,
+                 gimbal=0, boosters=False, electricity=False, length=False, monopropellant=False, bucket=0.01,
+                 catalog=None, packing='mass'):
+        self.payload = payload
+        self.dv = list(delta_vs)
+        self.acc = list(accelerations)
+        self.pressure = list(pressures)
+        self.sfb_allowed = list(sfb_allowed)
+        self.preferences = (preferred_radial_size, gimbal, boosters, electricity, length, monopropellant)
+        self.bucket = bucket
+        self.catalog = catalog
+        self.packing = packing
+        self.solves = 0
+        self._stages = {}
+        self._spaces = {}
+        self._solved = {}   # (start, end): list of (payload, mass of lightest design or None)
+        space = SearchSpace(self.pressure, boosters, catalog, packing)
+        engines = set(c.eng for first_only, group in space.groups for c in group) | \
+                  set(c.sfb for first_only, group in space.groups for c in group if c.sfb is not None)
+        self._best_isp = [max(space.isp(e)[i] for e in engines) for i in range(len(self.dv))]
+        # _min_ratio[s]: minimum ratio of start mass to payload of a rocket flying the first s
+        # phases, by any number of stages
+        self._min_ratio = [1.0]
+        for i in range(len(self.dv)):
+            self._min_ratio.append(self._min_ratio[-1] * self._stage_ratio(i, i + 1))
+
+    def _stage_ratio(self, start, end):
+        # Ratio of start mass to payload of an ideal stage: massless engines with the highest
+        # specific impulse in each phase, and tanks as light as liquid fuel tanks, which are the
+        # lightest compared to their fuel.
+        f_e = 1 / 8
+        ratio = physics.lf_fuel_ratio(self.dv[start:end], self._best_isp[start:end], f_e)
+        if ratio < 0:
+            return float('inf')
+        return 1 + (1 + f_e) / f_e * ratio
+
+    def _round(self, payload):
+        if self.bucket is None or payload <= 0:
+            return payload
+        return (1 + self.bucket) ** ceil(log(payload) / log(1 + self.bucket) - 1e-9)
+
+    def _boosters(self, start, end):
+        # SFBs would be useless for stages flying only phases in which they are not allowed
+        return self.preferences[2] and any(self.sfb_allowed[start:end])
+
+    def min_stage_mass(self, start, end, payload):
+        """Returns lower bound of the mass of a stage, or None if it is known to be infeasible.
+
+        Uses that stages for heavier payloads are at least as heavy, and that a stage infeasible for
+        some payload is infeasible for all heavier ones. This does not hold for stages with SFBs,
+        which might burn into a phase in which they are not allowed only with a lighter payload.
+        """
+        bound = payload * self._stage_ratio(start, end)
+        if self._boosters(start, end):
+            return bound
+        for p, mass in self._solved.get((start, end), []):
+            if p <= payload:
+                if mass is None:
+                    return None
+                bound = max(bound, mass + payload - p)
+        return bound
+
+    def stage_designs(self, start, end, payload, by_cost):
+        """Returns candidate designs for one stage flying phases start to end - 1."""
+        key = (start, end, payload)
+        if key not in self._stages:
+            preferredsize, gimbal, boosters, electricity, length, monopropellant = self.preferences
+            boosters = self._boosters(start, end)
+            if (start, end) not in self._spaces:
+                self._spaces[start, end] = SearchSpace(self.pressure[start:end], boosters, self.catalog,
+                                                          self.packing)
+            self.solves += 1
+            designs = find_designs(payload, self.pressure[start:end], self.dv[start:end], self.acc[start:end],
+                                   self.sfb_allowed[start:end], preferredsize, gimbal, boosters, electricity,
+                                   length, monopropellant, self._spaces[start, end])
+            self._stages[key] = _pareto(designs)
+            self._solved.setdefault((start, end), []).append(
+                (payload, self._stages[key][0].get_mass() if self._stages[key] else None))
+        front = self._stages[key]
+        # lighter stages only help the stages below, so only trade mass for cost
+        return front if by_cost else front[:1]
+
+    def search(self, stages, by_cost=False, splits=None):
+        """Returns best StagedDesign with given number of stages, or None if there is none.
+
+        :param splits: if given, only use these phase indices at which stages end (top to bottom)
+        """
+        best = [None, float('inf')]
+        exact = splits is not None
+        def objective(mass, cost):
+            return cost if by_cost else mass
+        def visit(end, payload, left, chosen, cost):
+            if end == 0:
+                if left == 0 and objective(payload, cost) < best[1]:
+                    best[:] = [list(reversed(chosen)), objective(payload, cost)]
+                return
+            if left == 0:
+                return
+            if not by_cost and payload * self._min_ratio[end] >= best[1]:
+                return
+            if exact:
+                starts = [splits[len(chosen)]]
+            else:
+                # the remaining left - 1 stages need at least one phase each
+                starts = range(end - 1, left - 2, -1) if left > 1 else [0]
+            for start in starts:
+                stagepayload = payload if exact else self._round(payload)
+                bound = self.min_stage_mass(start, end, stagepayload)
+                if bound is None or (not by_cost and bound * self._min_ratio[start] >= best[1]):
+                    continue
+                for d in self.stage_designs(start, end, stagepayload, by_cost):
+                    if by_cost and cost + d.get_cost() >= best[1]:
+                        continue
+                    chosen.append(Stage(start, end, d))
+                    visit(start, d.get_mass() if exact else self._round(d.get_mass()), left - 1, chosen,
+                          cost + d.get_cost())
+                    chosen.pop()
+        visit(len(self.dv), self.payload, stages, [], 0.0)
+        if best[0] is None:
+            return None
+        stages = best[0]
+        return StagedDesign(stages, stages[0].design.get_mass(), sum(s.design.get_cost() for s in stages))
+
+    def find(self, max_stages, by_cost=False):
+        """Returns list of best StagedDesign for each number of stages up to max_stages, best first."""
+        results = []
+        for count in range(1, min(max_stages, len(self.dv)) + 1):
+            rough = self.search(count, by_cost)
+            if rough is None:
+                continue
+            # solve again without rounded payloads
+            staged = self.search(count, by_cost, [s.first_phase for s in reversed(rough.stages)])
+            results.append(staged if staged is not None else rough)
+        return sorted(results, key=lambda s: (s.cost, s.mass) if by_cost else (s.mass, s.cost))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""Counters and timings of finding designs, to see why a query is slow or finds nothing."""
+
+from collections import OrderedDict
+from timeit import default_timer
+
+from . import parts
+
+FAMILIES = ('single', 'radial', 'atomic', 'xenon', 'monopropellant', 'sfb')
+"""Families of candidates, see family()."""
+
+REASONS = ('fuel', 'acceleration', 'sfb_phase', 'superseded', 'dominated')
+"""Reasons why a candidate is not among the best designs.
+
+fuel: needed fuel could not be determined, i.e. the engines cannot reach the required Delta-v,
+acceleration: minimum acceleration not reached in some phase,
+sfb_phase: SFBs would still be burning in a phase in which they are not allowed,
+superseded: feasible, but a candidate with fewer engines of the same group was feasible too,
+dominated: feasible, but other designs are better by all criteria.
+"""
+
+
+def family(candidate):
+    """Returns family of given design.Candidate, one of FAMILIES."""
+    if candidate.sfb is not None:
+        return 'sfb'
+    if candidate.fueltype is parts.FuelTypes.AtomicFuel:
+        return 'atomic'
+    if candidate.fueltype is parts.FuelTypes.Xenon:
+        return 'xenon'
+    if candidate.fueltype is parts.FuelTypes.Monopropellant:
+        return 'monopropellant'
+    if candidate.count > 1:
+        return 'radial'
+    return 'single'
+
+
+class Stats(object):
+    """Statistics of finding designs.
+
+    Pass an instance to find_designs() or Finder.find() to have it filled. Counts add up over
+    several calls.
+    """
+
+    def __init__(self):
+        self.candidates = OrderedDict((f, 0) for f in FAMILIES)
+        self.rejected = OrderedDict((r, 0) for r in REASONS)
+        self.times = OrderedDict()
+        self.designs = 0
+        self.best = 0
+        self.sflf_rounds = 0
+        self.sflf_iterations = 0
+        self.sfb_evaluations = 0
+        self.cache_hits = 0
+
+    def count_candidates(self, candidates):
+        for c in candidates:
+            self.candidates[family(c)] += 1
+
+    def reject(self, reason, count=1):
+        self.rejected[reason] += count
+
+    def add_time(self, stage, seconds):
+        self.times[stage] = self.times.get(stage, 0.0) + seconds
+
+    def add_sflf_iterations(self, iterations):
+        """Adds iterations of physics.sflf_needed_fuel_batch(), i.e. active designs per round."""
+        self.sflf_rounds += len(iterations)
+        self.sflf_iterations += sum(iterations)
+
+    def merge(self, other):
+        """Adds counts and times of other Stats."""
+        for f, count in other.candidates.items():
+            self.candidates[f] += count
+        for r, count in other.rejected.items():
+            self.rejected[r] += count
+        for stage, seconds in other.times.items():
+            self.add_time(stage, seconds)
+        self.designs += other.designs
+        self.best += other.best
+        self.sflf_rounds += other.sflf_rounds
+        self.sflf_iterations += other.sflf_iterations
+        self.sfb_evaluations += other.sfb_evaluations
+        self.cache_hits += other.cache_hits
+
+    def as_dict(self):
+        """Returns statistics as dict, e.g. for JSON output."""
+        return OrderedDict([('candidates', OrderedDict(self.candidates)),
+                            ('rejected', OrderedDict(self.rejected)),
+                            ('designs', self.designs),
+                            ('best', self.best),
+                            ('sflf_rounds', self.sflf_rounds),
+                            ('sflf_iterations', self.sflf_iterations),
+                            ('sfb_evaluations', self.sfb_evaluations),
+                            ('cache_hits', self.cache_hits),
+                            ('times', OrderedDict(self.times))])
+
+    def __str__(self):
+        rstr = "Candidates: %i (%s)\n" % (sum(self.candidates.values()),
+                                         ", ".join("%s %i" % fc for fc in self.candidates.items()))
+        rstr += "Rejected: %s\n" % ", ".join("%s %i" % rc for rc in self.rejected.items())
+        rstr += "Designs: %i feasible, %i best\n" % (self.designs, self.best)
+        rstr += "SFB fuel: %i solutions, %i iterations in %i rounds\n" % (self.sfb_evaluations, self.sflf_iterations,
+                                                                          self.sflf_rounds)
+        if self.cache_hits:
+            rstr += "Cache hits: %i\n" % self.cache_hits
+        rstr += "Times: %s\n" % ", ".join("%s %.3f s" % st for st in self.times.items())
+        return rstr
+
+
+class _Timer(object):
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        self.start = default_timer()
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.stage, default_timer() - self.start)
+
+
+class _NoTimer(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(stats, stage):
+    """Returns context manager adding its wall time to stage of stats, does nothing if stats is None."""
+    if stats is None:
+        return _NO_TIMER
+    return _Timer(stats, stage)
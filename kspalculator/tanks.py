@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""Choosing liquid fuel tanks for a required amount of fuel.
+
+Tanks of one radial size hold multiples of the fuel of the smallest one, so the required fuel is
+rounded up to a number of units of the smallest tank. Which tanks hold these units is solved by
+dynamic programming over the number of units, once for each set of tanks, and cached:
+
+mass: exactly the needed units, i.e. the least mass, and of these the cheapest tanks,
+cost: the cheapest tanks holding at least the needed units, and of these the lightest ones.
+
+Bigger tanks are usually cheaper per unit, so packing by cost might carry more fuel than needed.
+"""
+
+from __future__ import division
+
+from math import ceil
+
+OBJECTIVES = ('mass', 'cost')
+
+
+class PackingTable(object):
+    """Cheapest tanks for each number of units of given tanks, see module documentation.
+
+    Above the table size, some optimal packing contains the tank with the lowest cost per unit, so
+    larger amounts are reduced by adding that tank.
+
+    :param tanks: list of tanks (with cost and m_full), all multiples of the first one
+    """
+
+    def __init__(self, tanks):
+        self.tanks = list(tanks)
+        self.units = [int(round(t.m_full / self.tanks[0].m_full)) for t in self.tanks]
+        self.best = min(range(len(self.tanks)), key=lambda i: (self.tanks[i].cost / self.units[i], -self.units[i]))
+        # an optimal packing uses fewer than units[best] other tanks
+        self.limit = self.units[self.best] * max(self.units)
+        size = self.limit + 2 * max(self.units)
+        # exact[n]: (cost, number of tanks, counts) of cheapest tanks holding exactly n units
+        exact = [(0, 0, (0,) * len(self.tanks))] + [None] * size
+        for n in range(1, size + 1):
+            for i, u in enumerate(self.units):
+                previous = exact[n - u] if u <= n else None
+                if previous is None:
+                    continue
+                counts = previous[2][:i] + (previous[2][i] + 1,) + previous[2][i+1:]
+                candidate = (previous[0] + self.tanks[i].cost, previous[1] + 1, counts)
+                if exact[n] is None or candidate[:2] < exact[n][:2]:
+                    exact[n] = candidate
+        # cover[n]: cheapest tanks holding at least n units; removing any tank from an optimal
+        # packing would hold too little, so it holds less than n + max(units) units
+        cover = [min((exact[m][0], m, exact[m][1], exact[m][2]) for m in range(n, n + max(self.units)))
+                 for n in range(self.limit + max(self.units) + 1)]
+        self._tables = {'mass': [e[2] for e in exact[:len(cover)]], 'cost': [c[3] for c in cover]}
+
+    def counts(self, units, objective='mass'):
+        """Returns tuple of count of each tank for needed units."""
+        units = max(0, units)
+        table = self._tables[objective]
+        extra = 0
+        if units > self.limit:
+            extra = int(ceil((units - self.limit) / self.units[self.best]))
+            units -= extra * self.units[self.best]
+        counts = table[units]
+        if extra:
+            counts = counts[:self.best] + (counts[self.best] + extra,) + counts[self.best+1:]
+        return counts
+
+    def pack(self, units, objective='mass'):
+        """Returns list of (count, tank) tuples holding needed units, smallest tanks first."""
+        return [(count, tank) for count, tank in zip(self.counts(units, objective), self.tanks) if count > 0]
+
+
+_tables = {}
+
+
+def packing_table(tanks):
+    """Returns PackingTable for given tanks, shared by all callers."""
+    key = tuple(tanks)
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = PackingTable(key)
+    return table
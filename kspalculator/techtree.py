@@ -46,28 +46,53 @@ class Node(Enum):
         True
         >>> Node.VeryHeavyRocketry.depends_on(Node.HeavyRocketry)
         False"""
-        # OR-branches are skipped until their merge. Fortunately, this is not a limitation.
-        DEPCHAINS = [ [ Node.Start, Node.BasicRocketry, Node.GeneralRocketry,
-                        Node.AdvancedRocketry, Node.HeavyRocketry, Node.HeavierRocketry,
-                        Node.NuclearPropulsion ],
-                      [ Node.Start, Node.BasicRocketry, Node.GeneralRocketry, Node.AdvancedRocketry,
-                        Node.PropulsionSystems, Node.PrecisionPropulsion ],
-                      [ Node.Start, Node.AdvancedFuelSystems, Node.NuclearPropulsion ],
-                      [ Node.Start, Node.VeryHeavyRocketry ],
-                      [ Node.Start, Node.Aerodynamics, Node.SupersonicFlight,
-                        Node.HighAltitudeFlight, Node.HypersonicFlight, Node.AerospaceTech ],
-                      [ Node.Start, Node.Engineering101, Node.IonPropulsion ],
-                      [ Node.Start, Node.Stability ],
-                      [ Node.Start, Node.FlightControl, Node.AdvancedFlightControl, Node.SpecializedControl ] ]
-        for depchain in DEPCHAINS:
-            try:
-                if depchain.index(other) < depchain.index(self):
-                    return True
-            except ValueError:
-                pass
-        return False
-
-class NodeSet:
+        return bool(_dependencies[self] & _bit[other])
+
+# OR-branches are skipped until their merge. Fortunately, this is not a limitation.
+_DEPCHAINS = [ [ Node.Start, Node.BasicRocketry, Node.GeneralRocketry,
+                 Node.AdvancedRocketry, Node.HeavyRocketry, Node.HeavierRocketry,
+                 Node.NuclearPropulsion ],
+               [ Node.Start, Node.BasicRocketry, Node.GeneralRocketry, Node.AdvancedRocketry,
+                 Node.PropulsionSystems, Node.PrecisionPropulsion ],
+               [ Node.Start, Node.AdvancedFuelSystems, Node.NuclearPropulsion ],
+               [ Node.Start, Node.VeryHeavyRocketry ],
+               [ Node.Start, Node.Aerodynamics, Node.SupersonicFlight,
+                 Node.HighAltitudeFlight, Node.HypersonicFlight, Node.AerospaceTech ],
+               [ Node.Start, Node.Engineering101, Node.IonPropulsion ],
+               [ Node.Start, Node.Stability ],
+               [ Node.Start, Node.FlightControl, Node.AdvancedFlightControl, Node.SpecializedControl ] ]
+
+# Each node is represented by one bit, so that sets of nodes are integer bitmasks.
+_bit = dict((node, 1 << i) for i, node in enumerate(Node))
+_node = dict((b, node) for node, b in _bit.items())
+
+def _compile():
+    """Returns transitive closure of dependencies given by _DEPCHAINS, as bitmasks."""
+    dependencies = dict((node, 0) for node in Node)
+    for depchain in _DEPCHAINS:
+        for i in range(len(depchain)):
+            for j in range(i):
+                dependencies[depchain[i]] |= _bit[depchain[j]]
+    changed = True
+    while changed:
+        changed = False
+        for node in Node:
+            closure = dependencies[node]
+            for other in Node:
+                if closure & _bit[other]:
+                    closure |= dependencies[other]
+            if closure != dependencies[node]:
+                dependencies[node] = closure
+                changed = True
+    return dependencies
+
+# _dependencies[n]: bitmask of nodes which must be researched before n
+# _dependents[n]: bitmask of nodes which require n to be researched
+_dependencies = _compile()
+_dependents = dict((node, sum(_bit[o] for o in Node if _dependencies[o] & _bit[node])) for node in Node)
+_dependents_by_bit = dict((_bit[node], m) for node, m in _dependents.items())
+
+class NodeSet(object):
     """Set of Nodes.
 
     With depends_on as order relation, only maximum nodes are stored in the set.
@@ -76,8 +101,23 @@ class NodeSet:
     which is not what we want.
     """
 
+    __slots__ = ('mask',)
+
     def __init__(self):
-        self.nodes = set()
+        self.mask = 0
+
+    @property
+    def nodes(self):
+        """Set of nodes contained in this NodeSet."""
+        return set(node for b, node in _node.items() if self.mask & b)
+
+    def __eq__(self, other):
+        return isinstance(other, NodeSet) and self.mask == other.mask
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
 
     def add(self, newnode):
         """Add newnode to set.
@@ -103,17 +143,11 @@ class NodeSet:
         True"""
 
         # remove nodes which are prerequisites for newnode
-        for node in self.nodes.copy():
-            if newnode.depends_on(node):
-                self.nodes.remove(node)
-
+        mask = self.mask & ~_dependencies[newnode]
         # add newnode if it is not a prerequisite of all other nodes
-        for node in self.nodes:
-            if not node.depends_on(newnode):
-                self.nodes.add(newnode)
-                return
-        if not self.nodes:
-            self.nodes.add(newnode)
+        if not mask or mask & ~_dependents[newnode]:
+            mask |= _bit[newnode]
+        self.mask = mask
 
     def is_easier_than(self, other):
         """Returns true if all our nodes have to be researched for other to be researched.
@@ -142,13 +176,24 @@ class NodeSet:
         True
         """
 
-        if self.nodes < other.nodes:
+        if self.mask != other.mask and not self.mask & ~other.mask:
             return True
 
-        for a in self.nodes:
-            for b in other.nodes:
-                if b.depends_on(a):
-                    break
-            else:
+        mask = self.mask
+        while mask:
+            a = mask & -mask
+            if not _dependents_by_bit[a] & other.mask:
                 return False
+            mask ^= a
         return True
+
+def researched_with_dependencies(nodes):
+    """Returns set of given nodes, Start and all nodes they depend on, i.e. all nodes which must
+    have been researched when nodes are.
+
+    >>> sorted(n.name for n in researched_with_dependencies([Node.GeneralRocketry]))
+    ['BasicRocketry', 'GeneralRocketry', 'Start']"""
+    mask = _bit[Node.Start]
+    for node in nodes:
+        mask |= _bit[node] | _dependencies[node]
+    return set(node for b, node in _node.items() if mask & b)
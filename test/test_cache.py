@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from kspalculator.cache import DiskCache, ResultCache
+from kspalculator.finder import Finder
+from kspalculator.parts import RadialSize
+
+
+def finder(payload, cache):
+    return Finder(payload, RadialSize.Small, [1170, 580, 580, 210, 700], [0.0, 3.3, 5.0, 0.0, 0.0], 5*[0.0],
+                  5*[True], False, False, False, True, True, cache)
+
+
+def hammer(directory):
+    cache = DiskCache(directory, max_bytes=20000)
+    for i in range(50):
+        cache.put(i % 7, 1000 * [i % 7])
+        value = cache.get((i+3) % 7)
+        if value is not None and value != 1000 * [(i+3) % 7]:
+            raise AssertionError("inconsistent entry")
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru(self):
+        c = ResultCache(2)
+        c.put('a', 1)
+        c.put('b', 2)
+        self.assertEqual(c.get('a'), 1)
+        c.put('c', 3)   # evicts b, as a was used more recently
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.get('a'), 1)
+        self.assertEqual(c.get('c'), 3)
+        self.assertEqual(c.stats(), {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2})
+
+    def test_finder(self):
+        c = ResultCache()
+        first = finder(1320, c).find()
+        self.assertEqual(len(first), 7)
+        # equal signature, although given as int instead of float
+        self.assertEqual(finder(1320.0, c).signature(), finder(1320, c).signature())
+        self.assertEqual(finder(1320.0, c).find(), first)
+        self.assertEqual(len(finder(1320, c).find(best_only=False)), 27)
+        self.assertEqual((c.hits, c.misses), (1, 2))
+
+    def test_threads(self):
+        c = ResultCache(8)
+        def work(n):
+            for i in range(500):
+                c.put((n, i % 10), i)
+                c.get((n, (i+1) % 10))
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(c), 8)
+        self.assertEqual(c.hits + c.misses, 2000)
+        self.assertEqual(c.evictions, 2000 - 8)
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_persistence(self):
+        designs = finder(1320, DiskCache(self.directory)).find()
+        # a new instance, as in a cold process, finds the stored result
+        c = DiskCache(self.directory)
+        cached = finder(1320, c).find()
+        self.assertEqual((c.hits, c.misses), (1, 0))
+        self.assertEqual([str(d) for d in cached], [str(d) for d in designs])
+
+    def test_invalidation(self):
+        c = DiskCache(self.directory)
+        c.put('a', 1)
+        self.assertEqual(c.get('a'), 1)
+        c._digest = 'changed part data'
+        self.assertIsNone(c.get('a'))
+
+    def test_eviction(self):
+        c = DiskCache(self.directory, max_bytes=10000)
+        for i in range(10):
+            c.put(i, 1000 * [i])
+            os.utime(c._path(i), (i, i))
+        self.assertGreater(c.evictions, 0)
+        self.assertLessEqual(sum(e[1] for e in c._entries()), 10000)
+        self.assertEqual(c.get(9), 1000 * [9])
+        self.assertIsNone(c.get(0))
+
+    def test_evicted_after_load(self):
+        c = DiskCache(self.directory)
+        c.put('a', 1)
+        def evicted(path, times):
+            os.remove(path)
+            raise OSError(path)
+        utime = os.utime
+        os.utime = evicted
+        try:
+            self.assertEqual(c.get('a'), 1)
+        finally:
+            os.utime = utime
+        self.assertEqual((c.hits, c.misses), (1, 0))
+
+    def test_processes(self):
+        processes = [multiprocessing.Process(target=hammer, args=(self.directory,)) for _ in range(4)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        self.assertEqual([p.exitcode for p in processes], 4 * [0])
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith('.tmp')])
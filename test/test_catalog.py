@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from kspalculator import catalog
+from kspalculator.cache import DiskCache
+from kspalculator.catalog import BUILTIN, CatalogError, from_dict, load, parse_cfg
+from kspalculator.design import candidate_groups
+from kspalculator.finder import Finder
+from kspalculator.parts import FuelTypes, RadialSize
+from kspalculator.techtree import Node, researched_with_dependencies
+
+MISSION = (6370, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True], 1, True, False, False, False)
+
+CFG = """
+// a minimal catalog
+ENGINE
+{
+    name = LV-T30 Reliant
+    size = Small
+    cost = 1100
+    m = 1250
+    isp_atm = 265
+    isp_vac = 310
+    F_vac = 240000
+    tvc = 0
+    level = GeneralRocketry
+    electricity = 1
+    length = 2
+}
+FUEL_TANK {
+    name = FL-T100 Fuel Tank
+    size = Small
+    cost = 150
+    m_full = 562.5
+}
+FUEL_TANK
+{
+    name = FL-T200 Fuel Tank  // twice as big
+    size = Small
+    cost = 275
+    m_full = 1125
+}
+"""
+
+
+def summary(designs):
+    return [(d.mainengine.name, d.mainenginecount, d.sfb and d.sfb.name, d.sfbcount, d.get_mass(), d.get_cost(),
+             [(c, t.name) for c, t in d.fueltanks], d.notes) for d in designs]
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_builtin_roundtrip(self):
+        """ check whether a JSON file of the built-in parts gives the same designs """
+        path = self.write('parts.json', json.dumps(BUILTIN.as_dict()))
+        loaded = load(path)
+        self.assertEqual(loaded.digest(), BUILTIN.digest())
+        expected = summary(Finder(*MISSION).find(False))
+        self.assertEqual(summary(Finder(*MISSION, catalog=loaded).find(False)), expected)
+        self.assertTrue(any("6400 units" in note for d in expected for note in d[-1]))
+
+    def test_index(self):
+        self.assertEqual([e.name for e in BUILTIN.engines[FuelTypes.Xenon]],
+                         ['IX-6315 Dawn Electric Propulsion System'])
+        self.assertTrue(all(e.size is RadialSize.ExtraLarge for e in BUILTIN.by_size[RadialSize.ExtraLarge]))
+        self.assertIn('BACC Thumper', [p.name for p in BUILTIN.by_level[Node.GeneralRocketry]])
+        for tanks in BUILTIN.fueltanks.values():
+            self.assertEqual([t.m_full / tanks[0].m_full for t in tanks], [2**i for i in range(len(tanks))])
+
+    def test_cfg(self):
+        path = self.write('parts.cfg', CFG)
+        parts = load(path)
+        self.assertEqual([e.name for e in parts.engines[FuelTypes.LiquidFuel]], ['LV-T30 Reliant'])
+        self.assertEqual(parts.engines[FuelTypes.LiquidFuel][0].level, Node.GeneralRocketry)
+        designs = Finder(1000, None, [1000], [5.0], [0.0], [True], 0, True, False, False, False,
+                         catalog=parts).find()
+        self.assertEqual(len(designs), 1)
+        self.assertEqual(designs[0].mainengine.name, 'LV-T30 Reliant')
+        self.assertEqual(set(t.name for c, t in designs[0].fueltanks) - {'FL-T100 Fuel Tank', 'FL-T200 Fuel Tank'},
+                         set())
+        self.assertNotEqual(Finder(*MISSION).signature(), Finder(*MISSION, catalog=parts).signature())
+
+    def test_compiled(self):
+        """ check whether the compiled form is used as long as the file does not change """
+        path = self.write('parts.cfg', CFG)
+        cachedir = os.path.join(self.directory, 'cache')
+        first = load(path, cachedir)
+        self.assertEqual(len(os.listdir(cachedir)), 1)
+        parse = catalog.parse
+        catalog.parse = None
+        try:
+            second = load(path, cachedir)
+        finally:
+            catalog.parse = parse
+        self.assertEqual(second.digest(), first.digest())
+        self.write('parts.cfg', CFG.replace('1100', '1200'))
+        self.assertEqual(load(path, cachedir).engines[FuelTypes.LiquidFuel][0].cost, 1200)
+        self.assertEqual(len(os.listdir(cachedir)), 2)
+        # results cached in the same directory do not evict compiled catalogs
+        results = DiskCache(cachedir, max_bytes=0)
+        results.put('a', 1)
+        results.clear()
+        self.assertEqual(len(os.listdir(cachedir)), 2)
+
+    def test_compile_failure(self):
+        """ check whether no temporary file is left behind if compiling fails """
+        path = self.write('parts.cfg', CFG)
+        cachedir = os.path.join(self.directory, 'cache')
+        dump = catalog.pickle.dump
+        def fail(*args):
+            raise IOError("disk full")
+        catalog.pickle.dump = fail
+        try:
+            self.assertEqual(load(path, cachedir).engines[FuelTypes.LiquidFuel][0].name, 'LV-T30 Reliant')
+        finally:
+            catalog.pickle.dump = dump
+        self.assertEqual(os.listdir(cachedir), [])
+
+    def test_researched(self):
+        """ check whether restricting parts to researched nodes equals filtering all designs """
+        researched = [Node.HeavyRocketry, Node.Stability]
+        nodes = researched_with_dependencies(researched)
+        expected = [d for d in Finder(*MISSION).find(False) if d.requiredscience.nodes <= nodes]
+        designs = Finder(*MISSION, researched=researched).find(False)
+        self.assertEqual(summary(designs), summary(expected))
+        self.assertTrue(any(d.sfbcount > 1 for d in designs))
+        # SFBs cannot be stacked without Engineering101
+        restricted = candidate_groups(True, BUILTIN.restrict(researched))
+        self.assertFalse(any(c.sfbcount == 1 for first_only, group in restricted for c in group))
+        self.assertTrue(any(c.sfbcount == 1 for first_only, group in candidate_groups(True) for c in group))
+        self.assertIs(BUILTIN.restrict(researched), BUILTIN.restrict(nodes))
+        self.assertEqual(BUILTIN.restrict([Node.Start]).engines[FuelTypes.LiquidFuel], [])
+
+    def test_tank_multiples(self):
+        """ check whether tanks of any whole multiple of the smallest one are packed """
+        data = parse_cfg(CFG)
+        data['fuel_tanks'][1].update(name='FL-T300 Fuel Tank', m_full='1687.5', cost='350')
+        parts = from_dict(data)
+        designs = Finder(5000, None, [1000], [5.0], [0.0], [True], 0, True, False, False, False,
+                         catalog=parts).find()
+        self.assertEqual(len(designs), 1)
+        self.assertIn('FL-T300 Fuel Tank', [t.name for c, t in designs[0].fueltanks])
+
+    def test_invalid(self):
+        data = parse_cfg(CFG)
+        from_dict(data)
+        for change in [lambda d: d['engines'][0].pop('m'),
+                       lambda d: d['engines'][0].update(size='Huge'),
+                       lambda d: d['engines'][0].update(level='Nowhere'),
+                       lambda d: d['engines'][0].update(cost='cheap'),
+                       lambda d: d['engines'][0].update(thrust='1'),
+                       lambda d: d['fuel_tanks'][1].update(m_full='1000'),
+                       lambda d: d['fuel_tanks'][0].update(size='RadiallyMounted'),
+                       lambda d: d.update(sfbs={}),
+                       lambda d: d.update(wings=[])]:
+            data = parse_cfg(CFG)
+            change(data)
+            self.assertRaises(CatalogError, from_dict, data)
+        for text in ["ENGINE\n{\nname = x\n", "ENGINE\n{\nname\n}\n", "WING\n{\n}\n", "name = x\n"]:
+            self.assertRaises(CatalogError, parse_cfg, text)
+
+
+if __name__ == '__main__':
+    unittest.main()
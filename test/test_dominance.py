@@ -0,0 +1,48 @@
+import random
+import unittest
+
+from kspalculator import parts
+from kspalculator.design import Design, find_designs
+from kspalculator.dominance import mark_best
+
+
+def all_pairs(designs, *prefs):
+    for d in designs:
+        for e in designs:
+            if (d is not e) and e.is_best and not d.is_better_than(e, *prefs):
+                d.is_best = False
+                break
+
+
+class TestDominance(unittest.TestCase):
+    def check(self, designs, prefs):
+        for d in designs:
+            d.is_best = True
+        all_pairs(designs, *prefs)
+        expected = [d.is_best for d in designs]
+        for d in designs:
+            d.is_best = True
+        mark_best(designs, *prefs)
+        self.assertEqual([d.is_best for d in designs], expected)
+
+    def test_find_designs(self):
+        designs = find_designs(6370, [1.0, 0.18], [905, 3650], [13.0, 13.0], 2*[True], sfballowed=True)
+        for prefs in [(None, 0, False, False, False), (parts.RadialSize.Small, 1, False, False, True),
+                      (parts.RadialSize.Large, 2, True, True, False)]:
+            self.check(designs, prefs)
+
+    def test_ties(self):
+        rnd = random.Random(1)
+        designs = []
+        for _ in range(300):
+            eng = rnd.choice(parts.LiquidFuelEngines)
+            d = Design(1000, eng, 1, eng.size, parts.FuelTypes.LiquidFuel)
+            if rnd.random() < 0.5:
+                d.add_sfb(rnd.choice(parts.SolidFuelBoosters), rnd.choice([1, 2]))
+            # few distinct values, so that many designs are equal by mass and cost
+            d._final_mass = float(rnd.randint(1, 8))
+            d._final_cost = float(rnd.randint(1, 8))
+            d.performance = ([rnd.choice([1000, 1001])],)
+            designs.append(d)
+        self.check(designs, (None, 0, False, False, False))
+        self.check(designs, (parts.RadialSize.Small, 2, True, True, True))
@@ -1,7 +1,12 @@
+from __future__ import division
+
 import unittest
 
+from kspalculator.cache import ResultCache
+from kspalculator.design import SearchSpace, create_sfb_designs
 from kspalculator.finder import Finder
 from kspalculator.parts import RadialSize
+from kspalculator.stats import Stats
 
 
 class TestFinder(unittest.TestCase):
@@ -12,3 +17,138 @@ class TestFinder(unittest.TestCase):
                 False, False, False, True, True)
         designs = f.find()
         self.assertEqual(len(designs), 7)
+
+    def test_find_many(self):
+        """ check whether find_many() gives the same results as find() """
+        finders = [Finder(payload, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                          1, boosters, False, False, False)
+                   for payload in [2000, 6370] for boosters in [False, True]]
+        def summary(designs):
+            return [(d.mainengine, d.mainenginecount, d.sfb, d.sfbcount, d.eng_F_percentage, d.get_mass(),
+                     d.get_cost(), d.is_best) for d in designs]
+        many = Finder.find_many(finders, best_only=False)
+        self.assertEqual(len(many), len(finders))
+        for finder, designs in zip(finders, many):
+            self.assertEqual(summary(designs), summary(finder.find(best_only=False)))
+
+    def test_workers(self):
+        """ check whether parallel creation of designs gives the same result """
+        f = Finder(6370, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                   1, True, False, False, False)
+        serial = f.find(best_only=False)
+        parallel = f.find(best_only=False, workers=3)
+        self.assertEqual([str(d) for d in parallel], [str(d) for d in serial])
+        self.assertEqual([d.is_best for d in parallel], [d.is_best for d in serial])
+
+    def test_design_cache(self):
+        """ check whether designs cached for other preferences are ranked like new ones """
+        cache = ResultCache()
+        def finder(size, gimbal, electricity, length, design_cache=None):
+            return Finder(6370, size, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True], gimbal, True,
+                          electricity, length, False, design_cache=design_cache)
+        def summary(designs):
+            return [(str(d), d.is_best, sorted(f.name for f in d.features)) for d in designs]
+        first = finder(RadialSize.Small, 0, False, False, cache).find()
+        expected = summary(first)
+        for preferences in [(RadialSize.Large, 2, True, False), (None, 1, False, True),
+                            (RadialSize.Small, 0, False, False)]:
+            stats = Stats()
+            designs = finder(*preferences, design_cache=cache).find(best_only=False, stats=stats)
+            self.assertEqual(summary(designs), summary(finder(*preferences).find(best_only=False)))
+            self.assertEqual(stats.cache_hits, 1)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+        # ranking again does not change designs returned before
+        self.assertEqual(summary(first), expected)
+        self.assertEqual(finder(None, 0, False, False).mission_signature(),
+                         finder(RadialSize.Large, 2, True, True).mission_signature())
+
+    def test_iter_designs(self):
+        """ check whether streamed designs lead to the same best designs """
+        f = Finder(6370, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                   1, True, False, False, False)
+        archive = f.archive()
+        count = 0
+        for d in f.iter_designs():
+            archive.add(d)
+            count += 1
+        self.assertEqual(count, len(f.find(best_only=False)))
+        def key(d):
+            return d.get_mass(), d.get_cost(), d.mainengine.name, d.mainenginecount, d.size.value, d.sfbcount
+        self.assertEqual(sorted(key(d) for d in archive.best()), sorted(key(d) for d in f.find()))
+
+    def test_sweep_payload(self):
+        """ check whether payload sweep gives the same results as find() """
+        def finder(payload):
+            return Finder(payload, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                          1, False, False, False, False)
+        payloads = [0, 500, 1000, 3000, 6370, 20000]
+        sweep = finder(0).sweep_payload(payloads)
+        self.assertEqual(sweep.payloads, payloads)
+        for payload, designs in zip(payloads, sweep.designs):
+            self.assertEqual([str(d) for d in designs], [str(d) for d in finder(payload).find()])
+        for payload, previous, current in sweep.breakpoints:
+            self.assertNotEqual(previous and previous.mainengine, current and current.mainengine)
+        self.assertEqual(sweep.breakpoints[-1][0], 20000)
+        self.assertIsNone(sweep.breakpoints[-1][2])
+
+    def test_sweep_acceleration(self):
+        """ check whether acceleration sweep gives the same results as find() """
+        def finder(accelerations):
+            return Finder(6370, RadialSize.Small, [905, 3650], accelerations, [1.0, 0.18], 2*[True],
+                          1, True, False, False, False)
+        variants = [[0.0, 0.0], [8.0, 5.0], [10.0, 13.0], [13.0, 13.0], [16.0, 8.0]]
+        sweep = finder([13.0, 13.0]).sweep_acceleration(variants, best_only=False)
+        for accelerations, designs in zip(variants, sweep):
+            expected = finder(accelerations).find(best_only=False)
+            self.assertEqual([str(d) for d in designs], [str(d) for d in expected])
+            self.assertEqual([d.is_best for d in designs], [d.is_best for d in expected])
+        self.assertGreater(len(sweep[1]), len(sweep[3]))
+        self.assertRaises(ValueError, finder([13.0, 13.0]).sweep_acceleration, [[13.0]])
+
+    def test_notes(self):
+        """ check whether notes are derived from the parts of a design """
+        f = Finder(6370, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                   1, True, False, False, False)
+        radial = [d for d in f.find(best_only=False) if d.sfbcount > 1]
+        self.assertTrue(radial)
+        for d in radial:
+            self.assertEqual(d.notes[0], "Radially attached %i * %s SFB" % (d.sfbcount, d.sfb.name))
+            self.assertIn("Set liquid fuel engine thrust to {:.0%} while SFB are burning".format(
+                d.eng_F_percentage), d.notes)
+            self.assertFalse(hasattr(d, '__dict__'))
+            self.assertFalse(hasattr(d.requiredscience, '__dict__'))
+
+    def test_stats(self):
+        """ check whether stats account for every candidate, also with parallel workers """
+        f = Finder(6370, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                   1, True, False, False, False)
+        counts = []
+        for workers in [None, 2]:
+            stats = Stats()
+            designs = f.find(best_only=False, workers=workers, stats=stats)
+            self.assertEqual(stats.designs, len(designs))
+            self.assertEqual(stats.best, sum(d.is_best for d in designs))
+            self.assertEqual(sum(stats.candidates.values()),
+                             sum(stats.rejected.values()) + stats.best)
+            self.assertGreater(stats.sflf_iterations, 0)
+            d = stats.as_dict()
+            del d['times']
+            counts.append(d)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_thrust_limit(self):
+        """ check whether searching thrust limits beats trying the former fixed limits """
+        pressure, dv, acc, sfb_allowed = [1.0, 0.18], [905, 3650], [13.0, 13.0], 2*[True]
+        space = SearchSpace(pressure, True)
+        searched = [c for first_only, group in space.groups for c in group
+                    if c.sfb is not None and c.eng_F_percentage is None]
+        fixed = [c._replace(eng_F_percentage=limit) for c in searched for limit in [0, 1/3, 1/2, 2/3, 1]]
+        stats = [Stats(), Stats()]
+        by_search = create_sfb_designs(6370, pressure, dv, acc, sfb_allowed, searched, space, stats[0])
+        by_limits = create_sfb_designs(6370, pressure, dv, acc, sfb_allowed, fixed, space, stats[1])
+        self.assertLess(stats[0].sfb_evaluations, stats[1].sfb_evaluations)
+        for i, d in enumerate(by_search):
+            found = [f.get_mass() for f in by_limits[5*i:5*i+5] if f is not None]
+            if found:
+                self.assertLessEqual(d.get_mass(), min(found))
+        self.assertTrue(any(d is not None and d.eng_F_percentage not in [0, 1/3, 1/2, 2/3, 1] for d in by_search))
@@ -0,0 +1,77 @@
+import unittest
+
+from kspalculator import parts
+from kspalculator.design import Candidate, SearchSpace, create_design
+from kspalculator.finder import Finder
+from kspalculator.inverse import max_payload, max_payloads
+from kspalculator.parts import RadialSize
+
+
+class TestInverse(unittest.TestCase):
+    def setUp(self):
+        self.mission = Finder(0, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                              1, True, False, False, False)
+
+    def feasible(self, candidate, payload, mission=None):
+        m = mission or self.mission
+        return create_design(payload, m.pressures, m.delta_vs, m.accelerations, m.sfb_allowed,
+                             candidate) is not None
+
+    def test_max_payload(self):
+        """ check whether max_payload() of an engine is the last feasible payload """
+        vector = [e for e in parts.LiquidFuelEngines if e.name == 'S3 KS-25 Vector'][0]
+        result = max_payload(vector, 1, parts.FuelTypes.LiquidFuel, None, self.mission)
+        self.assertGreater(result.payload, 0.0)
+        self.assertLessEqual(result.evaluations, 20)
+        self.assertAlmostEqual(result.design.payload, result.payload)
+        found = Finder(result.payload, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                       1, False, False, False, False).find(best_only=False)
+        self.assertIn(vector, [d.mainengine for d in found])
+        found = Finder(result.payload + 1.0, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18],
+                       2*[True], 1, False, False, False, False).find(best_only=False)
+        self.assertNotIn(vector, [d.mainengine for d in found])
+
+    def test_max_payloads(self):
+        """ check whether max_payloads() agrees with creating designs at that payload """
+        results = max_payloads(self.mission)
+        self.assertTrue(any(c.sfb is not None and r.payload is not None for c, r in results))
+        for candidate, result in results[::37]:
+            if result.payload is None:
+                for payload in [0.0, 1000.0, 10000.0]:
+                    self.assertFalse(self.feasible(candidate, payload))
+            else:
+                self.assertTrue(self.feasible(candidate, result.payload))
+                self.assertFalse(self.feasible(candidate, result.payload + 1.0))
+
+    def test_sfb_gaps(self):
+        """ check whether max_payload() of SFB designs finds narrow and upper ranges of feasible payloads """
+        # SFBs must burn out within the first phase, so they are too strong for small payloads
+        mission = Finder(0, RadialSize.Small, [1000, 3000], [15.0, 5.0], [1.0, 0.5], [True, False],
+                         1, True, False, False, False)
+        def part(table, name):
+            return [p for p in table if p.name == name][0]
+        for eng, count, sfb, sfbcount, feasible in [('24-77 Twitch', 8, 'RT-10 Hammer', 3, 1000.0),
+                                                    ('Mk-55 Thud', 3, 'RT-10 Hammer', 8, 2750.0),
+                                                    ('LFB Twin-Boar', 1, 'BACC Thumper', 2, 15500.0)]:
+            eng = part(parts.LiquidFuelEngines, eng)
+            sfb = part(parts.SolidFuelBoosters, sfb)
+            size = RadialSize.Tiny if eng.size is RadialSize.RadiallyMounted else eng.size
+            candidate = Candidate(eng, size, count, parts.FuelTypes.LiquidFuel, None, sfb, sfbcount, None)
+            self.assertTrue(self.feasible(candidate, feasible, mission))
+            result = max_payload(eng, count, parts.FuelTypes.LiquidFuel, None, mission, sfb, sfbcount)
+            self.assertGreaterEqual(result.payload, feasible)
+            self.assertTrue(self.feasible(candidate, result.payload, mission))
+            self.assertFalse(self.feasible(candidate, result.payload + 1.0, mission))
+
+    def test_packing(self):
+        """ check whether max_payloads() chooses tanks like find() with the tank packing of the mission """
+        mission = Finder(0, None, [3000], [10.0], [0.0], [True], 0, False, False, False, False, packing='cost')
+        space = SearchSpace(mission.pressures, packing='cost')
+        def create(candidate, payload):
+            return create_design(payload, mission.pressures, mission.delta_vs, mission.accelerations,
+                                 mission.sfb_allowed, candidate, space)
+        for candidate, result in max_payloads(mission):
+            if result.design is None:
+                continue
+            self.assertEqual(result.design.fueltanks, create(candidate, result.payload).fueltanks)
+            self.assertIsNone(create(candidate, result.payload + 1.0))
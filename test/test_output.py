@@ -0,0 +1,49 @@
+import csv
+import json
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from kspalculator.finder import Finder
+from kspalculator.output import CSV_COLUMNS, design_record, write_csv, write_json, write_jsonl
+from kspalculator.parts import RadialSize
+
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        self.designs = Finder(6370, RadialSize.Small, [905, 3650], [13.0, 13.0], [1.0, 0.18], 2*[True],
+                              1, True, False, False, False).find()
+
+    def test_json(self):
+        """ check whether json and jsonl output contain the same records """
+        out = StringIO()
+        write_json(self.designs, out)
+        records = json.loads(out.getvalue())
+        self.assertEqual(len(records), len(self.designs))
+        out = StringIO()
+        write_jsonl(self.designs, out)
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], records)
+        for d, r in zip(self.designs, records):
+            self.assertEqual(r['mass'], d.get_mass())
+            self.assertEqual(r['cost'], d.get_cost())
+            self.assertEqual(len(r['phases']), len(d.performance[0]))
+            self.assertEqual(sum(p['dv'] for p in r['phases']), sum(d.performance[0]))
+        out = StringIO()
+        write_json([], out)
+        self.assertEqual(json.loads(out.getvalue()), [])
+
+    def test_csv(self):
+        """ check whether csv output has one row per phase of each design """
+        out = StringIO()
+        write_csv(self.designs, out)
+        reader = csv.DictReader(StringIO(out.getvalue()))
+        rows = list(reader)
+        self.assertEqual(len(rows), sum(len(d.performance[0]) for d in self.designs))
+        self.assertEqual(reader.fieldnames, CSV_COLUMNS)
+        for row in rows:
+            d = self.designs[int(row['design'])]
+            self.assertEqual(row['title'], design_record(d)['title'])
+            self.assertAlmostEqual(float(row['mass']), d.get_mass())
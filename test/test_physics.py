@@ -3,11 +3,63 @@
 # Python 2.7 support.
 from __future__ import division
 
+import random
 import unittest
+from math import exp, fsum
 
 import kspalculator.physics as physics
 
 
+def _fixed_point_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, precision=0.001):
+    # former implementation of physics.sflf_needed_fuel() by fixed-point iteration, as reference
+    # It stops once a step is below precision, which leaves it short of the fixed point by up to
+    # precision*L/(1-L) for contraction rate L, i.e. by some 0.002 kg with precision=0.001 if L is about 2/3.
+    g_0 = physics.g_0
+    def s(Isp, m_s, m_t, m_c):
+        return physics.dv_s(Isp, m_s, m_t, m_p, m_x, m_c)
+    n = len(dv)-1
+    f_limits = (n+1) * [None]
+    def mc_solid(i):
+        return ((sm_s-sm_t)/(exp(fsum([dv[k]/I_sps[k] for k in range(0,i+1)])/g_0)-1)-m_p-sm_t-m_x)*8/9
+    for i in range(n+1):
+        f_limits[i] = mc_solid(i)
+        if f_limits[i] < 0:
+            f_limits[i+1 : n+1] = (n-i) * [-1]
+            break
+    else:
+        # SFBs are too strong
+        return None
+    def f_adjust(mc, d):
+        if d<=0:
+            for i in range(0 if d==0 else f,n+1):
+                if f_limits[i] < mc:
+                    return i
+        else:
+            for i in range(f-1,-1,-1):
+                if f_limits[i] >= mc:
+                    return i+1
+            return 0
+    f = f_adjust(0,0)
+    def mc_improve(mc_old):
+        m_f = exp(-fsum([dv[k]/I_sps[k] for k in range(0,f)])/g_0)
+        m_f = sm_s*m_f+(m_f-1)*(m_p+9/8*mc_old+m_x)
+        return physics.lf_needed_fuel([dv[f]-s(I_sps[f],m_f,sm_t,mc_old)]+dv[f+1:n+1], I_spl[f:n+1], m_p, 1/8)
+    m_c = 2 * [None]
+    current = 1
+    m_c[0] = mc_improve(0)
+    if m_c[0] is None:
+        return None
+    f = f_adjust(m_c[0],1)
+    while True:
+        m_c[current] = mc_improve(m_c[(current+1)%2])
+        if m_c[current] is None:
+            return None
+        if m_c[current] - m_c[(current+1)%2] < precision:
+            return m_c[current]
+        f = f_adjust(m_c[current],1)
+        current = (current+1)%2
+
+
 class TestPhysics(unittest.TestCase):
     def assertListAlmostEqual(self, first, second):
         if len(first) != len(second):
@@ -44,6 +96,50 @@ class TestPhysics(unittest.TestCase):
         self.assertAlmostEqual(m_cb, 11990.20, places=1)
         m_c = physics.sflf_needed_fuel([905, 3650], [260, 284.6], [195, 215.5], 10040, 50, 24000, 4500)
         self.assertAlmostEqual(m_c, 63162.60, places=1)
+    def test_sflf_iterations(self):
+        """ check whether the root-finder needs fewer rounds than fixed-point iteration (14 and 16) """
+        for dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, expected, rounds in [
+                ([2500, 2000], [250, 320], [195,220], 15000, 50, 24000, 4500, 104716.64, 8),
+                ([905, 3650], [260, 284.6], [195, 215.5], 10040, 50, 24000, 4500, 63162.60, 8)]:
+            iterations = []
+            m_c = physics.sflf_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, iterations=iterations)
+            self.assertAlmostEqual(m_c, expected, places=1)
+            self.assertEqual(iterations, len(iterations)*[1])
+            self.assertLessEqual(len(iterations), rounds)
+        # needed fuel is not increasing for negative specific impulse, but the search still ends, at the root
+        # which fixed-point iteration misses by 20 kg, stopping at its first decreasing step
+        args = ([1200, 1800], [-955, 85], [40, 140], 2500, 50, 1500, 450)
+        m_c = physics.sflf_needed_fuel(*args)
+        self.assertAlmostEqual(m_c, 96510.42, places=1)
+        r_dv = physics.sflf_performance(args[0], args[1], args[2], [0,0], [0,0], [0,0], args[3], m_c, *args[4:])[0]
+        self.assertAlmostEqual(r_dv[-1], 0, places=6)
+        self.assertAlmostEqual(_fixed_point_needed_fuel(*args), 96490.46, places=1)
+        self.assertIsNone(physics.sflf_needed_fuel([328.38, 1589.86], [-23.65, 58.59], [176.87, 164.49], 5029.48,
+                                                   55.62, 16090.32, 4072.10))
+    def test_sflf_reference(self):
+        """ compare the root-finder with fixed-point iteration, also for infeasible designs """
+        # tests which once failed: no needed fuel, although the secant passes a pole of g
+        args = ([846, 2207, 2013, 1709], [303, 337, 289, 318], [226, 186, 196, 199], 1236, 400, 16540, 4484)
+        self.assertIsNone(_fixed_point_needed_fuel(*args))
+        self.assertIsNone(physics.sflf_needed_fuel(*args))
+        rng = random.Random(1)
+        infeasible = 0
+        for i in range(500):
+            n = rng.randint(1, 4)
+            args = ([rng.uniform(100, 2500) for k in range(n)], [rng.uniform(250, 350) for k in range(n)],
+                    [rng.uniform(150, 230) for k in range(n)], rng.uniform(100, 30000), rng.uniform(0, 400),
+                    rng.uniform(1000, 40000))
+            args += (args[-1] * rng.uniform(0.15, 0.35),)
+            # fixed-point iteration stops early if it converges slowly, so let it converge further
+            expected = _fixed_point_needed_fuel(*args, precision=1e-6)
+            m_c = physics.sflf_needed_fuel(*args)
+            if expected is None:
+                infeasible += 1
+                self.assertIsNone(m_c, args)
+            else:
+                self.assertAlmostEqual(m_c, expected, delta=0.001, msg=args)
+                self.assertAlmostEqual(m_c, _fixed_point_needed_fuel(*args), delta=0.003, msg=args)
+        self.assertGreater(infeasible, 50)
     def test_sflf_performance(self):
         # pylint:disable=unused-variable
         r_dv, r_p, r_a_s, r_a_t, r_m_s, r_m_t, r_solid, r_op = \
@@ -69,4 +165,43 @@ class TestPhysics(unittest.TestCase):
         self.assertListAlmostEqual(r_m_s, [22975.0, 21465.04, 17875.0, 13333.60, 10959.29])
         self.assertListAlmostEqual(r_m_t, [21465.04, 18975.0, 13333.60, 10959.29, 10875.0])
         self.assertListEqual(r_solid, [True, True, False, False, False])
-        self.assertListEqual(r_op, [0, 1, 1, 2, 2])
\ No newline at end of file
+        self.assertListEqual(r_op, [0, 1, 1, 2, 2])
+    def test_lf_batch(self):
+        # batched functions must give exactly the results of the scalar ones
+        dv = [1750, 580, 310, 792]
+        p = [1.0, 0.5, 0, 0]
+        I_sp = [4*[345], 3*[345]+[300], [85, 90, 95, 95], 4*[345], 4*[4200]]
+        F = [4*[60000], 4*[60000], [200000, 210000, 215000, 215000], 4*[120000], 4*[2000]]
+        m_p = [1500, 1500, 8000, 200000, 1000]
+        f_e = [1/8, 1/8, 1/8, 5/18, 11/14]
+        m_c = physics.lf_needed_fuel_batch(dv, I_sp, m_p, f_e)
+        self.assertEqual(m_c, [physics.lf_needed_fuel(dv, I_sp[j], m_p[j], f_e[j]) for j in range(5)])
+        self.assertIsNone(m_c[2])
+        feasible = [j for j in range(5) if m_c[j] is not None]
+        perf = physics.lf_performance_batch(dv, [I_sp[j] for j in feasible], [F[j] for j in feasible], p,
+                                            [m_p[j] for j in feasible], [m_c[j] for j in feasible],
+                                            [f_e[j] for j in feasible])
+        for j, r in zip(feasible, perf):
+            self.assertEqual(r, physics.lf_performance(dv, I_sp[j], F[j], p, m_p[j], m_c[j], f_e[j]))
+    def test_sflf_batch(self):
+        cases = [([2500, 2000], [250, 320], [195,220], 15000, 50, 24000, 4500),
+                 ([2000], [250], [150], 10000, 200, 10000, 2000),
+                 ([2000], [250], [150], 1000, 200, 100000, 2000),
+                 ([150, 2000], [240, 250], [130, 150], 10000, 200, 10000, 2000),
+                 ([905, 3650], [260, 284.6], [195, 215.5], 10040, 50, 24000, 4500)]
+        for dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t in cases:
+            batch = physics.sflf_needed_fuel_batch(dv, 3*[I_spl], 3*[I_sps], [m_p, 2*m_p, 20*m_p], 3*[m_x],
+                                                   [sm_s, sm_s, 2*sm_s], 3*[sm_t])
+            scalar = [_fixed_point_needed_fuel(dv, I_spl, I_sps, m_p, m_x, sm_s, sm_t, 1e-6),
+                      _fixed_point_needed_fuel(dv, I_spl, I_sps, 2*m_p, m_x, sm_s, sm_t, 1e-6),
+                      _fixed_point_needed_fuel(dv, I_spl, I_sps, 20*m_p, m_x, 2*sm_s, sm_t, 1e-6)]
+            for b, s in zip(batch, scalar):
+                if s is None:
+                    self.assertIsNone(b)
+                else:
+                    self.assertAlmostEqual(b, s, delta=0.001)
+        m_c = physics.sflf_concurrent_needed_fuel_batch([905, 3650], 2*[[260, 284.6]], 2*[[195, 215.5]],
+                                                         2*[10040], 2*[50], 2*[24000], 2*[4500], [0.0, 0.5])
+        self.assertAlmostEqual(m_c[0], 63162.60, places=1)
+        self.assertAlmostEqual(m_c[1], physics.sflf_concurrent_needed_fuel([905, 3650], [260, 284.6], [195, 215.5],
+                                                                           10040, 50, 24000, 4500, 0.5), delta=0.001)
@@ -0,0 +1,73 @@
+import io
+import sys
+import unittest
+
+from kspalculator.finder import Finder
+from kspalculator.parts import RadialSize
+
+if sys.version_info.major >= 3:
+    # the command line, which the session builds on, needs Python 3
+    from kspalculator.repl import Session, Shell
+
+
+def summary(designs):
+    return [(d.get_title(), d.get_mass(), d.get_cost(), sorted(f.name for f in d.features)) for d in designs]
+
+
+@unittest.skipIf(sys.version_info.major < 3, "needs Python 3")
+class TestRepl(unittest.TestCase):
+    def setUp(self):
+        self.session = Session()
+        self.output = io.StringIO()
+        self.shell = Shell(self.session, stdout=self.output)
+        for line in ['payload 6370', 'phases 905:13:1 3650:13:0.18', 'set boosters yes', 'set radius small']:
+            self.shell.onecmd(line)
+
+    def expected(self, gimbal=0, electricity=False, acceleration=13.0):
+        finder = Finder(6370, RadialSize.Small, [905, 3650], [13.0, acceleration], [1.0, 0.18], 2*[True],
+                        gimbal, True, electricity, False, False)
+        return summary(finder.find())
+
+    def test_session(self):
+        """ check whether changing preferences only ranks the designs again """
+        self.assertEqual(summary(self.session.designs()), self.expected())
+        self.assertEqual(self.session.evaluations, 1)
+        self.session.set('gimbal', '2')
+        self.session.set('electricity', 'true')
+        self.assertEqual(summary(self.session.designs()), self.expected(2, True))
+        self.assertEqual(self.session.evaluations, 1)
+        self.session.phases[1] = (3650, 10.0, 0.18, True)
+        self.assertEqual(summary(self.session.designs()), self.expected(2, True, 10.0))
+        self.assertEqual(self.session.evaluations, 2)
+        # the previous mission is still known
+        self.session.phases[1] = (3650, 13.0, 0.18, True)
+        self.session.set('gimbal', '0')
+        self.session.set('electricity', 'false')
+        self.assertEqual(summary(self.session.designs()), self.expected())
+        self.assertEqual(self.session.evaluations, 2)
+        self.session.set('cheapest', 'true')
+        designs = self.session.designs()
+        self.assertEqual(self.session.evaluations, 2)
+        self.assertEqual([d.get_cost() for d in designs], sorted(d.get_cost() for d in designs))
+
+    def test_shell(self):
+        self.shell.onecmd('run')
+        self.assertIn("(evaluated in", self.output.getvalue())
+        self.shell.onecmd('set gimbal 1')
+        self.shell.onecmd('run')
+        self.assertIn("(ranked in", self.output.getvalue())
+        self.shell.onecmd('phase 3 100')
+        self.assertEqual(self.session.phases[2], (100.0, 0.0, 0.0, True))
+        self.shell.onecmd('drop 1')
+        self.assertEqual([p[0] for p in self.session.phases], [3650.0, 100.0])
+        for line in ['phase 4 100', 'phase 1 -5', 'set radius huge', 'set gimbal 3', 'payload x', 'drop']:
+            self.output.seek(0)
+            self.output.truncate()
+            self.assertFalse(self.shell.onecmd(line))
+            self.assertTrue(self.output.getvalue().startswith("Error:"), line)
+        self.assertEqual(len(self.session.phases), 2)
+        self.assertTrue(self.shell.onecmd('quit'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import socket
+import sys
+import threading
+import unittest
+
+from kspalculator.finder import Finder
+from kspalculator.output import design_record
+from kspalculator.parts import RadialSize
+
+# the server uses async/await
+if sys.version_info >= (3, 5):
+    import asyncio
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+    from kspalculator.server import Server
+
+LANDER = {'payload': 1320, 'phases': [{'dv': 1170}, {'dv': 580, 'acceleration': 3.3},
+                                      {'dv': 580, 'acceleration': 5.0}, {'dv': 210}, {'dv': 700}],
+          'preferred_radius': 'small', 'length': True, 'monopropellant': True}
+LAUNCHER = {'payload': 6370, 'phases': [{'dv': 905, 'acceleration': 13.0, 'pressure': 1.0},
+                                        {'dv': 3650, 'acceleration': 13.0, 'pressure': 0.18}],
+            'preferred_radius': 'small', 'gimbal': 1, 'boosters': True}
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "needs Python 3.5")
+class TestServer(unittest.TestCase):
+    def start(self, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.server = Server(port=0, **kwargs)
+        self.loop.run_until_complete(self.server.start())
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.run_until_complete(self.server.close())
+        self.loop.close()
+
+    def request(self, path, mission=None):
+        data = json.dumps(mission).encode('utf-8') if mission is not None else None
+        try:
+            with urlopen('http://127.0.0.1:%i%s' % (self.server.port, path), data) as f:
+                return f.status, json.loads(f.read().decode('utf-8'))
+        except HTTPError as e:
+            return e.code, json.loads(e.read().decode('utf-8'))
+
+    def test_find(self):
+        """ check whether the server answers like Finder.find() and caches results """
+        self.start()
+        status, answer = self.request('/find', LANDER)
+        self.assertEqual(status, 200)
+        self.assertFalse(answer['cached'])
+        expected = Finder(1320, RadialSize.Small, [1170, 580, 580, 210, 700], [0.0, 3.3, 5.0, 0.0, 0.0], 5*[0.0],
+                          5*[True], 0, False, False, True, True).find()
+        self.assertEqual(answer['designs'], json.loads(json.dumps([design_record(d) for d in expected])))
+        status, answer = self.request('/find', LANDER)
+        self.assertTrue(answer['cached'])
+        self.assertEqual(self.request('/find', dict(LANDER, payload=-1))[0], 400)
+        self.assertEqual(self.request('/find', dict(LANDER, phases=[{}]))[0], 400)
+        self.assertEqual(self.request('/unknown')[0], 404)
+        status, stats = self.request('/stats')
+        self.assertEqual(stats['cache']['hits'], 1)
+        self.assertEqual(stats['errors'], 3)
+        self.assertIsNotNone(stats['latency']['p50'])
+
+    def test_limits(self):
+        """ check whether timeouts and the limit of pending requests are applied """
+        self.start(max_pending=1, timeout=0.001)
+        self.assertEqual(self.request('/find', LAUNCHER)[0], 504)
+        # still being computed
+        self.assertEqual(self.request('/find', LANDER)[0], 503)
+        status, stats = self.request('/stats')
+        self.assertEqual((stats['timeouts'], stats['rejected']), (1, 1))
+
+    def raw_request(self, sock, request):
+        sock.sendall(request)
+        response = b''
+        while b'\r\n\r\n' not in response:
+            response += sock.recv(4096)
+        head, _, body = response.partition(b'\r\n\r\n')
+        length = int([l for l in head.split(b'\r\n') if l.lower().startswith(b'content-length:')][0][15:])
+        while len(body) < length:
+            body += sock.recv(4096)
+        return int(head.split()[1]), json.loads(body.decode('utf-8'))
+
+    def test_errors(self):
+        """ check whether errors while answering are told apart from invalid requests """
+        self.start()
+        def fail(mission):
+            raise ValueError("failed in worker")
+        self.server.find = fail
+        body = json.dumps(LANDER).encode('utf-8')
+        sock = socket.create_connection(('127.0.0.1', self.server.port))
+        try:
+            request = b'POST /find HTTP/1.1\r\nContent-Length: %i\r\n\r\n' % len(body) + body
+            status, answer = self.raw_request(sock, request)
+            self.assertEqual(status, 500)
+            self.assertEqual(answer['error'], "ValueError: failed in worker")
+            # the connection is kept
+            self.assertEqual(self.raw_request(sock, b'GET /health HTTP/1.1\r\n\r\n'), (200, {'status': 'ok'}))
+            status, answer = self.raw_request(sock, b'POST /find HTTP/1.1\r\nContent-Length: many\r\n\r\n')
+            self.assertEqual((status, answer['error']), (400, "Invalid Content-Length"))
+        finally:
+            sock.close()
@@ -0,0 +1,64 @@
+import unittest
+
+from kspalculator.design import find_designs
+from kspalculator.finder import Finder
+from kspalculator.parts import RadialSize
+
+DV = [1000, 2400, 860, 310, 580, 580, 310]
+ACC = [13.0, 10.0, 2.0, 0.0, 3.0, 5.0, 0.0]
+PRESSURE = [1.0, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+class TestStaging(unittest.TestCase):
+    def test_find_staging(self):
+        """ check whether find_staging() finds the lightest split into stages """
+        finder = Finder(1000, RadialSize.Small, DV, ACC, PRESSURE, 7*[True], 0, False, False, False, False)
+        staged = finder.find_staging(3)
+        self.assertTrue(staged)
+        self.assertEqual(staged, sorted(staged, key=lambda s: (s.mass, s.cost)))
+        for rocket in staged:
+            # stages are consecutive and carry each other
+            self.assertEqual(rocket.stages[0].first_phase, 0)
+            self.assertEqual(rocket.stages[-1].end_phase, len(DV))
+            self.assertEqual(rocket.stages[-1].design.payload, 1000)
+            for lower, upper in zip(rocket.stages, rocket.stages[1:]):
+                self.assertEqual(lower.end_phase, upper.first_phase)
+                self.assertEqual(lower.design.payload, upper.design.get_mass())
+            self.assertEqual(rocket.mass, rocket.stages[0].design.get_mass())
+
+        # compare with trying all splits into two stages
+        best = float('inf')
+        for split in range(1, len(DV)):
+            upper = [d for d in find_designs(1000, PRESSURE[split:], DV[split:], ACC[split:], 7*[True],
+                                             RadialSize.Small) if d.is_best]
+            if not upper:
+                continue
+            payload = min(d.get_mass() for d in upper)
+            lower = [d for d in find_designs(payload, PRESSURE[:split], DV[:split], ACC[:split], 7*[True],
+                                             RadialSize.Small) if d.is_best]
+            if lower:
+                best = min(best, min(d.get_mass() for d in lower))
+        two = [rocket for rocket in staged if len(rocket.stages) == 2]
+        self.assertEqual(len(two), 1)
+        self.assertAlmostEqual(two[0].mass, best)
+        self.assertLessEqual(staged[0].mass, best)
+
+    def test_boosters(self):
+        """ check whether the lightest split is found if SFBs are only allowed at launch """
+        sfb_allowed = [True, False, False, False]
+        finder = Finder(1000, RadialSize.Small, DV[:4], ACC[:4], PRESSURE[:4], sfb_allowed, 0, True, False, False,
+                        False)
+        two = [rocket for rocket in finder.find_staging(2) if len(rocket.stages) == 2]
+        best = float('inf')
+        for split in range(1, 4):
+            upper = [d for d in find_designs(1000, PRESSURE[split:4], DV[split:4], ACC[split:4], sfb_allowed[split:],
+                                             RadialSize.Small, sfballowed=any(sfb_allowed[split:])) if d.is_best]
+            if not upper:
+                continue
+            payload = min(d.get_mass() for d in upper)
+            lower = [d for d in find_designs(payload, PRESSURE[:split], DV[:split], ACC[:split], sfb_allowed[:split],
+                                             RadialSize.Small, sfballowed=True) if d.is_best]
+            if lower:
+                best = min(best, min(d.get_mass() for d in lower))
+        self.assertEqual(len(two), 1)
+        self.assertAlmostEqual(two[0].mass, best)
@@ -0,0 +1,66 @@
+import itertools
+import unittest
+
+from kspalculator import parts
+from kspalculator.finder import Finder
+from kspalculator.tanks import PackingTable, packing_table
+
+
+def brute_force(table, units, objective):
+    """Returns (cost, held units) of the best packing, trying up to one tank more than needed of each kind."""
+    best = None
+    for counts in itertools.product(*[range(units // u + 2) for u in table.units]):
+        held = sum(c * u for c, u in zip(counts, table.units))
+        if held < units or (objective == 'mass' and held != units):
+            continue
+        key = (sum(c * t.cost for c, t in zip(counts, table.tanks)), held)
+        if best is None or key < best:
+            best = key
+    return best
+
+
+class TestTanks(unittest.TestCase):
+    def check(self, tanks, sizes):
+        table = PackingTable(tanks)
+        for units in sizes:
+            for objective in ['mass', 'cost']:
+                counts = table.counts(units, objective)
+                found = (sum(c * t.cost for c, t in zip(counts, tanks)),
+                         sum(c * u for c, u in zip(counts, table.units)))
+                self.assertEqual(found, brute_force(table, units, objective), (units, objective))
+
+    def test_optimal(self):
+        """ compare packings with all combinations of tanks """
+        for size in [parts.RadialSize.Small, parts.RadialSize.Large]:
+            tanks = [t for t in parts.RocketFuelTanks if t.size is size]
+            self.check(tanks, range(0, 20))
+        # bigger tanks are not always cheaper per unit
+        self.check([parts.FuelTank('a', None, 100, 1), parts.FuelTank('b', None, 150, 2),
+                    parts.FuelTank('c', None, 500, 4)], range(0, 20))
+
+    def test_binary(self):
+        """ packing for least mass equals the binary decomposition into tanks of 2^n units """
+        tanks = [t for t in parts.RocketFuelTanks if t.size is parts.RadialSize.Large]
+        table = packing_table(tanks)
+        self.assertIs(table, packing_table(list(tanks)))
+        for units in range(0, 200):
+            counts = [(units >> i) & 1 for i in range(len(tanks) - 1)] + [units >> (len(tanks) - 1)]
+            self.assertEqual(list(table.counts(units)), counts)
+
+    def test_finder(self):
+        """ packing by cost gives cheaper, but heavier designs """
+        mission = (5000, None, [1500, 1500], [5.0, 5.0], [0.0, 0.0], 2*[True], 0, False, False, False, False)
+        def key(d):
+            return d.mainengine, d.mainenginecount, d.size
+        by_mass = dict((key(d), d) for d in Finder(*mission).find(False))
+        by_cost = Finder(*mission, packing='cost').find(False)
+        self.assertTrue(any(d.get_cost() < by_mass[key(d)].get_cost() for d in by_cost if key(d) in by_mass))
+        for d in by_cost:
+            if key(d) in by_mass:
+                self.assertLessEqual(d.get_cost(), by_mass[key(d)].get_cost())
+                self.assertGreaterEqual(d.get_mass(), by_mass[key(d)].get_mass())
+        self.assertRaises(ValueError, Finder, *mission, packing='volume')
+
+
+if __name__ == '__main__':
+    unittest.main()